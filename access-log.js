@@ -0,0 +1,133 @@
+import { performance } from "node:perf_hooks";
+import { requestRedisMs } from "./metrics.js";
+
+const REQUEST_START = Symbol("accessLogStart");
+
+const roundMs = (ms) => Math.round(ms * 100) / 100;
+
+// Parses "route=rate,route=rate"; the "default" entry covers other routes
+export const parseSampleRates = (setting) => {
+  const rates = new Map();
+  for (const entry of setting.split(",")) {
+    const split = entry.lastIndexOf("=");
+    if (split <= 0) continue;
+    const rate = parseFloat(entry.slice(split + 1));
+    if (Number.isNaN(rate)) continue;
+    rates.set(entry.slice(0, split).trim(), Math.min(Math.max(rate, 0), 1));
+  }
+  return rates;
+};
+
+// JSON access log, one line per sampled request. Requests are sampled per
+// route, and client and server errors with their own rates. Lines are buffered and
+// written in batches with at most one write in flight, so a request never
+// waits for stdout. While the stream cannot keep up, lines beyond
+// `maxBuffered` are dropped and counted.
+export class AccessLog {
+  constructor({
+    enabled = true,
+    stream = process.stdout,
+    sampleRates = new Map(),
+    clientErrorSampleRate = 1,
+    errorSampleRate = 1,
+    flushIntervalMs = 1000,
+    batchSize = 500,
+    maxBuffered = 10000,
+  } = {}) {
+    this.enabled = enabled;
+    this.stream = stream;
+    this.sampleRates = sampleRates;
+    this.defaultRate = sampleRates.get("default") ?? 1;
+    this.clientErrorSampleRate = clientErrorSampleRate;
+    this.errorSampleRate = errorSampleRate;
+    this.batchSize = batchSize;
+    this.maxBuffered = maxBuffered;
+    this.buffer = [];
+    this.writing = null;
+    this.written = 0;
+    this.dropped = 0;
+    this.sampledOut = 0;
+    this.timer = enabled
+      ? setInterval(() => this.flush(), flushIntervalMs).unref()
+      : null;
+  }
+
+  sampleRate(route, status) {
+    if (status >= 500) return this.errorSampleRate;
+    if (status >= 400) return this.clientErrorSampleRate;
+    return this.sampleRates.get(route) ?? this.defaultRate;
+  }
+
+  // Express middleware: logs each request once its response is sent
+  middleware() {
+    const log = this;
+    // One shared "finish" listener, called with the response as `this`
+    const recordRequest = function () {
+      log.record(this.req, this.statusCode);
+    };
+    return (req, res, next) => {
+      req[REQUEST_START] = performance.now();
+      res.on("finish", recordRequest);
+      next();
+    };
+  }
+
+  record(req, status) {
+    const route = req.route?.path ?? "unmatched";
+    const rate = this.sampleRate(route, status);
+    if (rate <= 0 || (rate < 1 && Math.random() >= rate)) {
+      this.sampledOut++;
+      return;
+    }
+    if (this.buffer.length >= this.maxBuffered) {
+      this.dropped++;
+      return;
+    }
+
+    this.buffer.push(
+      JSON.stringify({
+        time: new Date().toISOString(),
+        method: req.method,
+        route,
+        path: req.path,
+        status,
+        durationMs: roundMs(performance.now() - req[REQUEST_START]),
+        redisMs: roundMs(requestRedisMs(req)),
+        sampleRate: rate,
+      }) + "\n"
+    );
+    if (this.buffer.length >= this.batchSize) this.flush();
+  }
+
+  flush() {
+    if (this.writing || this.buffer.length === 0) return;
+    const lines = this.buffer;
+    this.buffer = [];
+    this.written += lines.length;
+    this.writing = new Promise((resolve) =>
+      this.stream.write(lines.join(""), resolve)
+    ).then(() => {
+      this.writing = null;
+      if (this.buffer.length >= this.batchSize) this.flush();
+    });
+  }
+
+  // Writes out everything buffered; used before the process exits
+  async close() {
+    clearInterval(this.timer);
+    while (this.writing || this.buffer.length) {
+      this.flush();
+      await this.writing;
+    }
+  }
+
+  stats() {
+    return {
+      enabled: this.enabled,
+      buffered: this.buffer.length,
+      written: this.written,
+      dropped: this.dropped,
+      sampledOut: this.sampledOut,
+    };
+  }
+}
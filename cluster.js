@@ -0,0 +1,161 @@
+import cluster from "node:cluster";
+import { availableParallelism } from "node:os";
+
+const QUERY_TIMEOUT_MS = 1000;
+const SHUTDOWN_TIMEOUT_MS = parseInt(
+  process.env.CLUSTER_SHUTDOWN_TIMEOUT_MS ?? "25000"
+);
+const RESTART_WINDOW_MS = 10000;
+const RESTART_DELAY_MAX_MS = 5000;
+
+// CLUSTER_WORKERS unset or 0 runs a single process, "auto" one worker per core
+export const clusterWorkerCount = () => {
+  const setting = process.env.CLUSTER_WORKERS;
+  if (!setting || setting === "0") return 0;
+  if (setting === "auto") return availableParallelism();
+  return Math.max(parseInt(setting) || 0, 0);
+};
+
+// Forks the workers, restarts crashed ones, gathers per-worker reports for
+// /health and /metrics, and drains every worker on SIGTERM.
+export const startPrimary = (count) => {
+  let shuttingDown = false;
+  let restarts = 0;
+  let nextQuery = 0;
+  const recentCrashes = [];
+  const queries = new Map();
+
+  const finishQuery = (key) => {
+    const query = queries.get(key);
+    if (!query) return;
+    queries.delete(key);
+    clearTimeout(query.timer);
+    if (query.requester.isConnected()) {
+      query.requester.send({
+        type: "query-response",
+        id: query.id,
+        workers: count,
+        restarts,
+        reports: query.reports,
+      });
+    }
+  };
+
+  const handleMessage = (worker, message) => {
+    if (message?.type === "query-request") {
+      const key = `${nextQuery++}`;
+      const members = Object.values(cluster.workers).filter((w) =>
+        w.isConnected()
+      );
+      queries.set(key, {
+        id: message.id,
+        requester: worker,
+        expected: members.length,
+        reports: [],
+        timer: setTimeout(() => finishQuery(key), QUERY_TIMEOUT_MS),
+      });
+      for (const member of members) {
+        member.send({ type: "query", key, name: message.name });
+      }
+    } else if (message?.type === "query-report") {
+      const query = queries.get(message.key);
+      if (!query) return;
+      query.reports.push(message.report);
+      if (query.reports.length >= query.expected) finishQuery(message.key);
+    }
+  };
+
+  const fork = () => {
+    const worker = cluster.fork();
+    worker.on("message", (message) => handleMessage(worker, message));
+  };
+
+  cluster.on("exit", (worker, code, signal) => {
+    if (shuttingDown) {
+      console.log(`Worker ${worker.process.pid} stopped`);
+      if (Object.keys(cluster.workers).length === 0) {
+        console.log("All workers stopped");
+        process.exit(0);
+      }
+      return;
+    }
+
+    const now = Date.now();
+    recentCrashes.push(now);
+    while (recentCrashes[0] < now - RESTART_WINDOW_MS) recentCrashes.shift();
+    const delay = Math.min(
+      100 * 2 ** (recentCrashes.length - 1),
+      RESTART_DELAY_MAX_MS
+    );
+    restarts++;
+    console.error(
+      `Worker ${worker.process.pid} exited (${signal || code}), restarting in ${delay}ms`
+    );
+    setTimeout(fork, delay);
+  });
+
+  process.on("SIGTERM", () => {
+    console.log(`SIGTERM received, draining ${count} workers`);
+    shuttingDown = true;
+    const workers = Object.values(cluster.workers);
+    if (workers.length === 0) process.exit(0);
+    for (const worker of workers) worker.process.kill("SIGTERM");
+    setTimeout(() => {
+      console.error("Workers did not stop in time, killing them");
+      for (const worker of Object.values(cluster.workers)) {
+        worker.process.kill("SIGKILL");
+      }
+      process.exit(1);
+    }, SHUTDOWN_TIMEOUT_MS).unref();
+  });
+
+  console.log(`Cluster primary ${process.pid} starting ${count} workers`);
+  for (let i = 0; i < count; i++) fork();
+};
+
+let nextQuery = 0;
+const pendingQueries = new Map();
+
+// Lets the primary collect this worker's reports; `reporters` maps a
+// report name ("health", "metrics") to a function returning the report
+export const serveClusterQueries = (reporters) => {
+  process.on("message", (message) => {
+    if (message?.type === "query") {
+      const report = reporters[message.name]?.() ?? null;
+      process.send({ type: "query-report", key: message.key, report });
+    } else if (message?.type === "query-response") {
+      const resolve = pendingQueries.get(message.id);
+      if (!resolve) return;
+      pendingQueries.delete(message.id);
+      resolve(message);
+    }
+  });
+};
+
+// Resolves with { workers, restarts, reports } holding every worker's report
+export const requestClusterReports = (name) =>
+  new Promise((resolve, reject) => {
+    const id = nextQuery++;
+    pendingQueries.set(id, resolve);
+    process.send({ type: "query-request", id, name });
+    setTimeout(() => {
+      if (pendingQueries.delete(id)) {
+        reject(new Error(`Timed out waiting for cluster ${name} reports`));
+      }
+    }, QUERY_TIMEOUT_MS * 2);
+  });
+
+// Sums the numeric fields of per-worker stats objects
+export const combineStats = (stats) => {
+  const combined = {};
+  for (const entry of stats) {
+    for (const [name, value] of Object.entries(entry)) {
+      if (typeof value === "number") {
+        combined[name] = (combined[name] ?? 0) + value;
+      } else if (!(name in combined)) {
+        combined[name] = value;
+      }
+    }
+  }
+  return combined;
+};
@@ -0,0 +1,307 @@
+import { createHash } from "node:crypto";
+import { nanoid } from "nanoid";
+
+const BASE62 = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz";
+// Longest id that still decodes to a safe integer
+const COMPACT_ID_PATTERN = /^[1-9A-Za-z][0-9A-Za-z]{0,7}$/;
+// Ids that would be shadowed by other GET routes
+const RESERVED_IDS = new Set(["health", "metrics"]);
+const LAYOUT_KEY = "keyspace:layout";
+const COUNTER_KEY = "ids:next";
+
+export const encodeBase62 = (n) => {
+  let id = "";
+  do {
+    id = BASE62[n % 62] + id;
+    n = Math.floor(n / 62);
+  } while (n > 0);
+  return id;
+};
+
+// Returns the counter value of a compact id, or null for any other id
+export const decodeBase62 = (id) => {
+  if (!COMPACT_ID_PATTERN.test(id)) return null;
+  let n = 0;
+  for (const char of id) n = n * 62 + BASE62.indexOf(char);
+  return n;
+};
+
+// The original layout: `short:<id>` holds the URL and `long:<url>` the id,
+// with random 12-character ids
+export class LegacyKeyspace {
+  constructor({ client, metrics, trackInvalid = false }) {
+    this.client = client;
+    this.metrics = metrics;
+    this.trackInvalid = trackInvalid;
+  }
+
+  async open() {}
+
+  // Existing id for each URL, or null
+  async findIds(urls, req) {
+    if (urls.length === 1) {
+      const key = `long:${urls[0]}`;
+      return [await this.metrics.redis("GET", req, this.client.get(key))];
+    }
+    const keys = urls.map((url) => `long:${url}`);
+    return this.metrics.redis("MGET", req, this.client.mGet(keys));
+  }
+
+  // Stores new mappings and returns their ids
+  async create(urls, req) {
+    const ids = urls.map(() => nanoid(12));
+    const keyValues = urls.flatMap((url, i) => [
+      `short:${ids[i]}`,
+      url,
+      `long:${url}`,
+      ids[i],
+    ]);
+    await this.metrics.redis("MSET", req, this.client.mSet(keyValues));
+    return ids;
+  }
+
+  // [longUrl, invalidSince] for each id; invalidSince is only read when
+  // failed URLs are marked rather than deleted
+  async lookup(ids, req) {
+    if (ids.length === 1 && !this.trackInvalid) {
+      const key = `short:${ids[0]}`;
+      return [[await this.metrics.redis("GET", req, this.client.get(key)), null]];
+    }
+    const keys = ids.flatMap((id) =>
+      this.trackInvalid ? [`short:${id}`, `invalid:${id}`] : [`short:${id}`]
+    );
+    const values = await this.metrics.redis("MGET", req, this.client.mGet(keys));
+    const stride = this.trackInvalid ? 2 : 1;
+    return ids.map((id, i) => [
+      values[i * stride],
+      this.trackInvalid ? values[i * stride + 1] : null,
+    ]);
+  }
+
+  // Random ids are practically never created after a lookup missed them
+  mayBeCreated() {
+    return false;
+  }
+
+  async markInvalid(id) {
+    await this.metrics.redis(
+      "SET",
+      null,
+      this.client.set(`invalid:${id}`, Date.now().toString())
+    );
+  }
+
+  async remove(id, url) {
+    await this.metrics.redis(
+      "MULTI",
+      null,
+      this.client.multi().del(`short:${id}`).del(`long:${url}`).exec()
+    );
+  }
+}
+
+// Hands out counter values reserved from Redis in blocks, so most new
+// mappings need no extra round trip. Values left in a block when the
+// process exits are never used.
+class IdBlockAllocator {
+  constructor({ client, metrics, blockSize }) {
+    this.client = client;
+    this.metrics = metrics;
+    this.blockSize = blockSize;
+    this.next = 1;
+    this.end = 0;
+    this.refilling = null;
+  }
+
+  async take(count, req) {
+    const numbers = [];
+    while (numbers.length < count) {
+      if (this.next > this.end) await this.refill(count - numbers.length, req);
+      while (numbers.length < count && this.next <= this.end) {
+        const n = this.next++;
+        if (!RESERVED_IDS.has(encodeBase62(n))) numbers.push(n);
+      }
+    }
+    return numbers;
+  }
+
+  // Concurrent callers share one INCRBY
+  refill(needed, req) {
+    this.refilling ??= (async () => {
+      const size = Math.max(this.blockSize, needed);
+      const end = await this.metrics.redis(
+        "INCRBY",
+        req,
+        this.client.incrBy(COUNTER_KEY, size)
+      );
+      this.next = end - size + 1;
+      this.end = end;
+    })().finally(() => {
+      this.refilling = null;
+    });
+    return this.refilling;
+  }
+}
+
+// Compact layout. Ids are base62 counter values. Mappings are packed into
+// hashes of `bucketSize` ids (`shorts:<bucket>`), and the reverse index
+// keys a 96-bit SHA-256 prefix of the URL into 2^digestBucketBits hashes
+// (`longs:<bucket>`), so neither stores the URL in a key name. Small hashes
+// keep Redis's listpack encoding; see the README for the server settings.
+// Ids from the legacy layout are still resolved when `legacyReads` is set.
+export class CompactKeyspace {
+  constructor({
+    client,
+    metrics,
+    trackInvalid = false,
+    bucketSize = 100,
+    digestBucketBits = 20,
+    idBlockSize = 1000,
+    legacyReads = true,
+  }) {
+    this.client = client;
+    this.metrics = metrics;
+    this.trackInvalid = trackInvalid;
+    this.layout = {
+      bucketSize,
+      digestBucketBits: Math.min(Math.max(digestBucketBits, 1), 24),
+    };
+    this.legacyReads = legacyReads;
+    // Highest counter value seen; ids above it have not been handed out yet
+    this.counter = 0;
+    this.allocator = new IdBlockAllocator({
+      client,
+      metrics,
+      blockSize: idBlockSize,
+    });
+  }
+
+  // Bucket sizes cannot change once mappings exist, so the first instance
+  // saves its layout and every later one uses the saved layout
+  async open() {
+    await this.client.set(LAYOUT_KEY, JSON.stringify(this.layout), { NX: true });
+    const saved = JSON.parse(await this.client.get(LAYOUT_KEY));
+    if (
+      saved.bucketSize !== this.layout.bucketSize ||
+      saved.digestBucketBits !== this.layout.digestBucketBits
+    ) {
+      console.warn(
+        `Using the saved keyspace layout ${JSON.stringify(saved)} instead of ${JSON.stringify(this.layout)}`
+      );
+    }
+    this.layout = saved;
+  }
+
+  forwardSlot(n) {
+    const bucket = Math.floor(n / this.layout.bucketSize);
+    return [`shorts:${encodeBase62(bucket)}`, `${n % this.layout.bucketSize}`];
+  }
+
+  reverseSlot(url) {
+    const digest = createHash("sha256").update(url).digest();
+    const bucket = digest.readUInt32BE(0) >>> (32 - this.layout.digestBucketBits);
+    return [
+      `longs:${encodeBase62(bucket)}`,
+      digest.subarray(4, 16).toString("base64url"),
+    ];
+  }
+
+  async findIds(urls, req) {
+    const pipeline = this.client.multi();
+    for (const url of urls) {
+      pipeline.hGet(...this.reverseSlot(url));
+      if (this.legacyReads) pipeline.get(`long:${url}`);
+    }
+    // Timed as one round trip: the pipeline mixes HGET and legacy GET reads
+    const replies = await this.metrics.redis(
+      "PIPELINE",
+      req,
+      pipeline.execAsPipeline()
+    );
+    const stride = this.legacyReads ? 2 : 1;
+    return urls.map(
+      (url, i) => replies[i * stride] ?? (this.legacyReads ? replies[i * stride + 1] : null)
+    );
+  }
+
+  async create(urls, req) {
+    const numbers = await this.allocator.take(urls.length, req);
+    // One HSET per bucket, so a batch of consecutive ids touches few keys
+    const buckets = new Map();
+    const setField = (key, field, value) => {
+      let fields = buckets.get(key);
+      if (!fields) buckets.set(key, (fields = {}));
+      fields[field] = value;
+    };
+    const ids = numbers.map((n, i) => {
+      const id = encodeBase62(n);
+      setField(...this.forwardSlot(n), urls[i]);
+      setField(...this.reverseSlot(urls[i]), id);
+      return id;
+    });
+
+    const transaction = this.client.multi();
+    for (const [key, fields] of buckets) transaction.hSet(key, fields);
+    await this.metrics.redis("MULTI", req, transaction.exec());
+    return ids;
+  }
+
+  // Ids above the counter may be created by any pod at any moment, so a
+  // lookup that missed them is not worth caching
+  mayBeCreated(id) {
+    const n = decodeBase62(id);
+    return n !== null && n > Math.max(this.counter, this.allocator.end);
+  }
+
+  async lookup(ids, req) {
+    const pipeline = this.client.multi();
+    let queued = 0;
+    // Ids above the known counter also read the counter, for mayBeCreated
+    let counterSlot = -1;
+    // Reply index of each id's URL and invalid mark, -1 when not read
+    const slots = ids.map((id) => {
+      const n = decodeBase62(id);
+      if (n !== null && counterSlot < 0 && this.mayBeCreated(id)) {
+        pipeline.get(COUNTER_KEY);
+        counterSlot = queued++;
+      }
+      if (n !== null) pipeline.hGet(...this.forwardSlot(n));
+      else if (this.legacyReads) pipeline.get(`short:${id}`);
+      else return [-1, -1];
+      const urlSlot = queued++;
+      if (!this.trackInvalid) return [urlSlot, -1];
+      pipeline.get(`invalid:${id}`);
+      return [urlSlot, queued++];
+    });
+    const replies = queued
+      ? await this.metrics.redis("PIPELINE", req, pipeline.execAsPipeline())
+      : [];
+    if (counterSlot >= 0) {
+      this.counter = Math.max(this.counter, parseInt(replies[counterSlot]) || 0);
+    }
+    return slots.map(([urlSlot, invalidSlot]) => [
+      replies[urlSlot] ?? null,
+      replies[invalidSlot] ?? null,
+    ]);
+  }
+
+  async markInvalid(id) {
+    await this.metrics.redis(
+      "SET",
+      null,
+      this.client.set(`invalid:${id}`, Date.now().toString())
+    );
+  }
+
+  async remove(id, url) {
+    const n = decodeBase62(id);
+    const transaction = this.client.multi();
+    if (n !== null) {
+      transaction.hDel(...this.forwardSlot(n));
+      transaction.hDel(...this.reverseSlot(url));
+    } else {
+      transaction.del(`short:${id}`).del(`long:${url}`);
+    }
+    await this.metrics.redis("MULTI", null, transaction.exec());
+  }
+}
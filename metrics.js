@@ -0,0 +1,224 @@
+import { monitorEventLoopDelay, performance } from "node:perf_hooks";
+
+// Upper bounds in milliseconds; exposed in seconds as Prometheus expects
+const BUCKETS_MS = [
+  0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000,
+];
+const BUCKET_LABELS = [...BUCKETS_MS.map((ms) => `${ms / 1000}`), "+Inf"];
+const REQUEST_START = Symbol("requestStart");
+const REDIS_MS = Symbol("redisMs");
+const LOOP_RESOLUTION_MS = 10;
+
+// Fixed-bucket histogram; observe() only updates preallocated arrays
+class Histogram {
+  constructor() {
+    this.counts = new Float64Array(BUCKETS_MS.length + 1);
+    this.sum = 0;
+  }
+
+  observe(ms) {
+    let i = 0;
+    while (i < BUCKETS_MS.length && ms > BUCKETS_MS[i]) i++;
+    this.counts[i]++;
+    this.sum += ms;
+  }
+}
+
+class RouteMetrics {
+  constructor() {
+    this.statuses = new Map();
+    this.duration = new Histogram();
+    this.redis = new Histogram();
+  }
+}
+
+// Collects request, Redis command and event-loop metrics. Series are
+// created the first time a route, status or command is seen; after that a
+// request only increments counters.
+export class Metrics {
+  constructor() {
+    this.routes = new Map();
+    this.commands = new Map();
+    this.loopDelay = monitorEventLoopDelay({ resolution: LOOP_RESOLUTION_MS });
+    this.loopDelay.enable();
+  }
+
+  route(name) {
+    let metrics = this.routes.get(name);
+    if (!metrics) {
+      metrics = new RouteMetrics();
+      this.routes.set(name, metrics);
+    }
+    return metrics;
+  }
+
+  // Express middleware: times every request until its response is sent
+  middleware() {
+    const metrics = this;
+    // One shared "finish" listener, called with the response as `this`
+    const recordRequest = function () {
+      metrics.observeRequest(this.req, this.statusCode);
+    };
+    return (req, res, next) => {
+      req[REQUEST_START] = performance.now();
+      req[REDIS_MS] = 0;
+      res.on("finish", recordRequest);
+      next();
+    };
+  }
+
+  observeRequest(req, statusCode) {
+    const route = this.route(req.route?.path ?? "unmatched");
+    const statusCount = route.statuses.get(statusCode) ?? 0;
+    route.statuses.set(statusCode, statusCount + 1);
+    route.duration.observe(performance.now() - req[REQUEST_START]);
+    route.redis.observe(req[REDIS_MS]);
+  }
+
+  // Awaits a Redis command, adding its latency to the command histogram and
+  // to the Redis time of the request that issued it
+  async redis(command, req, pending) {
+    const start = performance.now();
+    try {
+      return await pending;
+    } finally {
+      const ms = performance.now() - start;
+      let histogram = this.commands.get(command);
+      if (!histogram) {
+        histogram = new Histogram();
+        this.commands.set(command, histogram);
+      }
+      histogram.observe(ms);
+      if (req) req[REDIS_MS] += ms;
+    }
+  }
+
+  // Plain-object copy that cluster workers send to the primary
+  snapshot() {
+    const histogram = (h) => ({ counts: Array.from(h.counts), sum: h.sum });
+    // The delay histogram includes the sampling timer's own interval
+    const lag = (ns) => Math.max(ns / 1e6 - LOOP_RESOLUTION_MS, 0);
+    return {
+      routes: [...this.routes].map(([name, route]) => ({
+        name,
+        statuses: [...route.statuses],
+        duration: histogram(route.duration),
+        redis: histogram(route.redis),
+      })),
+      commands: [...this.commands].map(([name, h]) => ({
+        name,
+        ...histogram(h),
+      })),
+      loop: {
+        p50: lag(this.loopDelay.percentile(50)),
+        p99: lag(this.loopDelay.percentile(99)),
+        max: lag(this.loopDelay.max),
+      },
+    };
+  }
+}
+
+// Time the request has spent waiting for Redis so far
+export const requestRedisMs = (req) => req[REDIS_MS] ?? 0;
+
+const mergeHistogram = (into, from) => {
+  if (!into) return { counts: [...from.counts], sum: from.sum };
+  from.counts.forEach((count, i) => (into.counts[i] += count));
+  into.sum += from.sum;
+  return into;
+};
+
+// Combines worker snapshots: counters and histograms are summed, event-loop
+// lag keeps the worst worker
+export const mergeSnapshots = (snapshots) => {
+  const routes = new Map();
+  const commands = new Map();
+  const loop = { p50: 0, p99: 0, max: 0 };
+  for (const snapshot of snapshots) {
+    for (const route of snapshot.routes) {
+      const merged = routes.get(route.name) ?? { statuses: new Map() };
+      for (const [status, count] of route.statuses) {
+        merged.statuses.set(status, (merged.statuses.get(status) ?? 0) + count);
+      }
+      merged.duration = mergeHistogram(merged.duration, route.duration);
+      merged.redis = mergeHistogram(merged.redis, route.redis);
+      routes.set(route.name, merged);
+    }
+    for (const command of snapshot.commands) {
+      commands.set(command.name, mergeHistogram(commands.get(command.name), command));
+    }
+    for (const name of Object.keys(loop)) {
+      loop[name] = Math.max(loop[name], snapshot.loop[name]);
+    }
+  }
+  return {
+    routes: [...routes].map(([name, route]) => ({
+      name,
+      ...route,
+      statuses: [...route.statuses],
+    })),
+    commands: [...commands].map(([name, h]) => ({ name, ...h })),
+    loop,
+  };
+};
+
+const escapeLabel = (value) =>
+  String(value).replace(/\\/g, "\\\\").replace(/"/g, '\\"').replace(/\n/g, "\\n");
+
+const histogramLines = (lines, name, labels, histogram) => {
+  let cumulative = 0;
+  histogram.counts.forEach((count, i) => {
+    cumulative += count;
+    lines.push(`${name}_bucket{${labels},le="${BUCKET_LABELS[i]}"} ${cumulative}`);
+  });
+  lines.push(`${name}_sum{${labels}} ${histogram.sum / 1000}`);
+  lines.push(`${name}_count{${labels}} ${cumulative}`);
+};
+
+// Prometheus text exposition format 0.0.4
+export const formatMetrics = (snapshot) => {
+  const lines = [
+    "# HELP http_requests_total Requests handled, by route and status code.",
+    "# TYPE http_requests_total counter",
+  ];
+  for (const route of snapshot.routes) {
+    for (const [status, count] of route.statuses) {
+      lines.push(
+        `http_requests_total{route="${escapeLabel(route.name)}",status="${status}"} ${count}`
+      );
+    }
+  }
+
+  lines.push(
+    "# HELP http_request_duration_seconds Time from receiving a request to sending its response.",
+    "# TYPE http_request_duration_seconds histogram"
+  );
+  for (const route of snapshot.routes) {
+    histogramLines(lines, "http_request_duration_seconds", `route="${escapeLabel(route.name)}"`, route.duration);
+  }
+
+  lines.push(
+    "# HELP http_request_redis_seconds Time a request spent waiting for Redis commands.",
+    "# TYPE http_request_redis_seconds histogram"
+  );
+  for (const route of snapshot.routes) {
+    histogramLines(lines, "http_request_redis_seconds", `route="${escapeLabel(route.name)}"`, route.redis);
+  }
+
+  lines.push(
+    "# HELP redis_command_duration_seconds Redis command round-trip time.",
+    "# TYPE redis_command_duration_seconds histogram"
+  );
+  for (const command of snapshot.commands) {
+    histogramLines(lines, "redis_command_duration_seconds", `command="${escapeLabel(command.name)}"`, command);
+  }
+
+  lines.push(
+    "# HELP nodejs_eventloop_lag_seconds Event-loop delay since the process started.",
+    "# TYPE nodejs_eventloop_lag_seconds gauge",
+    `nodejs_eventloop_lag_seconds{quantile="0.5"} ${snapshot.loop.p50 / 1000}`,
+    `nodejs_eventloop_lag_seconds{quantile="0.99"} ${snapshot.loop.p99 / 1000}`,
+    `nodejs_eventloop_lag_seconds{quantile="1"} ${snapshot.loop.max / 1000}`
+  );
+  return lines.join("\n") + "\n";
+};
@@ -0,0 +1,101 @@
+// Bounded LRU cache of short id -> long URL lookups for the redirect route.
+// Mappings never change once written, so entries only expire to bound
+// staleness after manual deletes. Ids that were not found are cached
+// separately with a short TTL, so scanners cannot evict real mappings; the
+// TTL also bounds how long an id created on another pod is still a 404.
+export class RedirectCache {
+  constructor({
+    maxEntries = 10000,
+    ttlMs = 300000,
+    maxNegativeEntries = 1000,
+    negativeTtlMs = 5000,
+  } = {}) {
+    this.maxEntries = maxEntries;
+    this.ttlMs = ttlMs;
+    this.maxNegativeEntries = maxNegativeEntries;
+    this.negativeTtlMs = negativeTtlMs;
+    this.entries = new Map();
+    this.negative = new Map();
+    this.hits = 0;
+    this.negativeHits = 0;
+    this.misses = 0;
+    this.evictions = 0;
+    this.expirations = 0;
+  }
+
+  get enabled() {
+    return this.maxEntries > 0;
+  }
+
+  // Returns the long URL, null for a cached "not found", or undefined on a miss
+  lookup(id) {
+    if (!this.enabled) return undefined;
+    const now = Date.now();
+
+    const entry = this.entries.get(id);
+    if (entry !== undefined) {
+      this.entries.delete(id);
+      if (entry.expiresAt > now) {
+        this.entries.set(id, entry);
+        this.hits++;
+        return entry.url;
+      }
+      this.expirations++;
+    }
+
+    const expiresAt = this.negative.get(id);
+    if (expiresAt !== undefined) {
+      if (expiresAt > now) {
+        this.negativeHits++;
+        return null;
+      }
+      this.negative.delete(id);
+      this.expirations++;
+    }
+
+    this.misses++;
+    return undefined;
+  }
+
+  store(id, url) {
+    if (!this.enabled) return;
+    this.negative.delete(id);
+    this.entries.delete(id);
+    this.entries.set(id, { url, expiresAt: Date.now() + this.ttlMs });
+    if (this.entries.size > this.maxEntries) {
+      this.entries.delete(this.entries.keys().next().value);
+      this.evictions++;
+    }
+  }
+
+  storeMissing(id) {
+    if (!this.enabled || this.maxNegativeEntries <= 0) return;
+    this.negative.delete(id);
+    this.negative.set(id, Date.now() + this.negativeTtlMs);
+    if (this.negative.size > this.maxNegativeEntries) {
+      this.negative.delete(this.negative.keys().next().value);
+      this.evictions++;
+    }
+  }
+
+  forget(id) {
+    this.entries.delete(id);
+    this.negative.delete(id);
+  }
+
+  stats() {
+    const lookups = this.hits + this.negativeHits + this.misses;
+    return {
+      enabled: this.enabled,
+      size: this.entries.size,
+      negativeSize: this.negative.size,
+      maxEntries: this.maxEntries,
+      hits: this.hits,
+      negativeHits: this.negativeHits,
+      misses: this.misses,
+      evictions: this.evictions,
+      expirations: this.expirations,
+      hitRatio: lookups ? (this.hits + this.negativeHits) / lookups : 0,
+    };
+  }
+}
@@ -0,0 +1,481 @@
+import "dotenv/config";
+import express from "express";
+import cluster from "node:cluster";
+import { once } from "node:events";
+import { createClient } from "redis";
+import { RedirectCache } from "./redirect-cache.js";
+import { UrlValidator, ValidationQueue } from "./url-validator.js";
+import {
+  combineStats,
+  requestClusterReports,
+  serveClusterQueries,
+} from "./cluster.js";
+import { Metrics, formatMetrics, mergeSnapshots } from "./metrics.js";
+import { CompactKeyspace, LegacyKeyspace } from "./keyspace.js";
+import { AccessLog, parseSampleRates } from "./access-log.js";
+
+const PORT = process.env.PORT || 5000;
+const BATCH_MAX_ITEMS = parseInt(process.env.BATCH_MAX_ITEMS ?? "10000");
+const BATCH_CHUNK_SIZE = parseInt(process.env.BATCH_CHUNK_SIZE ?? "500");
+
+const metrics = new Metrics();
+const accessLog = new AccessLog({
+  enabled: process.env.ACCESS_LOG !== "off",
+  sampleRates: parseSampleRates(
+    process.env.ACCESS_LOG_SAMPLE_RATES ??
+      "/:shortenedId=0.01,/health=0,/metrics=0,default=1"
+  ),
+  clientErrorSampleRate: parseFloat(
+    process.env.ACCESS_LOG_CLIENT_ERROR_SAMPLE_RATE ?? "1"
+  ),
+  errorSampleRate: parseFloat(process.env.ACCESS_LOG_ERROR_SAMPLE_RATE ?? "1"),
+  flushIntervalMs: parseInt(process.env.ACCESS_LOG_FLUSH_MS ?? "1000"),
+  batchSize: parseInt(process.env.ACCESS_LOG_BATCH_SIZE ?? "500"),
+  maxBuffered: parseInt(process.env.ACCESS_LOG_BUFFER_SIZE ?? "10000"),
+});
+
+const app = express();
+app.use(metrics.middleware());
+if (accessLog.enabled) app.use(accessLog.middleware());
+app.use(
+  ["/shorten/batch", "/resolve/batch"],
+  express.json({ limit: process.env.BATCH_BODY_LIMIT || "5mb" })
+);
+app.use(express.json());
+
+const redirectCache = new RedirectCache({
+  maxEntries: parseInt(process.env.REDIRECT_CACHE_SIZE ?? "10000"),
+  ttlMs: parseInt(process.env.REDIRECT_CACHE_TTL_MS ?? "300000"),
+  maxNegativeEntries: parseInt(process.env.REDIRECT_CACHE_NEGATIVE_SIZE ?? "1000"),
+  negativeTtlMs: parseInt(process.env.REDIRECT_CACHE_NEGATIVE_TTL_MS ?? "5000"),
+});
+
+const VALIDATION_MODE = process.env.VALIDATION_MODE || "sync";
+const VALIDATION_FAILURE_ACTION =
+  process.env.VALIDATION_FAILURE_ACTION || "delete";
+const urlValidator = new UrlValidator({
+  timeoutMs: parseInt(process.env.VALIDATION_TIMEOUT_MS ?? "5000"),
+  maxEntries: parseInt(process.env.VALIDATION_CACHE_SIZE ?? "10000"),
+  validTtlMs: parseInt(process.env.VALIDATION_VALID_TTL_MS ?? "600000"),
+  invalidTtlMs: parseInt(process.env.VALIDATION_INVALID_TTL_MS ?? "60000"),
+  hostFailureTtlMs: parseInt(process.env.VALIDATION_HOST_FAILURE_TTL_MS ?? "30000"),
+  maxPerHost: parseInt(process.env.VALIDATION_MAX_PER_HOST ?? "4"),
+});
+
+const server = app.listen(PORT, "0.0.0.0", () => {
+  console.log(`Server started and listening on 0.0.0.0:${PORT}`);
+  console.log(`Health endpoint available at http://0.0.0.0:${PORT}/health`);
+});
+
+const workerReport = () => ({
+  worker: cluster.worker?.id,
+  pid: process.pid,
+  ready: server.listening,
+  redis: isRedisConnected,
+  redirectCache: redirectCache.stats(),
+  accessLog: accessLog.stats(),
+  urlValidation: {
+    mode: VALIDATION_MODE,
+    ...urlValidator.stats(),
+    ...(validationQueue ? validationQueue.stats() : {}),
+  },
+});
+
+// In cluster mode the worker that receives /health reports every worker
+const clusterHealth = async () => {
+  const { workers, restarts, reports } = await requestClusterReports("health");
+  const ready = reports.filter((report) => report.ready).length;
+  const connected = reports.filter((report) => report.redis).length;
+  const redirectCacheStats = combineStats(reports.map((r) => r.redirectCache));
+  const lookups =
+    redirectCacheStats.hits +
+    redirectCacheStats.negativeHits +
+    redirectCacheStats.misses;
+  redirectCacheStats.hitRatio = lookups
+    ? (redirectCacheStats.hits + redirectCacheStats.negativeHits) / lookups
+    : 0;
+
+  return {
+    status: ready === workers && connected === workers ? "healthy" : "degraded",
+    redis:
+      connected === workers
+        ? "connected"
+        : connected > 0
+          ? `connected in ${connected} of ${workers} workers`
+          : "not connected yet",
+    redirectCache: redirectCacheStats,
+    urlValidation: combineStats(reports.map((r) => r.urlValidation)),
+    accessLog: combineStats(reports.map((r) => r.accessLog)),
+    cluster: {
+      workers,
+      ready,
+      restarts,
+      members: reports.map(({ worker, pid, ready, redis }) => ({
+        worker,
+        pid,
+        ready,
+        redis,
+      })),
+    },
+  };
+};
+
+app.get("/health", async (req, res) => {
+  const {
+    redirectCache: cacheStats,
+    urlValidation,
+    accessLog: accessLogStats,
+  } = workerReport();
+  let health = {
+    status: "healthy",
+    redis: isRedisConnected ? "connected" : "not connected yet",
+    redirectCache: cacheStats,
+    urlValidation,
+    accessLog: accessLogStats,
+  };
+  if (cluster.isWorker) {
+    try {
+      health = await clusterHealth();
+    } catch (err) {
+      console.error("Cluster health error:", err);
+    }
+  }
+  const { status, redis, ...details } = health;
+  res.status(200).json({
+    status,
+    redis,
+    appVersion: "1.0.0",
+    timestamp: new Date().toISOString(),
+    ...details,
+  });
+});
+
+let isRedisConnected = false;
+
+const client = createClient({
+  socket: {
+    host: process.env.REDIS_HOST || "redis",
+    port: parseInt(process.env.REDIS_PORT) || 6379,
+    reconnectStrategy: (retries) => {
+      const delay = Math.min(retries * 100, 5000);
+      console.log(
+        `Redis reconnection attempt ${retries}, retrying in ${delay}ms`
+      );
+      return delay;
+    },
+  },
+  password: process.env.REDIS_PASSWORD || "password",
+});
+
+client.on("connect", () => console.log("Redis connecting..."));
+client.on("ready", () => console.log("Redis connected and ready"));
+client.on("error", (err) => console.error("Redis error:", err));
+client.on("reconnecting", () => console.log("Redis reconnecting..."));
+client.on("end", () => console.log("Redis connection closed"));
+
+(async () => {
+  try {
+    console.log("Attempting to connect to Redis...");
+    await client.connect();
+    await keyspace.open();
+    isRedisConnected = true;
+    console.log("Redis connection established successfully");
+  } catch (err) {
+    console.error("Failed to connect to Redis:", err);
+  }
+})();
+
+if (cluster.isWorker) {
+  serveClusterQueries({
+    health: workerReport,
+    metrics: () => metrics.snapshot(),
+  });
+}
+
+const BASE_URL = process.env.BASE_URL || "http://localhost:5000";
+
+const keyspaceOptions = {
+  client,
+  metrics,
+  trackInvalid: VALIDATION_FAILURE_ACTION === "mark",
+};
+const keyspace =
+  process.env.KEYSPACE_LAYOUT === "compact"
+    ? new CompactKeyspace({
+        ...keyspaceOptions,
+        bucketSize: parseInt(process.env.KEYSPACE_BUCKET_SIZE ?? "100"),
+        digestBucketBits: parseInt(process.env.KEYSPACE_DIGEST_BUCKET_BITS ?? "20"),
+        idBlockSize: parseInt(process.env.KEYSPACE_ID_BLOCK_SIZE ?? "1000"),
+        legacyReads: process.env.KEYSPACE_LEGACY_READS !== "false",
+      })
+    : new LegacyKeyspace(keyspaceOptions);
+
+const handleInvalidUrl = async (shortId, url) => {
+  console.log(`Shortened URL ${shortId} failed validation: ${url}`);
+  redirectCache.forget(shortId);
+  if (VALIDATION_FAILURE_ACTION === "mark") {
+    await keyspace.markInvalid(shortId);
+  } else {
+    await keyspace.remove(shortId, url);
+  }
+};
+
+const validationQueue =
+  VALIDATION_MODE === "async"
+    ? new ValidationQueue({
+        validator: urlValidator,
+        onInvalid: handleInvalidUrl,
+        concurrency: parseInt(process.env.VALIDATION_WORKERS ?? "8"),
+        maxQueued: parseInt(process.env.VALIDATION_QUEUE_SIZE ?? "10000"),
+        maxAttempts: parseInt(process.env.VALIDATION_MAX_ATTEMPTS ?? "3"),
+        retryDelayMs: parseInt(process.env.VALIDATION_RETRY_DELAY_MS ?? "30000"),
+      })
+    : null;
+
+app.post("/shorten", async (req, res) => {
+  if (!isRedisConnected) {
+    return res
+      .status(503)
+      .json({ error: "Service unavailable. Redis not connected." });
+  }
+
+  const { url } = req.body;
+  if (!url) return res.status(400).json({ error: "URL is required" });
+
+  try {
+    const [existingShortId] = await keyspace.findIds([url], req);
+    if (existingShortId) {
+      return res.json({ shortened_url: `${BASE_URL}/${existingShortId}` });
+    }
+
+    const isValid = validationQueue
+      ? urlValidator.peek(url) !== false
+      : await urlValidator.validate(url);
+    if (isValid === null) {
+      return res.status(400).json({ error: "URL could not be verified" });
+    }
+    if (!isValid) return res.status(400).json({ error: "Invalid URL" });
+
+    const [shortId] = await keyspace.create([url], req);
+    redirectCache.store(shortId, url);
+    if (validationQueue && !validationQueue.enqueue(shortId, url)) {
+      console.warn(`Validation queue full, ${shortId} was not validated`);
+    }
+
+    return res.status(201).json({ shortened_url: `${BASE_URL}/${shortId}` });
+  } catch (err) {
+    console.error("Shortening error:", err);
+    return res.status(500).json({ error: "Internal server error" });
+  }
+});
+
+const readBatch = (req, res, field) => {
+  const items = req.body?.[field];
+  if (!Array.isArray(items) || items.length === 0) {
+    res.status(400).json({ error: `${field} must be a non-empty array` });
+    return null;
+  }
+  if (items.length > BATCH_MAX_ITEMS) {
+    res.status(413).json({ error: `At most ${BATCH_MAX_ITEMS} ${field} per batch` });
+    return null;
+  }
+  res.status(200).type("application/x-ndjson");
+  return items;
+};
+
+// Streams one NDJSON line per input item, in input order. Each chunk's
+// unique items are resolved with a handful of Redis commands; items that
+// repeat earlier in the batch reuse the first result.
+const streamBatch = async (res, items, resolveChunk) => {
+  const results = new Map();
+  try {
+    for (let start = 0; start < items.length; start += BATCH_CHUNK_SIZE) {
+      const chunk = items.slice(start, start + BATCH_CHUNK_SIZE);
+      const pending = [...new Set(chunk.filter((item) => !results.has(item)))];
+      if (pending.length) await resolveChunk(pending, results);
+
+      const lines = chunk.map(
+        (item, offset) =>
+          JSON.stringify({ index: start + offset, ...results.get(item) }) + "\n"
+      );
+      if (res.destroyed) return;
+      if (!res.write(lines.join(""))) await once(res, "drain");
+    }
+  } catch (err) {
+    console.error("Batch error:", err);
+    res.write(JSON.stringify({ error: "Internal server error" }) + "\n");
+  }
+  res.end();
+};
+
+app.post("/shorten/batch", async (req, res) => {
+  if (!isRedisConnected) {
+    return res
+      .status(503)
+      .json({ error: "Service unavailable. Redis not connected." });
+  }
+
+  const urls = readBatch(req, res, "urls");
+  if (!urls) return;
+
+  await streamBatch(res, urls, async (pending, results) => {
+    const candidates = [];
+    for (const url of pending) {
+      if (typeof url === "string" && url) candidates.push(url);
+      else results.set(url, { url, status: 400, error: "URL is required" });
+    }
+    if (!candidates.length) return;
+
+    const existingIds = await keyspace.findIds(candidates, req);
+    const missing = candidates.filter((url, i) => {
+      if (!existingIds[i]) return true;
+      results.set(url, {
+        url,
+        status: 200,
+        shortened_url: `${BASE_URL}/${existingIds[i]}`,
+      });
+      return false;
+    });
+
+    const validity = validationQueue
+      ? missing.map((url) => urlValidator.peek(url) !== false)
+      : await Promise.all(missing.map((url) => urlValidator.validate(url)));
+    const valid = missing.filter((url, i) => {
+      if (validity[i]) return true;
+      const error =
+        validity[i] === null ? "URL could not be verified" : "Invalid URL";
+      results.set(url, { url, status: 400, error });
+      return false;
+    });
+    if (!valid.length) return;
+
+    const shortIds = await keyspace.create(valid, req);
+    for (const [i, url] of valid.entries()) {
+      const shortId = shortIds[i];
+      redirectCache.store(shortId, url);
+      if (validationQueue && !validationQueue.enqueue(shortId, url)) {
+        console.warn(`Validation queue full, ${shortId} was not validated`);
+      }
+      results.set(url, {
+        url,
+        status: 201,
+        shortened_url: `${BASE_URL}/${shortId}`,
+      });
+    }
+  });
+});
+
+app.post("/resolve/batch", async (req, res) => {
+  if (!isRedisConnected) {
+    return res
+      .status(503)
+      .json({ error: "Service unavailable. Redis not connected." });
+  }
+
+  const ids = readBatch(req, res, "ids");
+  if (!ids) return;
+
+  await streamBatch(res, ids, async (pending, results) => {
+    const uncached = [];
+    for (const id of pending) {
+      const cachedUrl =
+        typeof id === "string" ? redirectCache.lookup(id) : null;
+      if (cachedUrl) results.set(id, { id, status: 200, url: cachedUrl });
+      else if (cachedUrl === null) results.set(id, { id, status: 404, url: null });
+      else uncached.push(id);
+    }
+    if (!uncached.length) return;
+
+    const mappings = await keyspace.lookup(uncached, req);
+    uncached.forEach((id, i) => {
+      const [longUrl, invalidSince] = mappings[i];
+      if (!longUrl) {
+        if (!keyspace.mayBeCreated(id)) redirectCache.storeMissing(id);
+        results.set(id, { id, status: 404, url: null });
+      } else if (invalidSince) {
+        results.set(id, { id, status: 410, url: null });
+      } else {
+        redirectCache.store(id, longUrl);
+        results.set(id, { id, status: 200, url: longUrl });
+      }
+    });
+  });
+});
+
+app.get("/metrics", async (req, res) => {
+  let snapshot = metrics.snapshot();
+  if (cluster.isWorker) {
+    try {
+      const { reports } = await requestClusterReports("metrics");
+      snapshot = mergeSnapshots(reports.filter(Boolean));
+    } catch (err) {
+      console.error("Cluster metrics error:", err);
+    }
+  }
+  res
+    .status(200)
+    .type("text/plain; version=0.0.4; charset=utf-8")
+    .send(formatMetrics(snapshot));
+});
+
+app.get("/:shortenedId", async (req, res) => {
+  if (!isRedisConnected) {
+    return res
+      .status(503)
+      .json({ error: "Service unavailable. Redis not connected." });
+  }
+
+  const { shortenedId } = req.params;
+  const cachedUrl = redirectCache.lookup(shortenedId);
+  if (cachedUrl) return res.redirect(cachedUrl);
+  if (cachedUrl === null) {
+    return res.status(404).json({ error: "URL not found" });
+  }
+
+  try {
+    const [[longUrl, invalidSince]] = await keyspace.lookup([shortenedId], req);
+    if (!longUrl) {
+      if (!keyspace.mayBeCreated(shortenedId)) {
+        redirectCache.storeMissing(shortenedId);
+      }
+      return res.status(404).json({ error: "URL not found" });
+    }
+    if (invalidSince) {
+      return res.status(410).json({ error: "URL failed validation" });
+    }
+    redirectCache.store(shortenedId, longUrl);
+    return res.redirect(longUrl);
+  } catch (err) {
+    console.error("Redirection error:", err);
+    return res.status(500).json({ error: "Internal server error" });
+  }
+});
+
+app.use((req, res) => {
+  res.status(404).json({
+    error: "Not found",
+    path: req.path,
+    method: req.method,
+  });
+});
+
+process.on("SIGTERM", () => {
+  console.log("SIGTERM received, shutting down gracefully");
+  server.close(() => {
+    console.log("HTTP server closed");
+    client
+      .quit()
+      .then(() => {
+        console.log("Redis connection closed");
+        return 0;
+      })
+      .catch((err) => {
+        console.error("Error closing Redis connection", err);
+        return 1;
+      })
+      .then(async (code) => {
+        await accessLog.close();
+        process.exit(code);
+      });
+  });
+});
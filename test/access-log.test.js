@@ -0,0 +1,51 @@
+import assert from "node:assert/strict";
+import { test } from "node:test";
+import { AccessLog, parseSampleRates } from "../access-log.js";
+
+// Stream stand-in collecting what is written
+const fakeStream = (lines = []) => ({
+  write(chunk, callback) {
+    lines.push(...chunk.trimEnd().split("\n").map((line) => JSON.parse(line)));
+    callback();
+  },
+});
+
+const request = (path) => ({ method: "GET", path, route: { path: "/:shortenedId" } });
+
+test("errors bypass the route's sample rate", async () => {
+  const lines = [];
+  const log = new AccessLog({
+    stream: fakeStream(lines),
+    sampleRates: parseSampleRates("/:shortenedId=0,default=1"),
+  });
+  log.record(request("/found"), 302);
+  log.record(request("/missing"), 404);
+  log.record(request("/broken"), 500);
+  await log.close();
+
+  assert.deepEqual(
+    lines.map(({ status, sampleRate }) => [status, sampleRate]),
+    [
+      [404, 1],
+      [500, 1],
+    ]
+  );
+  assert.equal(log.stats().sampledOut, 1);
+});
+
+test("client and server errors have separate sample rates", async () => {
+  const lines = [];
+  const log = new AccessLog({
+    stream: fakeStream(lines),
+    sampleRates: parseSampleRates("default=1"),
+    clientErrorSampleRate: 0,
+    errorSampleRate: 1,
+  });
+  log.record(request("/missing"), 404);
+  log.record(request("/gone"), 410);
+  log.record(request("/broken"), 503);
+  await log.close();
+
+  assert.deepEqual(lines.map(({ status }) => status), [503]);
+  assert.equal(log.stats().sampledOut, 2);
+});
@@ -0,0 +1,37 @@
+import assert from "node:assert/strict";
+import { spawn } from "node:child_process";
+import { once } from "node:events";
+import { mkdtemp, rm, writeFile } from "node:fs/promises";
+import { tmpdir } from "node:os";
+import { join } from "node:path";
+import { test } from "node:test";
+import { fileURLToPath } from "node:url";
+
+const INDEX = fileURLToPath(new URL("../index.js", import.meta.url));
+
+test("CLUSTER_WORKERS is read from .env", { timeout: 15000 }, async (t) => {
+  const dir = await mkdtemp(join(tmpdir(), "cluster-env-"));
+  t.after(() => rm(dir, { recursive: true, force: true }));
+  await writeFile(join(dir, ".env"), "CLUSTER_WORKERS=2\n");
+
+  const env = { ...process.env, PORT: "0", ACCESS_LOG: "off" };
+  delete env.CLUSTER_WORKERS;
+  const child = spawn(process.execPath, [INDEX], { cwd: dir, env });
+  const exited = once(child, "exit");
+  t.after(() => child.kill("SIGKILL"));
+
+  let output = "";
+  child.stdout.setEncoding("utf8");
+  const started = new Promise((resolve, reject) => {
+    child.stdout.on("data", (chunk) => {
+      output += chunk;
+      if (output.includes("starting 2 workers")) resolve();
+    });
+    exited.then(() => reject(new Error(`index.js exited early:\n${output}`)));
+  });
+  await started;
+
+  child.kill("SIGTERM");
+  await exited;
+  assert.match(output, /Cluster primary \d+ starting 2 workers/);
+});
@@ -0,0 +1,67 @@
+import assert from "node:assert/strict";
+import { test } from "node:test";
+import { CompactKeyspace, encodeBase62 } from "../keyspace.js";
+
+// Redis client stand-in answering pipelined HGET and GET reads from maps
+const fakeClient = ({ hashes = {}, strings = {} }) => ({
+  multi() {
+    const replies = [];
+    const pipeline = {
+      hGet(key, field) {
+        replies.push(hashes[key]?.[field] ?? null);
+        return pipeline;
+      },
+      get(key) {
+        replies.push(strings[key] ?? null);
+        return pipeline;
+      },
+      execAsPipeline: async () => replies,
+    };
+    return pipeline;
+  },
+});
+
+// Metrics stand-in recording the command label of each timed call
+const fakeMetrics = (labels) => ({
+  redis(command, req, pending) {
+    labels.push(command);
+    return pending;
+  },
+});
+
+test("mixed HGET and GET pipelines are timed as PIPELINE", async () => {
+  const labels = [];
+  const keyspace = new CompactKeyspace({
+    client: fakeClient({
+      hashes: { "shorts:0": { 7: "https://example.com/new" } },
+      strings: { "short:legacyId1234": "https://example.com/old" },
+    }),
+    metrics: fakeMetrics(labels),
+  });
+
+  assert.deepEqual(await keyspace.lookup([encodeBase62(7), "legacyId1234"]), [
+    ["https://example.com/new", null],
+    ["https://example.com/old", null],
+  ]);
+  assert.deepEqual(await keyspace.findIds(["https://example.com/new"]), [null]);
+  assert.deepEqual(labels, ["PIPELINE", "PIPELINE"]);
+});
+
+test("misses above the id counter may still be created", async () => {
+  const strings = { "ids:next": "5" };
+  const keyspace = new CompactKeyspace({
+    client: fakeClient({ strings }),
+    metrics: fakeMetrics([]),
+  });
+  const id = encodeBase62(7);
+
+  assert.equal(keyspace.mayBeCreated(id), true);
+  assert.deepEqual(await keyspace.lookup([id]), [[null, null]]);
+  assert.equal(keyspace.mayBeCreated(id), true);
+
+  // Another pod hands out ids up to 10; the miss is now final
+  strings["ids:next"] = "10";
+  assert.deepEqual(await keyspace.lookup([id]), [[null, null]]);
+  assert.equal(keyspace.mayBeCreated(id), false);
+  assert.equal(keyspace.mayBeCreated("legacyId1234"), false);
+});
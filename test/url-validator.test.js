@@ -0,0 +1,102 @@
+import assert from "node:assert/strict";
+import { test } from "node:test";
+import { setTimeout as sleep } from "node:timers/promises";
+import { UrlValidator, ValidationQueue } from "../url-validator.js";
+
+// fetch stand-in answering from a status per method, or throwing
+const fakeFetch = (answers, calls = []) =>
+  async (url, { method, signal }) => {
+    calls.push(method);
+    const answer = answers[method];
+    if (answer instanceof Error) throw answer;
+    if (answer === "hang") {
+      return new Promise((resolve, reject) =>
+        signal.addEventListener("abort", () => reject(new Error("aborted")))
+      );
+    }
+    return { status: answer };
+  };
+
+const quiet = (t) => t.mock.method(console, "error", () => {});
+
+test("network errors leave the URL unknown instead of invalid", async (t) => {
+  quiet(t);
+  const validator = new UrlValidator({
+    fetch: fakeFetch({ HEAD: new Error("ECONNRESET") }),
+  });
+  assert.equal(await validator.validate("https://flaky.example/a"), null);
+  assert.equal(validator.peek("https://flaky.example/a"), undefined);
+  // Other URLs on the host are answered from the host failure cache, still unknown
+  assert.equal(await validator.validate("https://flaky.example/b"), null);
+  assert.equal(validator.stats().hostFailureHits, 1);
+});
+
+test("timeouts leave the URL unknown", async (t) => {
+  quiet(t);
+  const validator = new UrlValidator({
+    fetch: fakeFetch({ HEAD: "hang" }),
+    timeoutMs: 20,
+  });
+  assert.equal(await validator.validate("https://slow.example/"), null);
+});
+
+test("only 404 and 410 are invalid, 429 and 5xx are unknown", async () => {
+  const expected = { 200: true, 301: true, 403: true, 404: false, 410: false, 429: null, 503: null };
+  for (const [status, result] of Object.entries(expected)) {
+    const validator = new UrlValidator({ fetch: fakeFetch({ HEAD: Number(status) }) });
+    assert.equal(await validator.validate("https://example.com/"), result, `HEAD ${status}`);
+  }
+});
+
+test("HEAD rejected with 405 or 501 falls back to GET", async () => {
+  for (const status of [405, 501]) {
+    const calls = [];
+    const validator = new UrlValidator({
+      fetch: fakeFetch({ HEAD: status, GET: 200 }, calls),
+    });
+    assert.equal(await validator.validate("https://no-head.example/"), true);
+    assert.deepEqual(calls, ["HEAD", "GET"]);
+  }
+});
+
+test("the queue retries unknown URLs and keeps the mapping", async (t) => {
+  quiet(t);
+  const invalid = [];
+  const validator = new UrlValidator({
+    fetch: fakeFetch({ HEAD: new Error("ETIMEDOUT") }),
+    hostFailureTtlMs: 0,
+  });
+  const queue = new ValidationQueue({
+    validator,
+    onInvalid: async (shortId) => invalid.push(shortId),
+    maxAttempts: 3,
+    retryDelayMs: 5,
+  });
+  queue.enqueue("abc", "https://down.example/");
+  await sleep(100);
+  assert.deepEqual(invalid, []);
+  const stats = queue.stats();
+  assert.equal(stats.retried, 2);
+  assert.equal(stats.unverified, 1);
+  assert.equal(validator.stats().requests, 3);
+});
+
+test("a retry that gets a definitive 404 removes the mapping", async (t) => {
+  quiet(t);
+  let attempts = 0;
+  const fetch = async () => {
+    if (++attempts === 1) throw new Error("EAI_AGAIN");
+    return { status: 404 };
+  };
+  const invalid = [];
+  const queue = new ValidationQueue({
+    validator: new UrlValidator({ fetch, hostFailureTtlMs: 0 }),
+    onInvalid: async (shortId) => invalid.push(shortId),
+    retryDelayMs: 5,
+  });
+  queue.enqueue("abc", "https://gone.example/");
+  await sleep(50);
+  assert.equal(attempts, 2);
+  assert.deepEqual(invalid, ["abc"]);
+  assert.equal(queue.stats().retried, 1);
+});
@@ -1,12 +1,24 @@
+import io
 import os
 import sys
+import time
+import re
 import json
 import glob
+import mmap
+import argparse
+import cProfile
+import threading
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
-from datetime import datetime
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from datetime import datetime, timedelta, timezone
 import logging
 import traceback
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from urllib.parse import urlsplit
 
 logging.basicConfig(
     level=logging.INFO,
@@ -14,8 +26,320 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
-def load_k6_results(results_dir):
-    """Load and parse k6 JSON results"""
+K6_CHUNK_SIZE = 16 * 1024 * 1024
+K6_POINT_MARKER = b'"Point"'
+K6_TAGS = ('name', 'method', 'status', 'expected_response')
+SERVER_FILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'server.js')
+SERVER_STATIC_ROUTES = ('/health', '/shorten', '/shorten/batch', '/resolve/batch', '/metrics')
+
+def server_static_routes(server_file=SERVER_FILE):
+    """Routes without parameters that server.js registers, or the known ones when it is not next to this script"""
+    try:
+        with open(server_file) as f:
+            source = f.read()
+    except OSError:
+        return SERVER_STATIC_ROUTES
+    routes = re.findall(r'app\.(?:get|post|put|patch|delete)\(\s*"(/[^":]*)"', source)
+    return tuple(dict.fromkeys(routes)) or SERVER_STATIC_ROUTES
+
+K6_STATIC_ROUTES = server_static_routes()
+
+@lru_cache(maxsize=4096)
+def k6_endpoint(name):
+    """Collapse a k6 request name (the full URL unless tagged) into its Express route"""
+    path = urlsplit(name).path if '://' in name else name
+    if path in K6_STATIC_ROUTES or ':' in path:
+        return path
+    if path.count('/') == 1 and len(path) > 1:
+        return '/:shortenedId'
+    return path
+
+def parse_k6_timestamps(times):
+    """Convert RFC 3339 k6 timestamps to UTC int64 nanoseconds in one vectorized pass"""
+    try:
+        local = [ts[:-1] if ts[-1] == 'Z' else ts[:-6] for ts in times]
+        offsets = ['+00:00' if ts[-1] == 'Z' else ts[-6:] for ts in times]
+        ns = np.array(local, dtype='datetime64[ns]').astype(np.int64)
+        codes, uniques = pd.factorize(np.asarray(offsets, dtype=object))
+        shifts = np.array([
+            (1 if offset[0] == '+' else -1) * (int(offset[1:3]) * 60 + int(offset[4:6])) * 60 * 10**9
+            for offset in uniques
+        ], dtype=np.int64)
+        return ns - shifts[codes]
+    except (ValueError, IndexError):
+        return pd.to_datetime(times, utc=True, format='ISO8601').as_unit('ns').asi8
+
+HISTOGRAM_RELATIVE_ERROR = 0.01
+HISTOGRAM_MIN_VALUE = 1e-3
+HISTOGRAM_MAX_VALUE = 1e9
+REPORT_PERCENTILES = [('p50', 0.5), ('p90', 0.9), ('p95', 0.95), ('p99', 0.99), ('p99.9', 0.999)]
+PERCENTILE_WINDOW_NS = 10 * 10**9
+PERCENTILE_WINDOW_ERROR = 0.05
+PERCENTILE_WINDOW_METRICS = ('http_req_duration',)
+
+class LatencyHistogram:
+    """Log-bucketed histogram with bounded relative error, fixed memory and cheap merges"""
+
+    def __init__(self, relative_error=HISTOGRAM_RELATIVE_ERROR, min_value=HISTOGRAM_MIN_VALUE,
+                 max_value=HISTOGRAM_MAX_VALUE):
+        self.relative_error = relative_error
+        self.min_value = min_value
+        self.max_value = max_value
+        self.gamma = (1 + relative_error) / (1 - relative_error)
+        self.log_gamma = np.log(self.gamma)
+        self.offset = int(np.floor(np.log(min_value) / self.log_gamma))
+        size = int(np.ceil(np.log(max_value) / self.log_gamma)) - self.offset + 1
+        self.counts = np.zeros(size, dtype=np.int64)
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def record(self, values):
+        """Add an array of samples; values below min_value share a single zero bucket"""
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        
+        small = values < self.min_value
+        self.zero_count += int(small.sum())
+        index = np.ceil(np.log(values[~small]) / self.log_gamma).astype(np.int64) - self.offset
+        np.clip(index, 0, len(self.counts) - 1, out=index)
+        self.counts += np.bincount(index, minlength=len(self.counts))
+
+    def merge(self, other):
+        """Add the samples of a histogram with the same bucket layout"""
+        if (other.relative_error, other.min_value, other.max_value) != (self.relative_error, self.min_value, self.max_value):
+            raise ValueError("Cannot merge histograms with different bucket layouts")
+        self.counts += other.counts
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+    def quantile(self, q):
+        """Estimate the q-th quantile within relative_error of a recorded sample"""
+        if self.count == 0:
+            return np.nan
+        rank = q * (self.count - 1)
+        if rank < self.zero_count:
+            return self.min
+        i = int(np.searchsorted(np.cumsum(self.counts), rank - self.zero_count, side='right'))
+        value = 2 * self.gamma ** (i + self.offset) / (self.gamma + 1)
+        return min(max(value, self.min), self.max)
+
+    def to_arrays(self, prefix, arrays):
+        arrays[f'{prefix}n'] = self.counts
+        arrays[f'{prefix}s'] = np.array([self.zero_count, self.count], dtype=np.int64)
+        arrays[f'{prefix}f'] = np.array([self.total, self.min, self.max, self.relative_error,
+                                         self.min_value, self.max_value], dtype=np.float64)
+
+    @classmethod
+    def from_arrays(cls, prefix, arrays):
+        total, min_, max_, relative_error, min_value, max_value = arrays[f'{prefix}f'].tolist()
+        histogram = cls(relative_error, min_value, max_value)
+        histogram.counts = arrays[f'{prefix}n'].copy()
+        histogram.zero_count, histogram.count = arrays[f'{prefix}s'].tolist()
+        histogram.total, histogram.min, histogram.max = total, min_, max_
+        return histogram
+
+class K6Columns:
+    """Per-metric typed columns (int64 ns timestamps, float64 values) built from streamed k6 points"""
+
+    def __init__(self):
+        self.timestamps = {}
+        self.values = {}
+        self.tag_codes = {}
+        self.tag_categories = {tag: [] for tag in K6_TAGS}
+        self.tag_lookup = {tag: {} for tag in K6_TAGS}
+        self.histograms = {}
+        self.window_histograms = {}
+        self.tz = None
+        self.point_count = 0
+
+    def __len__(self):
+        return self.point_count
+
+    def ingest_lines(self, lines):
+        """Parse one chunk of raw NDJSON lines, keeping only Point rows"""
+        lines = [line for line in lines if K6_POINT_MARKER in line]
+        try:
+            records = json.loads(b'[' + b','.join(lines) + b']')
+        except ValueError:
+            records = []
+            for line in lines:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    continue
+        
+        metrics = []
+        times = []
+        values = []
+        tags = {tag: [] for tag in K6_TAGS}
+        for data in records:
+            if not isinstance(data, dict) or data.get('type') != 'Point':
+                continue
+            point = data.get('data', {})
+            timestamp = point.get('time')
+            if not timestamp:
+                continue
+            try:
+                value = float(point.get('value', 0))
+            except (TypeError, ValueError):
+                continue
+            metrics.append(data.get('metric', ''))
+            times.append(timestamp)
+            values.append(value)
+            point_tags = point.get('tags') or {}
+            name = point_tags.get('name')
+            tags['name'].append(k6_endpoint(name) if name else None)
+            tags['method'].append(point_tags.get('method'))
+            tags['status'].append(point_tags.get('status'))
+            tags['expected_response'].append(point_tags.get('expected_response'))
+        
+        if not times:
+            return 0
+        
+        if self.tz is None:
+            self.tz = datetime.fromisoformat(times[0].replace('Z', '+00:00')).tzinfo
+        
+        ns = parse_k6_timestamps(times)
+        values = np.asarray(values, dtype=np.float64)
+        tag_codes = {tag: self.encode_tag(tag, tags[tag]) for tag in K6_TAGS}
+        codes, names = pd.factorize(np.asarray(metrics, dtype=object))
+        for code, metric in enumerate(names):
+            mask = codes == code
+            self.timestamps.setdefault(metric, []).append(ns[mask])
+            self.values.setdefault(metric, []).append(values[mask])
+            metric_tags = self.tag_codes.setdefault(metric, {tag: [] for tag in K6_TAGS})
+            for tag in K6_TAGS:
+                metric_tags[tag].append(tag_codes[tag][mask])
+            self.histograms.setdefault(metric, LatencyHistogram()).record(values[mask])
+            if metric in PERCENTILE_WINDOW_METRICS:
+                self.record_windows(metric, ns[mask], values[mask])
+        
+        self.point_count += len(times)
+        return len(times)
+
+    def tag_code(self, tag, value):
+        """Dictionary code of a tag value, adding it to the tag's categories if new"""
+        lookup = self.tag_lookup[tag]
+        code = lookup.get(value)
+        if code is None:
+            code = lookup[value] = len(self.tag_categories[tag])
+            self.tag_categories[tag].append(value)
+        return code
+
+    def encode_tag(self, tag, raw):
+        """Dictionary-encode one chunk of tag values into int32 codes (-1 when missing)"""
+        codes, uniques = pd.factorize(np.asarray(raw, dtype=object))
+        remap = np.array([self.tag_code(tag, str(value)) for value in uniques] + [-1], dtype=np.int32)
+        return remap[codes]
+
+    def record_windows(self, metric, ns, values):
+        """Fill the per-window histograms used for percentile-over-time charts"""
+        windows = self.window_histograms.setdefault(metric, {})
+        starts = ns // PERCENTILE_WINDOW_NS
+        for start in np.unique(starts):
+            histogram = windows.get(int(start))
+            if histogram is None:
+                histogram = windows[int(start)] = LatencyHistogram(PERCENTILE_WINDOW_ERROR)
+            histogram.record(values[starts == start])
+
+    def to_dataframes(self):
+        """Build the sorted per-metric timestamp/value frames"""
+        dataframes = {}
+        for metric, segments in self.timestamps.items():
+            ns = np.concatenate(segments)
+            if len(ns) == 0:
+                continue
+            df = pd.DataFrame({
+                'timestamp': pd.to_datetime(ns, utc=True).tz_convert(self.tz),
+                'value': np.concatenate(self.values[metric])
+            })
+            for tag, segments in self.tag_codes[metric].items():
+                codes = np.concatenate(segments)
+                if (codes >= 0).any():
+                    df[tag] = pd.Categorical.from_codes(codes, categories=self.tag_categories[tag])
+            df = df.sort_values('timestamp', kind='stable')
+            dataframes[metric] = df
+        return dataframes
+
+    def merge(self, other):
+        """Append the columns of a later part of the same file"""
+        remaps = {
+            tag: np.array([self.tag_code(tag, value) for value in categories] + [-1], dtype=np.int32)
+            for tag, categories in other.tag_categories.items()
+        }
+        for metric, segments in other.timestamps.items():
+            self.timestamps.setdefault(metric, []).extend(segments)
+            self.values.setdefault(metric, []).extend(other.values[metric])
+            metric_tags = self.tag_codes.setdefault(metric, {tag: [] for tag in K6_TAGS})
+            for tag, tag_segments in other.tag_codes[metric].items():
+                metric_tags[tag].extend(remaps[tag][codes] for codes in tag_segments)
+        for metric, histogram in other.histograms.items():
+            if metric in self.histograms:
+                self.histograms[metric].merge(histogram)
+            else:
+                self.histograms[metric] = histogram
+        for metric, windows in other.window_histograms.items():
+            own = self.window_histograms.setdefault(metric, {})
+            for start, histogram in windows.items():
+                if start in own:
+                    own[start].merge(histogram)
+                else:
+                    own[start] = histogram
+        if self.tz is None:
+            self.tz = other.tz
+        self.point_count += other.point_count
+        return self
+
+def split_k6_ranges(path, parts):
+    """Split a file into byte ranges that start and end on newline boundaries"""
+    size = os.path.getsize(path)
+    if size == 0:
+        return []
+    
+    bounds = [0]
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        for i in range(1, parts):
+            newline = mm.find(b'\n', max(bounds[-1], size * i // parts))
+            if newline < 0:
+                break
+            bounds.append(newline + 1)
+    bounds.append(size)
+    return [(start, end) for start, end in zip(bounds, bounds[1:]) if end > start]
+
+def ingest_k6_range(path, start, end, chunk_size=K6_CHUNK_SIZE):
+    """Parse the Point rows of one newline-aligned byte range of a k6 results file"""
+    columns = K6Columns()
+    if end <= start:
+        return columns
+    
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        pos = start
+        while pos < end:
+            cut = mm.find(b'\n', min(pos + chunk_size, end) - 1, end)
+            cut = end if cut < 0 else cut + 1
+            columns.ingest_lines(mm[pos:cut].split(b'\n'))
+            pos = cut
+    return columns
+
+def load_k6_results(results_dir, chunk_size=K6_CHUNK_SIZE, workers=1):
+    """Stream k6 JSON results into per-metric typed columns, optionally across a process pool"""
     k6_result_file = os.path.join(results_dir, 'k6-results.json')
     
     if not os.path.exists(k6_result_file):
@@ -23,31 +347,35 @@ def load_k6_results(results_dir):
         return None
     
     try:
-        metrics = []
-        with open(k6_result_file, 'r') as f:
-            for line in f:
-                try:
-                    data = json.loads(line)
-                    if 'type' in data and data['type'] == 'Point':
-                        metrics.append(data)
-                except json.JSONDecodeError:
-                    continue
+        columns = K6Columns()
+        ranges = split_k6_ranges(k6_result_file, max(1, workers))
+        if workers > 1 and len(ranges) > 1:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                parts = pool.map(ingest_k6_range, [k6_result_file] * len(ranges),
+                                 *zip(*ranges), [chunk_size] * len(ranges))
+                for part in parts:
+                    columns.merge(part)
+        else:
+            for start, end in ranges:
+                columns.merge(ingest_k6_range(k6_result_file, start, end, chunk_size))
         
-        logger.info(f"Loaded {len(metrics)} k6 metrics from {k6_result_file}")
-        return metrics
+        logger.info(f"Loaded {len(columns)} k6 metrics from {k6_result_file}")
+        return columns
     except Exception as e:
         logger.error(f"Error loading k6 results: {str(e)}")
         return None
 
+CSV_METRIC_FILES = {
+    'pod': ['podmetrics.csv', 'pod-metrics.csv'],
+    'health': ['healthmetrics.csv', 'health-metrics.csv'],
+    'hpa': ['hpametrics.csv', 'hpa-metrics.csv']
+}
+
 def load_csv_metrics(results_dir, metrics_dir):
     """Load CSV metrics collected during the test"""
     metrics = {}
     
-    file_variants = {
-        'pod': ['podmetrics.csv', 'pod-metrics.csv'],
-        'health': ['healthmetrics.csv', 'health-metrics.csv'],
-        'hpa': ['hpametrics.csv', 'hpa-metrics.csv']
-    }
+    file_variants = CSV_METRIC_FILES
     
     if not os.path.exists(metrics_dir):
         logger.warning(f"Metrics directory not found: {metrics_dir}")
@@ -77,27 +405,7 @@ def analyze_k6_results(metrics):
         return None
     
     try:
-        results = {}
-        for point in metrics:
-            metric = point.get('metric', '')
-            timestamp = point.get('data', {}).get('time', '')
-            value = point.get('data', {}).get('value', 0)
-            
-            if metric not in results:
-                results[metric] = {'timestamps': [], 'values': []}
-            
-            results[metric]['timestamps'].append(timestamp)
-            results[metric]['values'].append(value)
-        
-        dataframes = {}
-        for metric, data in results.items():
-            if data['timestamps'] and data['values']:
-                df = pd.DataFrame({
-                    'timestamp': [datetime.fromisoformat(ts.replace('Z', '+00:00')) for ts in data['timestamps']],
-                    'value': data['values']
-                })
-                df = df.sort_values('timestamp')
-                dataframes[metric] = df
+        dataframes = metrics.to_dataframes()
         
         logger.info(f"Analyzed {len(dataframes)} k6 metrics")
         return dataframes
@@ -105,6 +413,230 @@ def analyze_k6_results(metrics):
         logger.error(f"Error analyzing k6 results: {str(e)}")
         return None
 
+def analyze_k6_percentiles(metrics):
+    """Percentiles per time window from the histograms filled during ingest"""
+    if not metrics or not metrics.window_histograms:
+        return None
+    
+    try:
+        percentiles = {}
+        for metric, windows in metrics.window_histograms.items():
+            starts = sorted(windows)
+            data = {
+                'timestamp': pd.to_datetime(np.array(starts, dtype=np.int64) * PERCENTILE_WINDOW_NS,
+                                            utc=True).tz_convert(metrics.tz),
+                'count': [windows[start].count for start in starts]
+            }
+            for label, q in REPORT_PERCENTILES:
+                data[label] = [windows[start].quantile(q) for start in starts]
+            percentiles[metric] = pd.DataFrame(data)
+        
+        logger.info(f"Analyzed windowed percentiles for {len(percentiles)} k6 metrics")
+        return percentiles
+    except Exception as e:
+        logger.error(f"Error analyzing k6 percentiles: {str(e)}")
+        return None
+
+def analyze_k6_breakdown(k6_data):
+    """Latency, throughput and error rate per endpoint and per endpoint/status from k6 tags"""
+    df = (k6_data or {}).get('http_req_duration')
+    if df is None or 'name' not in df.columns:
+        logger.warning("No tagged http_req_duration points for the endpoint breakdown")
+        return None
+    
+    try:
+        seconds = max((df['timestamp'].max() - df['timestamp'].min()).total_seconds(), 1.0)
+        df = df.assign(
+            status=df['status'] if 'status' in df.columns else 'unknown',
+            failed=(df['expected_response'] == 'false').astype(float) if 'expected_response' in df.columns else 0.0
+        )
+        
+        tables = []
+        for keys in (['name'], ['name', 'status']):
+            grouped = df.groupby(keys, observed=True)
+            table = grouped['value'].agg(['count', 'mean', 'max'])
+            table = table.join(grouped['value'].quantile([0.5, 0.95, 0.99]).unstack())
+            table['error_rate'] = grouped['failed'].mean()
+            table = table.reset_index()
+            if 'status' not in keys:
+                table['status'] = 'all'
+            tables.append(table)
+        
+        breakdown = pd.concat(tables, ignore_index=True)
+        breakdown['name'] = breakdown['name'].astype(str)
+        breakdown['status'] = breakdown['status'].astype(str)
+        breakdown = breakdown.rename(columns={'name': 'endpoint', 'count': 'requests', 'mean': 'avg',
+                                              0.5: 'p50', 0.95: 'p95', 0.99: 'p99'})
+        breakdown['rps'] = breakdown['requests'] / seconds
+        breakdown = breakdown.sort_values(['endpoint', 'status'], key=lambda col: col.where(col != 'all', ''))
+        
+        logger.info(f"Analyzed breakdown for {breakdown['endpoint'].nunique()} endpoints")
+        return breakdown.reset_index(drop=True)
+    except Exception as e:
+        logger.error(f"Error analyzing endpoint breakdown: {str(e)}\n{traceback.format_exc()}")
+        return None
+
+def analyze_k6_endpoints(k6_data):
+    """Per-endpoint latency histograms and per-window request counts, the compact form used to compare runs"""
+    df = (k6_data or {}).get('http_req_duration')
+    if df is None or 'name' not in df.columns:
+        return {}, None
+    
+    try:
+        histograms = {}
+        for endpoint, values in df.groupby('name', observed=True)['value']:
+            histogram = LatencyHistogram()
+            histogram.record(values.to_numpy())
+            histograms[str(endpoint)] = histogram
+        
+        windows = pd.DatetimeIndex(df['timestamp']).as_unit('ns').asi8 // PERCENTILE_WINDOW_NS
+        rates = df[['name']].assign(window=windows).groupby(['name', 'window'], observed=True).size()
+        rates = rates.rename('requests').reset_index().rename(columns={'name': 'endpoint'})
+        return histograms, rates
+    except Exception as e:
+        logger.error(f"Error analyzing endpoint histograms: {str(e)}\n{traceback.format_exc()}")
+        return {}, None
+
+SERVER_METRICS_FILE = 'server-metrics.json'
+SERVER_HISTOGRAMS = {'http_request_duration_seconds': 'server', 'http_request_redis_seconds': 'redis'}
+
+def load_server_metrics(results_dir, window=None):
+    """Sum the increase of each scraped /metrics series over the run, treating drops as counter resets"""
+    metrics_file = os.path.join(results_dir, SERVER_METRICS_FILE)
+    if not os.path.exists(metrics_file):
+        return None
+    
+    try:
+        with open(metrics_file, 'r') as f:
+            scrape_log = [json.loads(line) for line in f if line.strip()]
+        if window is not None:
+            # Keep the scrapes bracketing the k6 run so preseeding is not counted
+            start, end = (pd.Timestamp(t).tz_convert('UTC') for t in window)
+            times = [pd.Timestamp(scrape['time']).tz_convert('UTC') for scrape in scrape_log]
+            first = max([i for i, t in enumerate(times) if t <= start], default=0)
+            final = min([i for i, t in enumerate(times) if t >= end], default=len(scrape_log) - 1)
+            scrape_log = scrape_log[first:final + 1]
+        
+        increases, previous, latest = {}, {}, {}
+        scrapes = 0
+        for scrape in scrape_log:
+            scrapes += 1
+            for name, labels, value in scrape['samples']:
+                key = (name, tuple(sorted(labels.items())))
+                last_value = previous.get(key)
+                if last_value is not None:
+                    increases[key] = increases.get(key, 0.0) + (value - last_value if value >= last_value else value)
+                previous[key] = value
+                latest[key] = value
+        if scrapes < 2:
+            logger.warning(f"{metrics_file} needs at least two scrapes to measure server time")
+            return None
+        
+        routes, commands = {}, {}
+        for (name, labels), increase in increases.items():
+            labels = dict(labels)
+            base, _, kind = name.rpartition('_')
+            if base in SERVER_HISTOGRAMS and 'route' in labels:
+                series = routes.setdefault(labels['route'], {}).setdefault(SERVER_HISTOGRAMS[base], {'buckets': {}})
+            elif base == 'redis_command_duration_seconds' and 'command' in labels:
+                series = commands.setdefault(labels['command'], {'buckets': {}})
+            else:
+                continue
+            if kind == 'bucket':
+                series['buckets'][float(labels['le'])] = increase
+            else:
+                series[kind] = increase
+        loop = {dict(labels).get('quantile'): value * 1000 for (name, labels), value in latest.items()
+                if name == 'nodejs_eventloop_lag_seconds'}
+        logger.info(f"Loaded {scrapes} server metric scrapes for {len(routes)} routes")
+        return {'routes': routes, 'commands': commands, 'loop': loop, 'scrapes': scrapes}
+    except Exception as e:
+        logger.error(f"Error loading server metrics: {str(e)}\n{traceback.format_exc()}")
+        return None
+
+def bucket_quantile(buckets, q):
+    """Estimate a quantile in ms from cumulative Prometheus buckets by linear interpolation, as histogram_quantile does"""
+    bounds = sorted(buckets)
+    total = buckets[bounds[-1]] if bounds else 0
+    if total <= 0:
+        return np.nan
+    rank = q * total
+    lower, below = 0.0, 0.0
+    for bound in bounds:
+        count = buckets[bound]
+        if count >= rank:
+            if np.isinf(bound):
+                return lower * 1000
+            return (lower + (bound - lower) * (rank - below) / max(count - below, 1e-12)) * 1000
+        lower, below = bound, count
+    return lower * 1000
+
+def histogram_summary(series):
+    """Count, mean and p99 in ms of one scraped histogram increase"""
+    count = (series or {}).get('count', 0)
+    if not count:
+        return {'count': 0, 'avg': np.nan, 'p99': np.nan}
+    return {
+        'count': count,
+        'avg': series['sum'] / count * 1000,
+        # Routes that never wait on Redis observe only zeros, which would interpolate to half the first bucket
+        'p99': bucket_quantile(series['buckets'], 0.99) if series['sum'] else 0.0
+    }
+
+def analyze_server_time(server_metrics, endpoint_histograms):
+    """Split each endpoint's client-side latency into Redis time, other server time and network/queueing time"""
+    if not server_metrics:
+        return None
+    
+    try:
+        rows = []
+        for route, series in sorted(server_metrics['routes'].items()):
+            server = histogram_summary(series.get('server'))
+            redis = histogram_summary(series.get('redis'))
+            if not server['count']:
+                continue
+            client = (endpoint_histograms or {}).get(route)
+            client_avg = client.mean() if client is not None else np.nan
+            rows.append({
+                'endpoint': route,
+                'requests': int(server['count']),
+                'client_avg': client_avg,
+                'client_p99': client.quantile(0.99) if client is not None else np.nan,
+                'server_avg': server['avg'],
+                'server_p99': server['p99'],
+                'redis_avg': redis['avg'],
+                'redis_p99': redis['p99'],
+                'app_avg': server['avg'] - redis['avg'],
+                'network_avg': max(client_avg - server['avg'], 0) if client is not None else np.nan
+            })
+        commands = pd.DataFrame([
+            {'command': command, **histogram_summary(series)}
+            for command, series in sorted(server_metrics['commands'].items())
+        ])
+        logger.info(f"Analyzed server time for {len(rows)} endpoints")
+        return {'endpoints': pd.DataFrame(rows), 'commands': commands, 'loop': server_metrics['loop']}
+    except Exception as e:
+        logger.error(f"Error analyzing server time: {str(e)}\n{traceback.format_exc()}")
+        return None
+
+K8S_QUANTITY_PATTERN = r'^\s*([+-]?(?:\d+\.?\d*|\.\d+))(?:[eE]([+-]?\d+))?(Ki|Mi|Gi|Ti|Pi|Ei|n|u|m|k|M|G|T|P|E)?\s*$'
+K8S_QUANTITY_MULTIPLIERS = {
+    '': 1.0, 'n': 1e-9, 'u': 1e-6, 'm': 1e-3,
+    'k': 1e3, 'M': 1e6, 'G': 1e9, 'T': 1e12, 'P': 1e15, 'E': 1e18,
+    'Ki': 2.0**10, 'Mi': 2.0**20, 'Gi': 2.0**30, 'Ti': 2.0**40, 'Pi': 2.0**50, 'Ei': 2.0**60
+}
+
+def parse_k8s_quantity(values, scale=1.0):
+    """Parse a column of Kubernetes quantities into base units divided by scale, NaN when malformed"""
+    values = pd.Series(values)
+    codes, uniques = pd.factorize(values)
+    parts = pd.Series(uniques, dtype=object).astype(str).str.extract(K8S_QUANTITY_PATTERN)
+    number = pd.to_numeric(parts[0], errors='coerce')
+    exponent = pd.to_numeric(parts[1], errors='coerce').fillna(0)
+    multiplier = parts[2].fillna('').map(K8S_QUANTITY_MULTIPLIERS)
+    parsed = np.append((number * 10.0 ** exponent * multiplier / scale).to_numpy(dtype=np.float64), np.nan)
+    return pd.Series(parsed[codes], index=values.index)
+
 def analyze_pod_metrics(pod_metrics):
     """Analyze pod metrics"""
     if pod_metrics is None or pod_metrics.empty:
@@ -112,15 +644,9 @@ def analyze_pod_metrics(pod_metrics):
         return None
     
     try:
-        pod_metrics['CPU_Value'] = pod_metrics['CPU'].apply(
-            lambda x: float(x.replace('m', '')) / 1000 if isinstance(x, str) and 'm' in x else float(x)
-        )
+        pod_metrics['CPU_Value'] = parse_k8s_quantity(pod_metrics['CPU'])
         
-        pod_metrics['Memory_Value'] = pod_metrics['Memory'].apply(
-            lambda x: float(x.replace('Mi', '')) if isinstance(x, str) and 'Mi' in x else 
-                    (float(x.replace('Ki', '')) / 1024 if isinstance(x, str) and 'Ki' in x else 
-                    (float(x.replace('Gi', '')) * 1024 if isinstance(x, str) and 'Gi' in x else float(x)))
-        )
+        pod_metrics['Memory_Value'] = parse_k8s_quantity(pod_metrics['Memory'], scale=2**20)
         
         pod_metrics['Timestamp'] = pd.to_datetime(pod_metrics['Timestamp'])
         
@@ -183,133 +709,754 @@ def analyze_hpa_metrics(hpa_metrics):
         
         return None
 
-def generate_plots(results_dir, k6_data, pod_data, hpa_data):
-    """Generate plots from the analyzed data with enhanced HPA plotting"""
-    plots_dir = os.path.join(results_dir, 'plots')
-    os.makedirs(plots_dir, exist_ok=True)
+LATENCY_SLO_MS = 500
+SCALING_ASOF_TOLERANCE = pd.Timedelta('60s')
+SHORTENER_POD_PATTERN = r'url-?shortener'
+HPA_TIMELINE_COLUMNS = ['CurrentReplicas', 'DesiredReplicas', 'MinReplicas', 'MaxReplicas',
+                        'CurrentCPUUtilization', 'TargetCPUUtilization']
+
+def local_timestamps(timestamps):
+    """Naive nanosecond timestamps in local wall-clock time, matching the collector CSVs"""
+    timestamps = pd.Series(timestamps)
+    if timestamps.dt.tz is not None:
+        timestamps = timestamps.dt.tz_localize(None)
+    return timestamps.astype('datetime64[ns]')
+
+def build_scaling_timeline(k6_percentiles, pod_data, hpa_data):
+    """As-of join k6 throughput and p95, mean shortener pod CPU and HPA state onto one timeline"""
+    latency = (k6_percentiles or {}).get('http_req_duration')
+    if latency is not None and not latency.empty:
+        timeline = pd.DataFrame({
+            'Timestamp': local_timestamps(latency['timestamp']).to_numpy(),
+            'RPS': latency['count'].to_numpy() / (PERCENTILE_WINDOW_NS / 10**9),
+            'P95': latency['p95'].to_numpy()
+        })
+    elif hpa_data is not None and not hpa_data.empty:
+        timeline = pd.DataFrame({'Timestamp': local_timestamps(hpa_data['Timestamp']).to_numpy()})
+    else:
+        return None
+    timeline = timeline.sort_values('Timestamp', ignore_index=True)
     
-    plot_count = 0
+    if pod_data is not None and not pod_data.empty:
+        pods = pod_data[pod_data['Name'].astype(str).str.contains(SHORTENER_POD_PATTERN)]
+        if pods.empty:
+            pods = pod_data
+        cpu = pods.groupby('Timestamp', as_index=False)['CPU_Value'].mean()
+        cpu = pd.DataFrame({'Timestamp': local_timestamps(cpu['Timestamp']).to_numpy(), 'PodCPU': cpu['CPU_Value'].to_numpy()})
+        timeline = pd.merge_asof(timeline, cpu.sort_values('Timestamp'), on='Timestamp',
+                                 direction='backward', tolerance=SCALING_ASOF_TOLERANCE)
+    
+    if hpa_data is not None and not hpa_data.empty:
+        columns = [col for col in HPA_TIMELINE_COLUMNS if col in hpa_data.columns]
+        hpa = hpa_data[columns].copy()
+        hpa.insert(0, 'Timestamp', local_timestamps(hpa_data['Timestamp']).to_numpy())
+        timeline = pd.merge_asof(timeline, hpa.sort_values('Timestamp'), on='Timestamp',
+                                 direction='backward', tolerance=SCALING_ASOF_TOLERANCE)
+    
+    return timeline
+
+def analyze_autoscaling(k6_percentiles, pod_data, hpa_data, slo_ms=LATENCY_SLO_MS):
+    """Scale-out lag, MaxReplicas saturation and p95 SLO violations for each HPA scale-out event"""
+    if hpa_data is None or hpa_data.empty or 'DesiredReplicas' not in hpa_data.columns:
+        logger.warning("No HPA metrics for the autoscaling analysis")
+        return None
     
-    if k6_data:
-        for metric, df in k6_data.items():
+    try:
+        timeline = build_scaling_timeline(k6_percentiles, pod_data, hpa_data)
+        hpa = hpa_data.assign(Timestamp=local_timestamps(hpa_data['Timestamp']).to_numpy())
+        hpa = hpa.sort_values('Timestamp', ignore_index=True)
+        times = hpa['Timestamp']
+        
+        interval = times.diff().shift(-1)
+        interval = interval.fillna(interval.median() if interval.notna().any() else pd.Timedelta(0))
+        replicas = {column: pd.to_numeric(hpa[column], errors='coerce') if column in hpa.columns else None
+                    for column in HPA_TIMELINE_COLUMNS}
+        # The collector leaves MaxReplicas blank or 0 when the HPA does not report it
+        has_max = replicas['MaxReplicas'] is not None and (replicas['MaxReplicas'] > 0).any()
+        saturated = ((replicas['MaxReplicas'] > 0) & (replicas['CurrentReplicas'] >= replicas['MaxReplicas'])
+                     if has_max and replicas['CurrentReplicas'] is not None else None)
+        if replicas['CurrentCPUUtilization'] is not None and replicas['TargetCPUUtilization'] is not None:
+            over_target = replicas['CurrentCPUUtilization'] > replicas['TargetCPUUtilization']
+        else:
+            over_target = pd.Series(False, index=hpa.index)
+        crossings = np.flatnonzero(over_target & ~over_target.shift(fill_value=False))
+        
+        has_latency = timeline is not None and 'P95' in timeline.columns
+        window = pd.Timedelta(PERCENTILE_WINDOW_NS, unit='ns')
+        
+        events = []
+        desired = replicas['DesiredReplicas'].to_numpy()
+        current = (replicas['CurrentReplicas'] if replicas['CurrentReplicas'] is not None
+                   else pd.Series(np.nan, index=hpa.index)).to_numpy()
+        for i in np.flatnonzero(np.diff(desired) > 0) + 1:
+            t_desired = times[i]
+            k = np.searchsorted(crossings, i, side='right') - 1
+            t_trigger = times[crossings[k]] if k >= 0 else pd.NaT
+            
+            reached = np.flatnonzero(current[i:] >= desired[i])
+            t_current = times[i + reached[0]] if len(reached) else pd.NaT
+            
+            t_recovery = pd.NaT
+            violation = 0.0
+            if has_latency:
+                start = t_trigger if pd.notna(t_trigger) else t_desired
+                after = timeline[timeline['Timestamp'] >= (t_current if pd.notna(t_current) else t_desired)]
+                recovered = after[after['P95'] <= slo_ms]
+                if not recovered.empty:
+                    t_recovery = recovered['Timestamp'].iloc[0]
+                end = t_recovery if pd.notna(t_recovery) else timeline['Timestamp'].iloc[-1] + window
+                span = timeline[(timeline['Timestamp'] >= start) & (timeline['Timestamp'] < end)]
+                violation = (span['P95'] > slo_ms).sum() * window.total_seconds()
+                if violation == 0:
+                    # p95 never left the SLO, so there was nothing to recover from
+                    t_recovery = pd.NaT
+            
+            events.append({
+                'Trigger': t_trigger,
+                'DesiredChange': t_desired,
+                'CurrentChange': t_current,
+                'Recovery': t_recovery,
+                'FromReplicas': int(desired[i - 1]),
+                'ToReplicas': int(desired[i]),
+                'DecisionLag': (t_desired - t_trigger).total_seconds() if pd.notna(t_trigger) else np.nan,
+                'ActuationLag': (t_current - t_desired).total_seconds() if pd.notna(t_current) else np.nan,
+                'RecoveryLag': (t_recovery - t_current).total_seconds() if pd.notna(t_recovery) and pd.notna(t_current) else np.nan,
+                'TotalLag': (t_recovery - t_trigger).total_seconds() if pd.notna(t_recovery) and pd.notna(t_trigger) else np.nan,
+                'SLOViolation': violation
+            })
+        
+        events = pd.DataFrame(events, columns=['Trigger', 'DesiredChange', 'CurrentChange', 'Recovery',
+                                               'FromReplicas', 'ToReplicas', 'DecisionLag', 'ActuationLag',
+                                               'RecoveryLag', 'TotalLag', 'SLOViolation'])
+        
+        observed = interval.sum().total_seconds()
+        summary = {
+            'slo_ms': slo_ms,
+            'scale_out_events': len(events),
+            'median_decision_lag': events['DecisionLag'].median(),
+            'median_actuation_lag': events['ActuationLag'].median(),
+            'median_recovery_lag': events['RecoveryLag'].median(),
+            'max_total_lag': events['TotalLag'].max(),
+            'saturated_seconds': interval[saturated].sum().total_seconds() if saturated is not None else np.nan,
+            'saturated_fraction': (interval[saturated].sum().total_seconds() / observed
+                                   if saturated is not None and observed else np.nan),
+            'slo_violation_seconds': (timeline['P95'] > slo_ms).sum() * window.total_seconds() if has_latency else np.nan
+        }
+        
+        logger.info(f"Analyzed {len(events)} HPA scale-out events")
+        return {'timeline': timeline, 'events': events, 'summary': summary}
+    except Exception as e:
+        logger.error(f"Error analyzing autoscaling: {str(e)}\n{traceback.format_exc()}")
+        return None
+
+PROFILE_RSS_INTERVAL = 0.01
+PROFILE_TIMINGS_FILE = 'timings.json'
+PROFILE_DUMP_DIR = 'profile'
+
+def current_rss():
+    """Resident set size of this process in bytes, or None where it cannot be read"""
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+class RssSampler:
+    """Tracks the peak resident set size while a stage runs by sampling it from a background thread"""
+
+    def __init__(self, interval=PROFILE_RSS_INTERVAL):
+        self.interval = interval
+        self.peak = None
+        self.stopped = threading.Event()
+
+    def sample(self):
+        rss = current_rss()
+        if rss is not None:
+            self.peak = rss if self.peak is None else max(self.peak, rss)
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def __enter__(self):
+        self.sample()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()
+        self.sample()
+
+def row_count(value):
+    """Rows in a stage's input or output: frames, dicts of frames or objects with a length"""
+    if value is None:
+        return 0
+    if isinstance(value, (dict, tuple)):
+        return sum(row_count(item) for item in (value.values() if isinstance(value, dict) else value))
+    if isinstance(value, str):
+        return 1
+    try:
+        return len(value)
+    except TypeError:
+        return 1
+
+class StageProfiler:
+    """Runs pipeline stages, recording wall/CPU time, peak RSS and row counts when enabled"""
+
+    def __init__(self, enabled=True, dump_dir=None):
+        self.enabled = enabled
+        self.dump_dir = dump_dir
+        self.stages = {}
+
+    def run(self, name, func, *args, rows_in=None, **kwargs):
+        if not self.enabled:
+            return func(*args, **kwargs)
+        
+        profile = cProfile.Profile() if self.dump_dir else None
+        start_rss = current_rss()
+        start_times = os.times()
+        with RssSampler() as sampler:
+            start = time.perf_counter()
+            if profile is not None:
+                profile.enable()
             try:
-                if 'http_req_duration' in metric:
-                    plt.figure(figsize=(12, 6))
-                    plt.plot(df['timestamp'], df['value'])
-                    plt.title(f'K6 {metric}')
-                    plt.xlabel('Time')
-                    plt.ylabel('Duration (ms)')
-                    plt.grid(True)
-                    plt.tight_layout()
-                    plt.savefig(os.path.join(plots_dir, f'k6_{metric.replace(".", "_")}.png'))
-                    plt.close()
-                    plot_count += 1
-                
-                if 'vus' in metric or 'http_reqs' in metric:
-                    plt.figure(figsize=(12, 6))
-                    plt.plot(df['timestamp'], df['value'])
-                    plt.title(f'K6 {metric}')
-                    plt.xlabel('Time')
-                    plt.ylabel('Count')
-                    plt.grid(True)
-                    plt.tight_layout()
-                    plt.savefig(os.path.join(plots_dir, f'k6_{metric.replace(".", "_")}.png'))
-                    plt.close()
-                    plot_count += 1
-            except Exception as e:
-                logger.error(f"Error generating k6 plot for {metric}: {str(e)}")
+                result = func(*args, **kwargs)
+            finally:
+                if profile is not None:
+                    profile.disable()
+            wall = time.perf_counter() - start
+        end_times = os.times()
+        
+        # Children are included so --workers pools count; they are reaped before the stage returns
+        cpu = sum(end - begin for end, begin in zip(end_times[:4], start_times[:4]))
+        self.stages[name] = {
+            'wall_s': round(wall, 4),
+            'cpu_s': round(cpu, 4),
+            'peak_rss_mb': round(sampler.peak / 2**20, 1) if sampler.peak is not None else None,
+            'rss_growth_mb': round((sampler.peak - start_rss) / 2**20, 1) if sampler.peak is not None else None,
+            'rows_in': rows_in,
+            'rows_out': row_count(result)
+        }
+        if profile is not None:
+            os.makedirs(self.dump_dir, exist_ok=True)
+            profile.dump_stats(os.path.join(self.dump_dir, f'{name}.prof'))
+        logger.info(f"Stage {name}: {wall:.3f}s wall, {cpu:.3f}s CPU, peak RSS {self.stages[name]['peak_rss_mb']} MB")
+        return result
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump({
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'total_wall_s': round(sum(stage['wall_s'] for stage in self.stages.values()), 4),
+                'stages': self.stages
+            }, f, indent=2)
+        logger.info(f"Stage timings written to {path}")
+
+ANALYSIS_CACHE_FILE = 'analysis-cache.npz'
+ANALYSIS_CACHE_VERSION = 6
+
+def analysis_sources(results_dir, metrics_dir):
+    """Source files whose contents determine the analyzed frames"""
+    paths = [os.path.join(results_dir, 'k6-results.json')]
+    for key in ('pod', 'hpa'):
+        paths.extend(os.path.join(metrics_dir, filename) for filename in CSV_METRIC_FILES[key])
+    return paths
+
+def source_fingerprint(paths):
+    """Identify source files by absolute path, size and mtime"""
+    fingerprint = []
+    for path in paths:
+        if os.path.exists(path):
+            stat = os.stat(path)
+            fingerprint.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+    return fingerprint
+
+def frame_to_arrays(df, prefix, arrays):
+    """Flatten a DataFrame into typed numpy columns, returning its schema"""
+    schema = []
+    arrays[f'{prefix}i'] = df.index.to_numpy(dtype=np.int64)
+    for i, name in enumerate(df.columns):
+        key = f'{prefix}c{i}'
+        series = df[name]
+        column = {'name': name}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            column['kind'] = 'category'
+            arrays[key] = series.cat.codes.to_numpy()
+            arrays[f'{key}u'] = np.asarray(series.cat.categories.astype(str), dtype=str)
+        elif pd.api.types.is_datetime64_any_dtype(series.dtype):
+            column['kind'] = 'datetime'
+            column['unit'] = series.dt.unit
+            tz = series.dt.tz
+            if isinstance(tz, timezone):
+                column['tz_offset'] = tz.utcoffset(None).total_seconds()
+            elif tz is not None:
+                column['tz'] = str(tz)
+            arrays[key] = pd.DatetimeIndex(series).asi8
+        elif pd.api.types.is_numeric_dtype(series.dtype) or pd.api.types.is_bool_dtype(series.dtype):
+            column['kind'] = 'numeric'
+            arrays[key] = series.to_numpy()
+        else:
+            column['kind'] = 'string'
+            codes, uniques = pd.factorize(series)
+            arrays[key] = codes.astype(np.int32)
+            arrays[f'{key}u'] = np.asarray(uniques.astype(str), dtype=str)
+        schema.append(column)
+    return schema
+
+def arrays_to_frame(schema, prefix, arrays):
+    """Rebuild a DataFrame flattened by frame_to_arrays"""
+    data = {}
+    for i, column in enumerate(schema):
+        key = f'{prefix}c{i}'
+        kind = column['kind']
+        if kind == 'category':
+            data[column['name']] = pd.Categorical.from_codes(arrays[key], categories=arrays[f'{key}u'])
+        elif kind == 'datetime':
+            if 'tz_offset' in column:
+                tz = timezone(timedelta(seconds=column['tz_offset']))
+            else:
+                tz = column.get('tz')
+            values = pd.DatetimeIndex(arrays[key].view(f"datetime64[{column['unit']}]"))
+            data[column['name']] = values.tz_localize('UTC').tz_convert(tz) if tz is not None else values
+        elif kind == 'numeric':
+            data[column['name']] = arrays[key]
+        else:
+            values = pd.Categorical.from_codes(arrays[key], categories=arrays[f'{key}u'])
+            data[column['name']] = np.asarray(values, dtype=object)
+    return pd.DataFrame(data, index=arrays[f'{prefix}i'])
+
+def save_analysis_cache(results_dir, sources, frames, histograms=None):
+    """Save analyzed frames and histograms as binary columns keyed by the source fingerprint"""
+    cache_file = os.path.join(results_dir, ANALYSIS_CACHE_FILE)
+    try:
+        arrays = {}
+        entries = []
+        for n, (name, df) in enumerate(frames.items()):
+            if df is None:
+                continue
+            entries.append({'name': name, 'schema': frame_to_arrays(df, f'f{n}', arrays), 'prefix': f'f{n}'})
+        
+        histogram_entries = []
+        for n, (name, histogram) in enumerate((histograms or {}).items()):
+            histogram.to_arrays(f'h{n}', arrays)
+            histogram_entries.append({'name': name, 'prefix': f'h{n}'})
+        
+        meta = {
+            'version': ANALYSIS_CACHE_VERSION,
+            'sources': source_fingerprint(sources),
+            'frames': entries,
+            'histograms': histogram_entries
+        }
+        arrays['meta'] = np.array(json.dumps(meta))
+        
+        tmp_file = cache_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            np.savez(f, **arrays)
+        os.replace(tmp_file, cache_file)
+        logger.info(f"Saved analysis cache with {len(entries)} frames to {cache_file}")
+    except Exception as e:
+        logger.error(f"Error saving analysis cache: {str(e)}")
+
+def load_analysis_cache(results_dir, sources, frame_prefixes=None):
+    """Load cached histograms and frames (only those named by frame_prefixes, if given) if the sources are unchanged"""
+    cache_file = os.path.join(results_dir, ANALYSIS_CACHE_FILE)
+    if not os.path.exists(cache_file):
+        return None
+    
+    try:
+        with np.load(cache_file, allow_pickle=False) as arrays:
+            meta = json.loads(str(arrays['meta']))
+            if meta.get('version') != ANALYSIS_CACHE_VERSION or meta.get('sources') != source_fingerprint(sources):
+                logger.info("Analysis cache is stale, re-parsing sources")
+                return None
+            
+            frames = {}
+            for entry in meta['frames']:
+                if frame_prefixes is not None and not entry['name'].startswith(tuple(frame_prefixes)):
+                    continue
+                frames[entry['name']] = arrays_to_frame(entry['schema'], entry['prefix'], arrays)
+            
+            histograms = {}
+            for entry in meta['histograms']:
+                histograms[entry['name']] = LatencyHistogram.from_arrays(entry['prefix'], arrays)
+        
+        logger.info(f"Loaded {len(frames)} frames from analysis cache {cache_file}")
+        return frames, histograms
+    except Exception as e:
+        logger.warning(f"Ignoring unreadable analysis cache: {str(e)}")
+        return None
+
+def split_analysis_cache(frames, histograms):
+    """Regroup cached frames and histograms by the prefixes save_analysis_cache gave them"""
+    def strip(items, prefix):
+        return {name[len(prefix):]: item for name, item in items.items() if name.startswith(prefix)}
     
+    return {
+        'k6_data': strip(frames, 'k6:') or None,
+        'k6_percentiles': strip(frames, 'k6pct:') or None,
+        'k6_histograms': {name: h for name, h in histograms.items() if not name.startswith('endpoint:')} or None,
+        'endpoint_histograms': strip(histograms, 'endpoint:'),
+        'endpoint_rates': frames.get('k6rate'),
+        'pod_data': frames.get('pod'),
+        'hpa_data': frames.get('hpa')
+    }
+
+def load_analysis(results_dir, metrics_dir, workers=1, use_cache=True, frame_prefixes=None, profiler=None):
+    """Analyzed frames and histograms of one run, from the analysis cache when it is fresh"""
+    profiler = profiler or StageProfiler(enabled=False)
+    sources = analysis_sources(results_dir, metrics_dir)
+    cached = profiler.run('load_analysis_cache', load_analysis_cache, results_dir, sources,
+                          frame_prefixes) if use_cache else None
+    if cached is not None:
+        return split_analysis_cache(*cached)
+    
+    logger.info("Loading k6 results...")
+    k6_results = profiler.run('load_k6_results', load_k6_results, results_dir, workers=workers)
+    k6_points = len(k6_results) if k6_results else 0
+    k6_data = profiler.run('analyze_k6_results', analyze_k6_results, k6_results, rows_in=k6_points)
+    k6_histograms = k6_results.histograms if k6_results else {}
+    k6_percentiles = profiler.run('analyze_k6_percentiles', analyze_k6_percentiles, k6_results, rows_in=k6_points)
+    endpoint_histograms, endpoint_rates = profiler.run('analyze_k6_endpoints', analyze_k6_endpoints, k6_data,
+                                                       rows_in=row_count(k6_data))
+    
+    logger.info("Loading metrics...")
+    csv_metrics = profiler.run('load_csv_metrics', load_csv_metrics, results_dir, metrics_dir)
+    
+    pod_data = profiler.run('analyze_pod_metrics', analyze_pod_metrics, csv_metrics.get('pod'),
+                            rows_in=row_count(csv_metrics.get('pod')))
+    
+    hpa_data = profiler.run('analyze_hpa_metrics', analyze_hpa_metrics, csv_metrics.get('hpa'),
+                            rows_in=row_count(csv_metrics.get('hpa')))
+    
+    frames = {f'k6:{metric}': df for metric, df in (k6_data or {}).items()}
+    frames.update({f'k6pct:{metric}': df for metric, df in (k6_percentiles or {}).items()})
+    frames['k6rate'] = endpoint_rates
+    frames['pod'] = pod_data
+    frames['hpa'] = hpa_data
+    histograms = dict(k6_histograms)
+    histograms.update({f'endpoint:{endpoint}': h for endpoint, h in endpoint_histograms.items()})
+    profiler.run('save_analysis_cache', save_analysis_cache, results_dir, sources, frames, histograms,
+                 rows_in=row_count(frames))
+    return split_analysis_cache({name: df for name, df in frames.items() if df is not None}, histograms)
+
+PLOT_FIGSIZE = (12, 6)
+PLOT_DPI = 100
+PLOT_MAX_POINTS = 4 * PLOT_FIGSIZE[0] * PLOT_DPI
+PLOT_POINTS_FILE = 'plot-points.json'
+
+def downsample_minmax(x, y, max_points):
+    """Keep the first, last, min and max point of each x-range bucket so spikes stay visible"""
+    n = len(y)
+    if not max_points or n <= max_points:
+        return x, y
+    
+    buckets = max(1, max_points // 4)
+    if pd.api.types.is_datetime64_any_dtype(getattr(x, 'dtype', None)):
+        position = pd.DatetimeIndex(x).asi8
+    else:
+        position = np.arange(n, dtype=np.int64)
+    lo = position.min()
+    span = position.max() - lo + 1
+    bucket = (position - lo) // -(-span // buckets)
     
-    if pod_data is not None:
+    values = np.asarray(y, dtype=np.float64)
+    key = np.where(np.isnan(values), -np.inf, values)
+    by_value = np.lexsort((key, bucket))
+    by_position = np.argsort(bucket, kind='stable')
+    starts = np.flatnonzero(np.r_[True, bucket[by_position][1:] != bucket[by_position][:-1]])
+    ends = np.r_[starts[1:], n] - 1
+    keep = np.unique(np.concatenate([by_position[starts], by_position[ends], by_value[starts], by_value[ends]]))
+    return x.take(keep), y.take(keep)
+
+def downsample_plot_job(job, max_points):
+    """Downsample every line of a plot job, returning its original and plotted point counts"""
+    original = plotted = 0
+    for panel in job.get('panels', [job]):
+        lines = panel.get('lines', [])
+        original += sum(len(y) for _, y, _ in lines)
+        panel['lines'] = [(*downsample_minmax(x, y, max_points), style) for x, y, style in lines]
+        plotted += sum(len(y) for _, y, _ in panel['lines'])
+    return original, plotted
+
+def record_plot_points(plots_dir, points):
+    """Merge original/plotted point counts per plot file into the plots directory index"""
+    points_file = os.path.join(plots_dir, PLOT_POINTS_FILE)
+    recorded = {}
+    if os.path.exists(points_file):
         try:
-            pod_groups = pod_data.groupby('Name')
-            for name, group in pod_groups:
-                
-                plt.figure(figsize=(12, 6))
-                plt.plot(group['Timestamp'], group['CPU_Value'])
-                plt.title(f'Pod {name} - CPU Usage')
-                plt.xlabel('Time')
-                plt.ylabel('CPU (cores)')
-                plt.grid(True)
-                plt.tight_layout()
-                plt.savefig(os.path.join(plots_dir, f'pod_{name}_cpu.png'))
-                plt.close()
-                plot_count += 1
-                
-                plt.figure(figsize=(12, 6))
-                plt.plot(group['Timestamp'], group['Memory_Value'])
-                plt.title(f'Pod {name} - Memory Usage')
-                plt.xlabel('Time')
-                plt.ylabel('Memory (MB)')
-                plt.grid(True)
-                plt.tight_layout()
-                plt.savefig(os.path.join(plots_dir, f'pod_{name}_memory.png'))
-                plt.close()
-                plot_count += 1
-        except Exception as e:
-            logger.error(f"Error generating pod metrics plots: {str(e)}")
+            with open(points_file, 'r') as f:
+                recorded = json.load(f)
+        except (OSError, ValueError):
+            recorded = {}
+    recorded.update(points)
+    with open(points_file, 'w') as f:
+        json.dump(recorded, f, indent=2)
+
+_plot_figure = None
+
+def draw_plot_panel(ax, panel):
+    """Draw the lines, reference line and bars of one plot panel onto an axes"""
+    for x, y, style in panel.get('lines', []):
+        ax.plot(x, y, **style)
+    if 'axhline' in panel:
+        y, style = panel['axhline']
+        ax.axhline(y=y, **style)
+    if 'bars' in panel:
+        categories, stacks = panel['bars']
+        bottom = np.zeros(len(categories))
+        for label, heights in stacks:
+            ax.bar(categories, heights, width=0.5, bottom=bottom, label=label)
+            bottom += heights
     
-    if hpa_data is not None and not hpa_data.empty:
+    ax.set_ylabel(panel['ylabel'])
+    if panel.get('legend'):
+        ax.legend(title=panel.get('legend_title'))
+    ax.grid(True, axis=panel.get('grid_axis', 'both'))
+
+def render_plot_job(plots_dir, job):
+    """Draw one plot job on this process's reusable Agg figure and save it"""
+    global _plot_figure
+    try:
+        if _plot_figure is None:
+            _plot_figure = Figure(figsize=PLOT_FIGSIZE, dpi=PLOT_DPI)
+            FigureCanvasAgg(_plot_figure)
+        fig = _plot_figure
+        fig.clear()
+        figsize = job.get('figsize', PLOT_FIGSIZE)
+        if tuple(fig.get_size_inches()) != tuple(figsize):
+            fig.set_size_inches(figsize)
+        
+        panels = job.get('panels', [job])
+        if len(panels) == 1:
+            axes = [fig.add_subplot()]
+        else:
+            axes = fig.subplots(len(panels), 1, sharex=True)
+        for ax, panel in zip(axes, panels):
+            draw_plot_panel(ax, panel)
+        
+        axes[0].set_title(job['title'])
+        axes[-1].set_xlabel(job['xlabel'])
+        fig.tight_layout()
+        
+        plot_file = os.path.join(plots_dir, job['file'])
+        fig.savefig(plot_file)
+        return plot_file, None
+    except Exception as e:
+        return job['file'], str(e)
+
+def render_plot_jobs(plots_dir, jobs, workers=1, max_points=PLOT_MAX_POINTS):
+    """Downsample and render plot jobs, in a process pool when more than one worker is requested"""
+    os.makedirs(plots_dir, exist_ok=True)
+    points = {}
+    for job in jobs:
+        original, plotted = downsample_plot_job(job, max_points)
+        if original:
+            points[job['file']] = {'points': original, 'plotted': plotted}
+    record_plot_points(plots_dir, points)
+    
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(render_plot_job, [plots_dir] * len(jobs), jobs,
+                                    chunksize=max(1, len(jobs) // (workers * 4))))
+    else:
+        results = [render_plot_job(plots_dir, job) for job in jobs]
+    
+    plot_count = 0
+    for plot_file, error in results:
+        if error:
+            logger.error(f"Error generating plot {plot_file}: {error}")
+        else:
+            plot_count += 1
+    return plot_count
+
+def k6_plot_jobs(k6_data, k6_percentiles=None):
+    """Plot jobs for the k6 metric, percentile and endpoint breakdown charts"""
+    jobs = []
+    
+    for metric, df in (k6_percentiles or {}).items():
+        jobs.append({
+            'file': f'k6_{metric.replace(".", "_")}_percentiles.png',
+            'title': f'K6 {metric} percentiles ({PERCENTILE_WINDOW_NS // 10**9}s windows)',
+            'xlabel': 'Time',
+            'ylabel': 'Duration (ms)',
+            'lines': [(df['timestamp'], df[label], {'label': label}) for label, _ in REPORT_PERCENTILES],
+            'legend': True
+        })
+    
+    for metric, df in (k6_data or {}).items():
+        if 'http_req_duration' in metric:
+            ylabel = 'Duration (ms)'
+        elif 'vus' in metric or 'http_reqs' in metric:
+            ylabel = 'Count'
+        else:
+            continue
+        jobs.append({
+            'file': f'k6_{metric.replace(".", "_")}.png',
+            'title': f'K6 {metric}',
+            'xlabel': 'Time',
+            'ylabel': ylabel,
+            'lines': [(df['timestamp'], df['value'], {})]
+        })
+    
+    duration = (k6_data or {}).get('http_req_duration')
+    if duration is not None and 'name' in duration.columns:
         try:
-            logger.info("Generating HPA plots...")
-            
-            logger.info(f"HPA data columns: {list(hpa_data.columns)}")
-            logger.info(f"HPA data rows: {len(hpa_data)}")
-            
-            required_columns = ['Timestamp', 'CurrentReplicas', 'DesiredReplicas']
-            if all(col in hpa_data.columns for col in required_columns):
-                
-                plt.figure(figsize=(12, 6))
-                plt.plot(hpa_data['Timestamp'], hpa_data['CurrentReplicas'], label='Current Replicas', marker='o')
-                plt.plot(hpa_data['Timestamp'], hpa_data['DesiredReplicas'], label='Desired Replicas', marker='x')
-                plt.title('HPA Replica Count')
-                plt.xlabel('Time')
-                plt.ylabel('Replicas')
-                plt.legend()
-                plt.grid(True)
-                plt.tight_layout()
-                
-                try:
-                    hpa_replicas_file = os.path.join(plots_dir, 'hpa_replicas.png')
-                    plt.savefig(hpa_replicas_file)
-                    logger.info(f"Saved HPA replicas plot to {hpa_replicas_file}")
-                    plot_count += 1
-                except Exception as e:
-                    logger.error(f"Error saving HPA replicas plot: {str(e)}")
-                finally:
-                    plt.close()
-            else:
-                logger.warning(f"Required columns for HPA replicas plot missing: {[col for col in required_columns if col not in hpa_data.columns]}")
+            p95 = duration.groupby(['name', pd.Grouper(key='timestamp', freq=f'{PERCENTILE_WINDOW_NS // 10**9}s')],
+                                   observed=True)['value'].quantile(0.95).unstack(0)
+            jobs.append({
+                'file': 'k6_endpoint_p95.png',
+                'title': 'K6 http_req_duration p95 by endpoint',
+                'xlabel': 'Time',
+                'ylabel': 'Duration (ms)',
+                'lines': [(p95.index, p95[endpoint], {'label': str(endpoint)}) for endpoint in p95.columns],
+                'legend': True
+            })
             
-            if 'CurrentCPUUtilization' in hpa_data.columns and 'TargetCPUUtilization' in hpa_data.columns:
-                if pd.notna(hpa_data['CurrentCPUUtilization']).any():
-                    plt.figure(figsize=(12, 6))
-                    plt.plot(hpa_data['Timestamp'], hpa_data['CurrentCPUUtilization'], label='Current CPU', marker='o')
-                    plt.axhline(y=hpa_data['TargetCPUUtilization'].iloc[0], color='r', linestyle='--', label='Target CPU')
-                    plt.title('HPA CPU Utilization')
-                    plt.xlabel('Time')
-                    plt.ylabel('CPU Utilization %')
-                    plt.legend()
-                    plt.grid(True)
-                    plt.tight_layout()
-                    
-                    try:
-                        hpa_cpu_file = os.path.join(plots_dir, 'hpa_cpu.png')
-                        plt.savefig(hpa_cpu_file)
-                        logger.info(f"Saved HPA CPU plot to {hpa_cpu_file}")
-                        plot_count += 1
-                    except Exception as e:
-                        logger.error(f"Error saving HPA CPU plot: {str(e)}")
-                    finally:
-                        plt.close()
-                else:
-                    logger.warning("CurrentCPUUtilization contains only NaN values, skipping HPA CPU plot")
-            else:
-                logger.warning("CurrentCPUUtilization or TargetCPUUtilization columns missing, skipping HPA CPU plot")
+            if 'status' in duration.columns:
+                counts = pd.crosstab(duration['name'], duration['status'])
+                jobs.append({
+                    'file': 'k6_endpoint_status.png',
+                    'title': 'K6 requests by endpoint and status',
+                    'xlabel': 'Endpoint',
+                    'ylabel': 'Requests',
+                    'bars': ([str(name) for name in counts.index],
+                             [(str(status), counts[status].to_numpy()) for status in counts.columns]),
+                    'legend': True,
+                    'legend_title': 'status',
+                    'grid_axis': 'y'
+                })
         except Exception as e:
-            logger.error(f"Error generating HPA plots: {str(e)}\n{traceback.format_exc()}")
-    else:
+            logger.error(f"Error preparing endpoint breakdown plots: {str(e)}")
+    
+    return jobs
+
+def pod_plot_jobs(pod_data):
+    """Plot jobs for per-pod CPU and memory usage"""
+    jobs = []
+    if pod_data is None:
+        return jobs
+    
+    try:
+        for name, group in pod_data.groupby('Name'):
+            jobs.append({
+                'file': f'pod_{name}_cpu.png',
+                'title': f'Pod {name} - CPU Usage',
+                'xlabel': 'Time',
+                'ylabel': 'CPU (cores)',
+                'lines': [(group['Timestamp'], group['CPU_Value'], {})]
+            })
+            jobs.append({
+                'file': f'pod_{name}_memory.png',
+                'title': f'Pod {name} - Memory Usage',
+                'xlabel': 'Time',
+                'ylabel': 'Memory (MB)',
+                'lines': [(group['Timestamp'], group['Memory_Value'], {})]
+            })
+    except Exception as e:
+        logger.error(f"Error preparing pod metrics plots: {str(e)}")
+    return jobs
+
+def hpa_plot_jobs(hpa_data):
+    """Plot jobs for HPA replica counts and CPU utilization"""
+    jobs = []
+    if hpa_data is None or hpa_data.empty:
         logger.warning("No HPA data available for plotting")
+        return jobs
+    
+    logger.info(f"HPA data columns: {list(hpa_data.columns)}")
+    logger.info(f"HPA data rows: {len(hpa_data)}")
+    
+    required_columns = ['Timestamp', 'CurrentReplicas', 'DesiredReplicas']
+    if all(col in hpa_data.columns for col in required_columns):
+        jobs.append({
+            'file': 'hpa_replicas.png',
+            'title': 'HPA Replica Count',
+            'xlabel': 'Time',
+            'ylabel': 'Replicas',
+            'lines': [
+                (hpa_data['Timestamp'], hpa_data['CurrentReplicas'], {'label': 'Current Replicas', 'marker': 'o'}),
+                (hpa_data['Timestamp'], hpa_data['DesiredReplicas'], {'label': 'Desired Replicas', 'marker': 'x'})
+            ],
+            'legend': True
+        })
+    else:
+        logger.warning(f"Required columns for HPA replicas plot missing: {[col for col in required_columns if col not in hpa_data.columns]}")
+    
+    if 'CurrentCPUUtilization' in hpa_data.columns and 'TargetCPUUtilization' in hpa_data.columns:
+        if pd.notna(hpa_data['CurrentCPUUtilization']).any():
+            jobs.append({
+                'file': 'hpa_cpu.png',
+                'title': 'HPA CPU Utilization',
+                'xlabel': 'Time',
+                'ylabel': 'CPU Utilization %',
+                'lines': [(hpa_data['Timestamp'], hpa_data['CurrentCPUUtilization'], {'label': 'Current CPU', 'marker': 'o'})],
+                'axhline': (hpa_data['TargetCPUUtilization'].iloc[0], {'color': 'r', 'linestyle': '--', 'label': 'Target CPU'}),
+                'legend': True
+            })
+        else:
+            logger.warning("CurrentCPUUtilization contains only NaN values, skipping HPA CPU plot")
+    else:
+        logger.warning("CurrentCPUUtilization or TargetCPUUtilization columns missing, skipping HPA CPU plot")
+    return jobs
+
+def autoscaling_plot_jobs(autoscaling):
+    """Plot job for the joined throughput/latency, CPU and replica timeline"""
+    if not autoscaling or autoscaling['timeline'] is None:
+        return []
+    
+    timeline = autoscaling['timeline']
+    x = timeline['Timestamp']
+    panels = []
+    if 'P95' in timeline.columns:
+        panels.append({
+            'ylabel': 'p95 (ms) / req/s',
+            'lines': [(x, timeline['P95'], {'label': 'p95 latency (ms)'}),
+                      (x, timeline['RPS'], {'label': 'Throughput (req/s)'})],
+            'axhline': (autoscaling['summary']['slo_ms'], {'color': 'r', 'linestyle': '--', 'label': 'p95 SLO'}),
+            'legend': True
+        })
+    if 'CurrentCPUUtilization' in timeline.columns:
+        panels.append({
+            'ylabel': 'CPU Utilization %',
+            'lines': [(x, timeline['CurrentCPUUtilization'], {'label': 'HPA CPU'})],
+            'axhline': (timeline['TargetCPUUtilization'].dropna().iloc[0] if timeline['TargetCPUUtilization'].notna().any() else 0,
+                        {'color': 'r', 'linestyle': '--', 'label': 'Target CPU'}),
+            'legend': True
+        })
+    if 'CurrentReplicas' in timeline.columns:
+        panels.append({
+            'ylabel': 'Replicas',
+            'lines': [(x, timeline['CurrentReplicas'], {'label': 'Current Replicas', 'drawstyle': 'steps-post'}),
+                      (x, timeline['DesiredReplicas'], {'label': 'Desired Replicas', 'drawstyle': 'steps-post'}),
+                      (x, timeline['MaxReplicas'], {'label': 'Max Replicas', 'color': 'r', 'linestyle': ':'})],
+            'legend': True
+        })
+    if not panels:
+        return []
+    
+    return [{
+        'file': 'autoscaling_timeline.png',
+        'title': 'Autoscaling timeline',
+        'xlabel': 'Time',
+        'figsize': (12, 3 * len(panels)),
+        'panels': panels
+    }]
+
+def generate_plots(results_dir, k6_data, pod_data, hpa_data, k6_percentiles=None, workers=1,
+                   max_points=PLOT_MAX_POINTS, autoscaling=None):
+    """Generate plots from the analyzed data, rendering independent plot jobs in parallel"""
+    plots_dir = os.path.join(results_dir, 'plots')
+    
+    jobs = (k6_plot_jobs(k6_data, k6_percentiles) + pod_plot_jobs(pod_data) + hpa_plot_jobs(hpa_data)
+            + autoscaling_plot_jobs(autoscaling))
+    plot_count = render_plot_jobs(plots_dir, jobs, workers, max_points)
     
     logger.info(f"Generated {plot_count} plots in {plots_dir}")
     return plot_count
@@ -318,11 +1465,9 @@ def create_hpa_plots_from_csv(metrics_dir, plots_dir):
     """Create HPA plots directly from CSV without going through the analysis steps"""
     logger.info("Attempting to create HPA plots directly from CSV...")
     
-    
-    hpa_file_variants = ['hpametrics.csv', 'hpa-metrics.csv']
     hpa_data = None
     
-    for filename in hpa_file_variants:
+    for filename in CSV_METRIC_FILES['hpa']:
         file_path = os.path.join(metrics_dir, filename)
         if os.path.exists(file_path):
             try:
@@ -345,50 +1490,14 @@ def create_hpa_plots_from_csv(metrics_dir, plots_dir):
             if col in hpa_data.columns:
                 hpa_data[col] = pd.to_numeric(hpa_data[col], errors='coerce')
         
-        plot_count = 0
-        os.makedirs(plots_dir, exist_ok=True)
-        
-        if all(col in hpa_data.columns for col in ['Timestamp', 'CurrentReplicas', 'DesiredReplicas']):
-            plt.figure(figsize=(12, 6))
-            plt.plot(hpa_data['Timestamp'], hpa_data['CurrentReplicas'], label='Current Replicas', marker='o')
-            plt.plot(hpa_data['Timestamp'], hpa_data['DesiredReplicas'], label='Desired Replicas', marker='x')
-            plt.title('HPA Replica Count')
-            plt.xlabel('Time')
-            plt.ylabel('Replicas')
-            plt.legend()
-            plt.grid(True)
-            plt.tight_layout()
-            
-            hpa_replicas_file = os.path.join(plots_dir, 'hpa_replicas.png')
-            plt.savefig(hpa_replicas_file)
-            logger.info(f"Saved HPA replicas plot to {hpa_replicas_file}")
-            plot_count += 1
-            plt.close()
-        
-        if all(col in hpa_data.columns for col in ['Timestamp', 'CurrentCPUUtilization', 'TargetCPUUtilization']):
-            plt.figure(figsize=(12, 6))
-            plt.plot(hpa_data['Timestamp'], hpa_data['CurrentCPUUtilization'], label='Current CPU', marker='o')
-            plt.axhline(y=hpa_data['TargetCPUUtilization'].iloc[0], color='r', linestyle='--', label='Target CPU')
-            plt.title('HPA CPU Utilization')
-            plt.xlabel('Time')
-            plt.ylabel('CPU Utilization %')
-            plt.legend()
-            plt.grid(True)
-            plt.tight_layout()
-            
-            hpa_cpu_file = os.path.join(plots_dir, 'hpa_cpu.png')
-            plt.savefig(hpa_cpu_file)
-            logger.info(f"Saved HPA CPU plot to {hpa_cpu_file}")
-            plot_count += 1
-            plt.close()
-        
-        return plot_count
+        return render_plot_jobs(plots_dir, hpa_plot_jobs(hpa_data))
     
     except Exception as e:
         logger.error(f"Error creating direct HPA plots: {str(e)}\n{traceback.format_exc()}")
         return 0
 
-def generate_report(results_dir, k6_metrics, pod_metrics, hpa_metrics):
+def generate_report(results_dir, k6_metrics, pod_metrics, hpa_metrics, k6_histograms=None, k6_breakdown=None,
+                    autoscaling=None, performance=None, workload=None, server_time=None):
     """Generate HTML report with the analysis results"""
     report_file = os.path.join(results_dir, 'report.html')
     
@@ -416,7 +1525,32 @@ def generate_report(results_dir, k6_metrics, pod_metrics, hpa_metrics):
             <h2>Summary</h2>
             <p>This report summarizes the results of the load test performed on the URL Shortener application.</p>
         </div>
-        
+    """
+    
+    if workload:
+        html_content += f"""
+        <div class="section">
+            <h2>Workload</h2>
+            <p>{workload_label(workload)}</p>
+            <table>
+                <tr>
+                    <th>Parameter</th>
+                    <th>Value</th>
+                </tr>
+        """
+        for name, value in workload.items():
+            html_content += f"""
+                <tr>
+                    <td>{name}</td>
+                    <td>{json.dumps(value) if isinstance(value, (dict, list)) else value}</td>
+                </tr>
+            """
+        html_content += """
+            </table>
+        </div>
+        """
+    
+    html_content += """
         <div class="section">
             <h2>Performance Metrics</h2>
     """
@@ -424,11 +1558,28 @@ def generate_report(results_dir, k6_metrics, pod_metrics, hpa_metrics):
     plots_dir = os.path.join('plots')
     plot_files = glob.glob(os.path.join(results_dir, plots_dir, '*.png'))
     
+    plot_points = {}
+    points_file = os.path.join(results_dir, plots_dir, PLOT_POINTS_FILE)
+    if os.path.exists(points_file):
+        try:
+            with open(points_file, 'r') as f:
+                plot_points = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read plot point counts: {str(e)}")
+    
     for plot_file in sorted(plot_files):
         rel_path = os.path.join(plots_dir, os.path.basename(plot_file))
+        points = plot_points.get(os.path.basename(plot_file))
+        caption = ''
+        if points:
+            caption = f"{points['points']:,} data points"
+            if points['plotted'] < points['points']:
+                caption += f" (downsampled to {points['plotted']:,} for plotting)"
+            caption = f"<p>{caption}</p>"
         html_content += f"""
             <div class="plot">
                 <h3>{os.path.basename(plot_file).replace('.png', '').replace('_', ' ')}</h3>
+                {caption}
                 <img src="{rel_path}" alt="{os.path.basename(plot_file)}" style="max-width: 100%;" />
             </div>
         """
@@ -448,28 +1599,143 @@ def generate_report(results_dir, k6_metrics, pod_metrics, hpa_metrics):
                     <th>Metric</th>
                     <th>Min</th>
                     <th>Avg</th>
+            """
+            html_content += ''.join(f"<th>{label}</th>" for label, _ in REPORT_PERCENTILES)
+            html_content += """
                     <th>Max</th>
-                    <th>p90</th>
-                    <th>p95</th>
                 </tr>
             """
             
             for metric, df in http_req_metrics.items():
-                if len(df) > 0:
+                histogram = (k6_histograms or {}).get(metric)
+                if histogram is None:
+                    histogram = LatencyHistogram()
+                    histogram.record(df['value'].to_numpy())
+                if histogram.count > 0:
                     html_content += f"""
                     <tr>
                         <td>{metric}</td>
-                        <td>{df['value'].min():.2f}</td>
-                        <td>{df['value'].mean():.2f}</td>
-                        <td>{df['value'].max():.2f}</td>
-                        <td>{df['value'].quantile(0.9):.2f}</td>
-                        <td>{df['value'].quantile(0.95):.2f}</td>
+                        <td>{histogram.min:.2f}</td>
+                        <td>{histogram.mean():.2f}</td>
+                    """
+                    html_content += ''.join(f"<td>{histogram.quantile(q):.2f}</td>" for _, q in REPORT_PERCENTILES)
+                    html_content += f"""
+                        <td>{histogram.max:.2f}</td>
                     </tr>
                     """
             
+            html_content += f"""
+            </table>
+            <p>Percentiles are estimated from log-bucketed histograms with at most {HISTOGRAM_RELATIVE_ERROR:.0%} relative error.</p>
+            """
+    
+    if k6_breakdown is not None and not k6_breakdown.empty:
+        html_content += """
+            <h3>Endpoint Breakdown</h3>
+            <table>
+                <tr>
+                    <th>Endpoint</th>
+                    <th>Status</th>
+                    <th>Requests</th>
+                    <th>Req/s</th>
+                    <th>Avg (ms)</th>
+                    <th>p50 (ms)</th>
+                    <th>p95 (ms)</th>
+                    <th>p99 (ms)</th>
+                    <th>Max (ms)</th>
+                    <th>Error Rate</th>
+                </tr>
+        """
+        
+        for row in k6_breakdown.itertuples(index=False):
+            html_content += f"""
+                <tr>
+                    <td>{row.endpoint}</td>
+                    <td>{row.status}</td>
+                    <td>{row.requests}</td>
+                    <td>{row.rps:.2f}</td>
+                    <td>{row.avg:.2f}</td>
+                    <td>{row.p50:.2f}</td>
+                    <td>{row.p95:.2f}</td>
+                    <td>{row.p99:.2f}</td>
+                    <td>{row.max:.2f}</td>
+                    <td>{row.error_rate:.2%}</td>
+                </tr>
+            """
+        
+        html_content += """
+            </table>
+        """
+    
+    if server_time is not None and not server_time['endpoints'].empty:
+        html_content += """
+            <h3>Server vs Redis Time</h3>
+            <p>Averages split each endpoint's end-to-end latency into time waiting for Redis, other server time and
+            network/queueing time outside the server; p99s are from the server's /metrics histograms.</p>
+            <table>
+                <tr>
+                    <th>Endpoint</th>
+                    <th>Server Requests</th>
+                    <th>End-to-end Avg (ms)</th>
+                    <th>Network &amp; Queueing Avg (ms)</th>
+                    <th>Server Avg (ms)</th>
+                    <th>Redis Avg (ms)</th>
+                    <th>Server excl. Redis Avg (ms)</th>
+                    <th>End-to-end p99 (ms)</th>
+                    <th>Server p99 (ms)</th>
+                    <th>Redis p99 (ms)</th>
+                </tr>
+        """
+        
+        for row in server_time['endpoints'].itertuples(index=False):
+            html_content += f"""
+                <tr>
+                    <td>{row.endpoint}</td>
+                    <td>{row.requests}</td>
+                    <td>{row.client_avg:.2f}</td>
+                    <td>{row.network_avg:.2f}</td>
+                    <td>{row.server_avg:.2f}</td>
+                    <td>{row.redis_avg:.2f}</td>
+                    <td>{row.app_avg:.2f}</td>
+                    <td>{row.client_p99:.2f}</td>
+                    <td>{row.server_p99:.2f}</td>
+                    <td>{row.redis_p99:.2f}</td>
+                </tr>
+            """
+        
+        html_content += """
+            </table>
+        """
+        
+        if not server_time['commands'].empty:
+            html_content += """
+            <table>
+                <tr>
+                    <th>Redis Command</th>
+                    <th>Count</th>
+                    <th>Avg (ms)</th>
+                    <th>p99 (ms)</th>
+                </tr>
+            """
+            for row in server_time['commands'].itertuples(index=False):
+                html_content += f"""
+                <tr>
+                    <td>{row.command}</td>
+                    <td>{int(row.count)}</td>
+                    <td>{row.avg:.2f}</td>
+                    <td>{row.p99:.2f}</td>
+                </tr>
+                """
             html_content += """
             </table>
             """
+        
+        loop = server_time['loop']
+        if loop:
+            html_content += f"""
+            <p>Event-loop lag at the end of the run: p50 {loop.get('0.5', np.nan):.2f} ms,
+            p99 {loop.get('0.99', np.nan):.2f} ms, max {loop.get('1', np.nan):.2f} ms.</p>
+            """
     
     if pod_metrics is not None:
         pod_groups = pod_metrics.groupby('Name')
@@ -500,9 +1766,95 @@ def generate_report(results_dir, k6_metrics, pod_metrics, hpa_metrics):
             </table>
         """
     
+    if autoscaling:
+        summary = autoscaling['summary']
+        html_content += f"""
+            <h3>Autoscaling Analysis</h3>
+            <ul>
+                <li>Scale-out events: {summary['scale_out_events']}</li>
+                <li>Median lag from CPU crossing target to DesiredReplicas change: {summary['median_decision_lag']:.0f} s</li>
+                <li>Median lag from DesiredReplicas to CurrentReplicas change: {summary['median_actuation_lag']:.0f} s</li>
+                <li>Median lag from CurrentReplicas change to p95 below {summary['slo_ms']} ms: {summary['median_recovery_lag']:.0f} s</li>
+                <li>Longest trigger-to-recovery lag: {summary['max_total_lag']:.0f} s</li>
+                <li>Time saturated at MaxReplicas: {summary['saturated_seconds']:.0f} s ({summary['saturated_fraction']:.1%})</li>
+                <li>Time with p95 above {summary['slo_ms']} ms: {summary['slo_violation_seconds']:.0f} s</li>
+            </ul>
+        """
+        
+        events = autoscaling['events']
+        if not events.empty:
+            html_content += """
+            <table>
+                <tr>
+                    <th>CPU Crossed Target</th>
+                    <th>Desired Changed</th>
+                    <th>Current Changed</th>
+                    <th>Latency Recovered</th>
+                    <th>Replicas</th>
+                    <th>Decision Lag (s)</th>
+                    <th>Actuation Lag (s)</th>
+                    <th>Recovery Lag (s)</th>
+                    <th>SLO Violation (s)</th>
+                </tr>
+            """
+            
+            for event in events.itertuples(index=False):
+                html_content += f"""
+                <tr>
+                    <td>{event.Trigger}</td>
+                    <td>{event.DesiredChange}</td>
+                    <td>{event.CurrentChange}</td>
+                    <td>{event.Recovery}</td>
+                    <td>{event.FromReplicas} &rarr; {event.ToReplicas}</td>
+                    <td>{event.DecisionLag:.0f}</td>
+                    <td>{event.ActuationLag:.0f}</td>
+                    <td>{event.RecoveryLag:.0f}</td>
+                    <td>{event.SLOViolation:.0f}</td>
+                </tr>
+                """
+            
+            html_content += """
+            </table>
+            """
+    
     html_content += """
         </div>
+        """
+    
+    if performance:
+        html_content += """
+        <div class="section">
+            <h2>Analyzer Performance</h2>
+            <p>Time and memory spent by each stage of this analysis (generate_report itself is in timings.json).</p>
+            <table>
+                <tr>
+                    <th>Stage</th>
+                    <th>Wall (s)</th>
+                    <th>CPU (s)</th>
+                    <th>Peak RSS (MB)</th>
+                    <th>Rows In</th>
+                    <th>Rows Out</th>
+                </tr>
+        """
+        
+        for name, stage in performance.items():
+            html_content += f"""
+                <tr>
+                    <td>{name}</td>
+                    <td>{stage['wall_s']:.3f}</td>
+                    <td>{stage['cpu_s']:.3f}</td>
+                    <td>{stage['peak_rss_mb'] if stage['peak_rss_mb'] is not None else 'N/A'}</td>
+                    <td>{stage['rows_in'] if stage['rows_in'] is not None else ''}</td>
+                    <td>{stage['rows_out']}</td>
+                </tr>
+            """
         
+        html_content += """
+            </table>
+        </div>
+        """
+    
+    html_content += """
         <div class="section">
             <h2>Conclusions</h2>
             <p>Based on the load test results, here are the key findings:</p>
@@ -524,6 +1876,533 @@ def generate_report(results_dir, k6_metrics, pod_metrics, hpa_metrics):
     logger.info(f"Report generated at: {report_file}")
     return report_file
 
+WORKLOAD_FILE = 'workload.json'
+WORKLOAD_COMPARED_KEYS = ('profile', 'rate', 'schedule', 'mix', 'preseed', 'zipf_s', 'dedupe_rate', 'new_url_rate')
+
+def load_workload(results_dir):
+    """Workload profile recorded by load-generator.py for a run, or None for runs without one (such as k6 runs)"""
+    workload_file = os.path.join(results_dir, WORKLOAD_FILE)
+    if not os.path.exists(workload_file):
+        return None
+    try:
+        with open(workload_file, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        logger.warning(f"Could not read workload profile {workload_file}: {str(e)}")
+        return None
+
+def workload_label(workload):
+    """Short human-readable description of a run's workload"""
+    if not workload:
+        return 'unrecorded workload (k6 script)'
+    mix = ' / '.join(f"{name} {weight:.0%}" for name, weight in workload.get('mix', {}).items())
+    label = f"{workload.get('profile', 'custom')} profile: {workload.get('rate')} req/s {workload.get('schedule', '')}"
+    if mix:
+        label += f", {mix}"
+    if workload.get('zipf_s'):
+        label += f", Zipf s={workload['zipf_s']} over {workload.get('preseed', 0):,} URLs"
+    return label
+
+def workload_differences(baseline, candidate):
+    """Workload parameters that differ between two runs"""
+    baseline, candidate = baseline or {}, candidate or {}
+    return [key for key in WORKLOAD_COMPARED_KEYS if baseline.get(key) != candidate.get(key)]
+
+COMPARE_PERCENTILES = [('p50', 0.5), ('p95', 0.95), ('p99', 0.99)]
+COMPARE_BOOTSTRAP_SAMPLES = 1000
+COMPARE_CONFIDENCE = 0.95
+COMPARE_LATENCY_BUDGET = 10.0
+COMPARE_THROUGHPUT_BUDGET = 10.0
+COMPARE_REPORT_FILE = 'comparison-report.html'
+
+def bootstrap_histogram_quantiles(histogram, quantiles, samples, rng):
+    """Bootstrap distribution of histogram quantiles, resampling each bucket count as Poisson (the Poisson bootstrap)"""
+    buckets = np.flatnonzero(histogram.counts)
+    counts = np.concatenate([[histogram.zero_count], histogram.counts[buckets]])
+    values = np.concatenate([[histogram.min], 2 * histogram.gamma ** (buckets + histogram.offset) / (histogram.gamma + 1)])
+    values = np.clip(values, histogram.min, histogram.max)
+    
+    resampled = np.cumsum(rng.poisson(counts, size=(samples, len(counts))), axis=1)
+    result = np.empty((len(quantiles), samples))
+    for i, q in enumerate(quantiles):
+        rank = q * (resampled[:, -1:] - 1)
+        result[i] = values[np.minimum((resampled <= rank).sum(axis=1), len(values) - 1)]
+    return result
+
+def window_requests(rates, endpoint):
+    """Requests per window counted from the run's first window, with zeros for windows an endpoint had none;
+    the partial first and last windows are dropped"""
+    first, last = rates['window'].min(), rates['window'].max()
+    selected = rates if endpoint == 'all' else rates[rates['endpoint'].astype(str) == endpoint]
+    counts = np.zeros(last - first + 1)
+    np.add.at(counts, (selected['window'] - first).to_numpy(), selected['requests'].to_numpy())
+    return counts[1:-1] if len(counts) > 2 else counts
+
+def bootstrap_paired_rates(base, cand, samples, rng):
+    """Paired moving-block bootstrap of mean requests per second over windows aligned by offset from run start.
+    Both runs draw the same blocks, so the load shape they share (ramps, stages) cancels out of the delta and
+    the CI reflects run-to-run noise; blocks keep the autocorrelation between neighbouring windows."""
+    n = min(len(base), len(cand))
+    base = np.asarray(base[:n], dtype=np.float64)
+    cand = np.asarray(cand[:n], dtype=np.float64)
+    block = max(1, int(round(n ** (1 / 3))))
+    starts = rng.integers(0, n - block + 1, size=(samples, -(-n // block)))
+    picks = (starts[:, :, None] + np.arange(block)).reshape(samples, -1)[:, :n]
+    window_seconds = PERCENTILE_WINDOW_NS / 10**9
+    return base[picks].mean(axis=1) / window_seconds, cand[picks].mean(axis=1) / window_seconds
+
+def compare_runs(baseline, candidate, samples=COMPARE_BOOTSTRAP_SAMPLES, confidence=COMPARE_CONFIDENCE,
+                 latency_budget=COMPARE_LATENCY_BUDGET, throughput_budget=COMPARE_THROUGHPUT_BUDGET, seed=0):
+    """Per-endpoint percentile and throughput deltas with bootstrap CIs; a row regresses when its whole CI is past the budget"""
+    rng = np.random.default_rng(seed)
+    tail = (1 - confidence) / 2 * 100
+    rows = []
+    
+    def add_row(endpoint, statistic, base, cand, base_samples, cand_samples, budget, higher_is_worse):
+        delta = (cand_samples - base_samples) / base_samples * 100
+        low, high = np.nanpercentile(delta, [tail, 100 - tail]) if np.isfinite(delta).any() else (np.nan, np.nan)
+        worse = low if higher_is_worse else -high
+        rows.append({
+            'endpoint': endpoint,
+            'statistic': statistic,
+            'baseline': base,
+            'candidate': cand,
+            'delta_pct': (cand - base) / base * 100 if base else np.nan,
+            'ci_low_pct': low,
+            'ci_high_pct': high,
+            'significant': bool(low > 0 or high < 0),
+            'regression': bool(worse > budget)
+        })
+    
+    base_histograms = dict(baseline['endpoint_histograms'])
+    cand_histograms = dict(candidate['endpoint_histograms'])
+    if 'http_req_duration' in (baseline['k6_histograms'] or {}) and 'http_req_duration' in (candidate['k6_histograms'] or {}):
+        base_histograms['all'] = baseline['k6_histograms']['http_req_duration']
+        cand_histograms['all'] = candidate['k6_histograms']['http_req_duration']
+    quantiles = [q for _, q in COMPARE_PERCENTILES]
+    
+    for endpoint in sorted(set(base_histograms) & set(cand_histograms), key=lambda e: (e == 'all', e)):
+        base, cand = base_histograms[endpoint], cand_histograms[endpoint]
+        if base.count == 0 or cand.count == 0:
+            continue
+        base_samples = bootstrap_histogram_quantiles(base, quantiles, samples, rng)
+        cand_samples = bootstrap_histogram_quantiles(cand, quantiles, samples, rng)
+        for i, (label, q) in enumerate(COMPARE_PERCENTILES):
+            add_row(endpoint, label, base.quantile(q), cand.quantile(q), base_samples[i], cand_samples[i],
+                    latency_budget, True)
+    
+    base_rates, cand_rates = baseline['endpoint_rates'], candidate['endpoint_rates']
+    if base_rates is not None and cand_rates is not None and not base_rates.empty and not cand_rates.empty:
+        endpoints = set(base_rates['endpoint'].astype(str)) & set(cand_rates['endpoint'].astype(str))
+        for endpoint in sorted(endpoints) + ['all']:
+            base, cand = window_requests(base_rates, endpoint), window_requests(cand_rates, endpoint)
+            n = min(len(base), len(cand))
+            if n == 0 or base[:n].sum() == 0:
+                continue
+            window_seconds = PERCENTILE_WINDOW_NS / 10**9
+            base_samples, cand_samples = bootstrap_paired_rates(base, cand, samples, rng)
+            add_row(endpoint, 'req/s', base[:n].mean() / window_seconds, cand[:n].mean() / window_seconds,
+                    base_samples, cand_samples, throughput_budget, False)
+    
+    return pd.DataFrame(rows, columns=['endpoint', 'statistic', 'baseline', 'candidate', 'delta_pct',
+                                       'ci_low_pct', 'ci_high_pct', 'significant', 'regression'])
+
+def expand_run_dirs(patterns):
+    """Expand run directory arguments (globs allowed, for shells that do not expand them) in creation order"""
+    run_dirs = []
+    for pattern in patterns:
+        matches = sorted(glob.glob(pattern), key=os.path.getctime) if glob.has_magic(pattern) else [pattern]
+        run_dirs.extend(path for path in matches if path not in run_dirs)
+    return run_dirs
+
+def generate_comparison_report(report_file, baseline_dir, comparisons, confidence=COMPARE_CONFIDENCE, workloads=None):
+    """Generate an HTML report of candidate runs against the baseline"""
+    workloads = workloads or {}
+    html_content = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>URL Shortener Load Test Comparison</title>
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 20px; }}
+            .section {{ margin-bottom: 30px; }}
+            table {{ border-collapse: collapse; width: 100%; }}
+            th, td {{ border: 1px solid #ddd; padding: 6px; }}
+            .regression {{ background-color: #f8d7da; }}
+            .improvement {{ background-color: #d4edda; }}
+        </style>
+    </head>
+    <body>
+        <h1>URL Shortener Load Test Comparison</h1>
+        <p>Generated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} against baseline <b>{baseline_dir}</b>
+        ({workload_label(workloads.get(baseline_dir))}).
+        Intervals are {confidence:.0%} bootstrap confidence intervals of the relative change; a row is a regression
+        when the whole interval is beyond the budget.</p>
+    """
+    for candidate_dir, comparison in comparisons.items():
+        regressions = int(comparison['regression'].sum()) if comparison is not None else 0
+        differences = workload_differences(workloads.get(baseline_dir), workloads.get(candidate_dir))
+        warning = f"<p><b>Workload differs from the baseline:</b> {', '.join(differences)}</p>" if differences else ''
+
+        html_content += f"""
+        <div class="section">
+            <h2>{candidate_dir}</h2>
+            <p>{workload_label(workloads.get(candidate_dir))}</p>
+            {warning}
+            <p>{regressions} regression(s) over budget</p>
+            <table>
+                <tr>
+                    <th>Endpoint</th>
+                    <th>Statistic</th>
+                    <th>Baseline</th>
+                    <th>Candidate</th>
+                    <th>Change</th>
+                    <th>CI</th>
+                </tr>
+        """
+        for _, row in (comparison if comparison is not None else pd.DataFrame()).iterrows():
+            improved = row['significant'] and (row['delta_pct'] > 0) == (row['statistic'] == 'req/s')
+            css = 'regression' if row['regression'] else 'improvement' if improved else ''
+            html_content += f"""
+                <tr class="{css}">
+                    <td>{row['endpoint']}</td>
+                    <td>{row['statistic']}</td>
+                    <td>{row['baseline']:.2f}</td>
+                    <td>{row['candidate']:.2f}</td>
+                    <td>{row['delta_pct']:+.1f}%</td>
+                    <td>[{row['ci_low_pct']:+.1f}%, {row['ci_high_pct']:+.1f}%]</td>
+                </tr>
+            """
+        html_content += """
+            </table>
+        </div>
+        """
+    html_content += """
+    </body>
+    </html>
+    """
+    
+    with open(report_file, 'w') as f:
+        f.write(html_content)
+    return report_file
+
+def compare_results(run_dirs, workers=1, use_cache=True, latency_budget=COMPARE_LATENCY_BUDGET,
+                    throughput_budget=COMPARE_THROUGHPUT_BUDGET, report_file=COMPARE_REPORT_FILE):
+    """Compare every candidate run with the first (baseline) run; returns the number of regressions"""
+    baseline_dir, candidate_dirs = run_dirs[0], run_dirs[1:]
+    
+    def load_run(run_dir):
+        return load_analysis(run_dir, os.path.join(run_dir, 'metrics'), workers, use_cache, frame_prefixes=('k6rate',))
+    
+    baseline = load_run(baseline_dir)
+    workloads = {run_dir: load_workload(run_dir) for run_dir in run_dirs}
+    comparisons = {}
+    regressions = 0
+    for candidate_dir in candidate_dirs:
+        comparison = compare_runs(baseline, load_run(candidate_dir), latency_budget=latency_budget,
+                                  throughput_budget=throughput_budget)
+        comparisons[candidate_dir] = comparison
+        differences = workload_differences(workloads[baseline_dir], workloads[candidate_dir])
+        if differences:
+            logger.warning(f"{candidate_dir} ran a different workload than the baseline ({', '.join(differences)})")
+        
+        failed = comparison[comparison['regression']]
+        regressions += len(failed)
+        logger.info(f"{candidate_dir}: {len(failed)} regression(s) over budget against {baseline_dir}")
+        for _, row in failed.iterrows():
+            logger.warning(f"  {row['endpoint']} {row['statistic']}: {row['baseline']:.2f} -> {row['candidate']:.2f} "
+                           f"({row['delta_pct']:+.1f}%, CI [{row['ci_low_pct']:+.1f}%, {row['ci_high_pct']:+.1f}%])")
+    
+    generate_comparison_report(report_file, baseline_dir, comparisons, workloads=workloads)
+    json_file = os.path.splitext(report_file)[0] + '.json'
+    with open(json_file, 'w') as f:
+        json.dump({
+            'baseline': baseline_dir,
+            'workloads': workloads,
+            'latency_budget_pct': latency_budget,
+            'throughput_budget_pct': throughput_budget,
+            'candidates': {run_dir: df.to_dict(orient='records') for run_dir, df in comparisons.items()}
+        }, f, indent=2, default=float)
+    logger.info(f"Comparison report generated at: {report_file}")
+    return regressions
+
+MONITORING_SIGNAL_FILE = 'monitoring-active.signal'
+FOLLOW_INTERVAL = 5.0
+FOLLOW_WINDOW = 300
+FOLLOW_IDLE_TIMEOUT = 120.0
+
+def appended_range(path, offset):
+    """Newline-aligned byte range appended to a file since offset, restarting if it was truncated"""
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    if size < offset:
+        offset = 0
+    if size == offset:
+        return offset, offset
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        newline = mm.rfind(b'\n', offset, size)
+    return offset, (newline + 1 if newline >= 0 else offset)
+
+class CsvTail:
+    """Reads only the rows appended to a metrics CSV since the previous poll"""
+
+    def __init__(self, metrics_dir, filenames):
+        self.paths = [os.path.join(metrics_dir, filename) for filename in filenames]
+        self.offset = 0
+        self.header = None
+
+    def read(self):
+        path = next((path for path in self.paths if os.path.exists(path)), None)
+        if path is None:
+            return None
+        start, end = appended_range(path, self.offset)
+        if start == 0:
+            self.header = None
+        if end <= start:
+            return None
+        with open(path, 'rb') as f:
+            f.seek(start)
+            lines = f.read(end - start).splitlines()
+        self.offset = end
+        if self.header is None:
+            self.header, lines = lines[0], lines[1:]
+        lines = [line for line in lines if line.strip()]
+        if not lines:
+            return None
+        return pd.read_csv(io.BytesIO(b'\n'.join([self.header] + lines)))
+
+class FollowState:
+    """Rolling aggregates over the k6 points and metrics rows appended during a run"""
+
+    def __init__(self, results_dir, metrics_dir, window_seconds=FOLLOW_WINDOW):
+        self.k6_file = os.path.join(results_dir, 'k6-results.json')
+        self.k6_offset = 0
+        self.max_windows = max(1, int(window_seconds * 10**9 // PERCENTILE_WINDOW_NS))
+        self.reset_k6()
+        self.pod_tail = CsvTail(metrics_dir, CSV_METRIC_FILES['pod'])
+        self.hpa_tail = CsvTail(metrics_dir, CSV_METRIC_FILES['hpa'])
+        self.pod_cpu = None
+        self.hpa_latest = None
+
+    def reset_k6(self):
+        """Drop the k6 aggregates, e.g. when k6-results.json was truncated by a new run"""
+        self.histograms = {}
+        self.windows = {}
+        self.tz = None
+        self.point_count = 0
+
+    def window(self, start):
+        window = self.windows.get(start)
+        if window is None:
+            window = self.windows[start] = {
+                'latency': LatencyHistogram(PERCENTILE_WINDOW_ERROR), 'requests': 0.0, 'failed': 0.0, 'checked': 0
+            }
+        return window
+
+    def fold_k6(self, columns):
+        """Fold one increment of parsed points into the rolling state and drop its raw columns"""
+        for metric, histogram in columns.histograms.items():
+            if metric in self.histograms:
+                self.histograms[metric].merge(histogram)
+            else:
+                self.histograms[metric] = histogram
+        for start, histogram in columns.window_histograms.get('http_req_duration', {}).items():
+            self.window(start)['latency'].merge(histogram)
+        
+        for metric, field in (('http_reqs', 'requests'), ('http_req_failed', 'failed')):
+            if metric not in columns.timestamps:
+                continue
+            starts = np.concatenate(columns.timestamps[metric]) // PERCENTILE_WINDOW_NS
+            values = np.concatenate(columns.values[metric])
+            for start in np.unique(starts):
+                window = self.window(int(start))
+                window[field] += float(values[starts == start].sum())
+                if field == 'failed':
+                    window['checked'] += int((starts == start).sum())
+        
+        if self.tz is None:
+            self.tz = columns.tz
+        self.point_count += columns.point_count
+        for start in sorted(self.windows)[:-self.max_windows]:
+            del self.windows[start]
+
+    def poll(self):
+        """Parse newly appended bytes of every source; returns True if anything new was read"""
+        grew = False
+        start, end = appended_range(self.k6_file, self.k6_offset)
+        if start == 0 and self.k6_offset > 0:
+            logger.info(f"{self.k6_file} was truncated, restarting the live aggregates")
+            self.reset_k6()
+            self.k6_offset = 0
+            grew = True
+        while start < end:
+            with open(self.k6_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                stop = mm.find(b'\n', min(start + K6_CHUNK_SIZE, end) - 1, end)
+            stop = end if stop < 0 else stop + 1
+            self.fold_k6(ingest_k6_range(self.k6_file, start, stop))
+            start = stop
+            grew = True
+        self.k6_offset = end
+        
+        pods = self.pod_tail.read()
+        if pods is not None and not pods.empty:
+            latest = pods[pods['Timestamp'] == pods['Timestamp'].iloc[-1]]
+            self.pod_cpu = (latest['Timestamp'].iloc[-1], parse_k8s_quantity(latest['CPU']).mean(), len(latest))
+            grew = True
+        
+        hpa = self.hpa_tail.read()
+        if hpa is not None and not hpa.empty:
+            self.hpa_latest = hpa.iloc[-1]
+            grew = True
+        return grew
+
+def write_live_report(results_dir, state, interval):
+    """Write a self-refreshing report.html with the rolling aggregates of a run in progress"""
+    report_file = os.path.join(results_dir, 'report.html')
+    
+    html_content = f"""
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <title>URL Shortener Load Test Report (live)</title>
+        <meta http-equiv="refresh" content="{max(1, int(interval))}">
+        <style>
+            body {{ font-family: Arial, sans-serif; margin: 20px; }}
+            .section {{ margin-bottom: 30px; }}
+            table {{ border-collapse: collapse; width: 100%; }}
+            th, td {{ border: 1px solid #ddd; padding: 6px; }}
+        </style>
+    </head>
+    <body>
+        <h1>URL Shortener Load Test Report (live)</h1>
+        <p>Updated on {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {state.point_count:,} k6 points parsed so far.
+        The full report replaces this page when the run finishes.</p>
+        
+        <div class="section">
+            <h2>Whole Run</h2>
+            <table>
+                <tr>
+                    <th>Metric</th>
+                    <th>Count</th>
+                    <th>Avg</th>
+    """
+    html_content += ''.join(f"<th>{label}</th>" for label, _ in REPORT_PERCENTILES)
+    html_content += """
+                    <th>Max</th>
+                </tr>
+    """
+    for metric, histogram in sorted(state.histograms.items()):
+        if 'http_req' not in metric or histogram.count == 0:
+            continue
+        html_content += f"""
+                <tr>
+                    <td>{metric}</td>
+                    <td>{histogram.count:,}</td>
+                    <td>{histogram.mean():.2f}</td>
+        """
+        html_content += ''.join(f"<td>{histogram.quantile(q):.2f}</td>" for _, q in REPORT_PERCENTILES)
+        html_content += f"""
+                    <td>{histogram.max:.2f}</td>
+                </tr>
+        """
+    html_content += """
+            </table>
+        </div>
+    """
+    
+    if state.hpa_latest is not None or state.pod_cpu is not None:
+        html_content += """
+        <div class="section">
+            <h2>Cluster</h2>
+            <ul>
+        """
+        if state.hpa_latest is not None:
+            hpa = state.hpa_latest
+            html_content += f"""
+                <li>HPA at {hpa.get('Timestamp')}: {hpa.get('CurrentReplicas')} current / {hpa.get('DesiredReplicas')} desired replicas,
+                CPU {hpa.get('CurrentCPUUtilization')}% (target {hpa.get('TargetCPUUtilization')}%)</li>
+            """
+        if state.pod_cpu is not None:
+            timestamp, cpu, pods = state.pod_cpu
+            html_content += f"""
+                <li>Pods at {timestamp}: mean CPU {cpu:.3f} cores over {pods} pods</li>
+            """
+        html_content += """
+            </ul>
+        </div>
+        """
+    
+    window_seconds = PERCENTILE_WINDOW_NS / 10**9
+    html_content += f"""
+        <div class="section">
+            <h2>Last {len(state.windows) * window_seconds:.0f} seconds</h2>
+            <table>
+                <tr>
+                    <th>Window</th>
+                    <th>Req/s</th>
+                    <th>p50 (ms)</th>
+                    <th>p95 (ms)</th>
+                    <th>p99 (ms)</th>
+                    <th>Error Rate</th>
+                </tr>
+    """
+    for start in sorted(state.windows, reverse=True):
+        window = state.windows[start]
+        latency = window['latency']
+        error_rate = window['failed'] / window['checked'] if window['checked'] else 0.0
+        html_content += f"""
+                <tr>
+                    <td>{pd.Timestamp(start * PERCENTILE_WINDOW_NS, tz='UTC').tz_convert(state.tz)}</td>
+                    <td>{window['requests'] / window_seconds:.2f}</td>
+                    <td>{latency.quantile(0.5):.2f}</td>
+                    <td>{latency.quantile(0.95):.2f}</td>
+                    <td>{latency.quantile(0.99):.2f}</td>
+                    <td>{error_rate:.2%}</td>
+                </tr>
+        """
+    html_content += """
+            </table>
+        </div>
+    </body>
+    </html>
+    """
+    
+    tmp_file = report_file + '.tmp'
+    with open(tmp_file, 'w') as f:
+        f.write(html_content)
+    os.replace(tmp_file, report_file)
+    return report_file
+
+def follow_results(results_dir, metrics_dir, interval=FOLLOW_INTERVAL, window_seconds=FOLLOW_WINDOW,
+                   idle_timeout=FOLLOW_IDLE_TIMEOUT):
+    """Tail k6 output and metrics CSVs during a run, refreshing the live report until the run ends"""
+    logger.info(f"Following results in {results_dir} every {interval}s (Ctrl+C to stop)")
+    state = FollowState(results_dir, metrics_dir, window_seconds)
+    signal_file = os.path.join(results_dir, MONITORING_SIGNAL_FILE)
+    seen_signal = False
+    idle = 0.0
+    
+    try:
+        while True:
+            grew = state.poll()
+            if grew:
+                write_live_report(results_dir, state, interval)
+                logger.info(f"Live report updated: {state.point_count} k6 points, {len(state.windows)} windows")
+            
+            if os.path.exists(signal_file):
+                seen_signal = True
+            elif seen_signal:
+                logger.info("Monitoring signal file removed, finishing live analysis")
+                break
+            
+            idle = 0.0 if grew else idle + interval
+            if idle >= idle_timeout:
+                logger.info(f"No new results for {idle_timeout:.0f}s, finishing live analysis")
+                break
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        logger.info("Live analysis interrupted")
+    return state
+
 def find_latest_results_dir():
     """Find the most recently created load test results directory"""
     dirs = glob.glob('results/load-test-results-*')
@@ -536,35 +2415,87 @@ def find_latest_results_dir():
     logger.info(f"Found latest results directory: {max_dir}")
     return max_dir, metrics_dir
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Analyze URL shortener load test results')
+    parser.add_argument('results_dir', nargs='?', help='load test results directory (default: latest)')
+    parser.add_argument('metrics_dir', nargs='?', help='metrics CSV directory (default: <results_dir>/metrics)')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='number of processes used to parse k6-results.json and render plots')
+    parser.add_argument('--plot-points', type=int, default=PLOT_MAX_POINTS,
+                        help='maximum points drawn per plotted series (0 disables downsampling)')
+    parser.add_argument('--slo-ms', type=float, default=LATENCY_SLO_MS,
+                        help='p95 latency SLO used by the autoscaling analysis')
+    parser.add_argument('--follow', action='store_true',
+                        help='tail the results while the test runs, then write the full report')
+    parser.add_argument('--interval', type=float, default=FOLLOW_INTERVAL,
+                        help='seconds between live report updates in --follow mode')
+    parser.add_argument('--window', type=int, default=FOLLOW_WINDOW,
+                        help='seconds of history kept by the rolling aggregates in --follow mode')
+    parser.add_argument('--idle-timeout', type=float, default=FOLLOW_IDLE_TIMEOUT,
+                        help='stop following after this many seconds without new results')
+    parser.add_argument('--compare', nargs='+', metavar='RUN_DIR',
+                        help='compare runs against the first (baseline) run instead of analyzing one run; globs allowed')
+    parser.add_argument('--latency-budget', type=float, default=COMPARE_LATENCY_BUDGET,
+                        help='percent slowdown of a percentile tolerated by --compare before exiting non-zero')
+    parser.add_argument('--throughput-budget', type=float, default=COMPARE_THROUGHPUT_BUDGET,
+                        help='percent drop in requests per second tolerated by --compare before exiting non-zero')
+    parser.add_argument('--compare-report', default=COMPARE_REPORT_FILE,
+                        help='HTML file written by --compare (a .json with the same name is written next to it)')
+    parser.add_argument('--profile', action='store_true',
+                        help='record wall/CPU time, peak RSS and row counts per stage in the report and timings.json')
+    parser.add_argument('--profile-dump', action='store_true',
+                        help='with --profile, also write a cProfile dump per stage to <results_dir>/profile')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='ignore the analysis cache and re-parse all sources')
+    return parser.parse_args(argv)
+
 def main():
-    if len(sys.argv) < 3:
+    args = parse_args()
+    if args.compare:
+        run_dirs = expand_run_dirs(args.compare)
+        if len(run_dirs) < 2:
+            logger.error("--compare needs a baseline and at least one candidate run directory")
+            sys.exit(2)
+        regressions = compare_results(run_dirs, args.workers, not args.no_cache, args.latency_budget,
+                                      args.throughput_budget, args.compare_report)
+        sys.exit(1 if regressions else 0)
+    
+    if not args.results_dir:
         results_dir, metrics_dir = find_latest_results_dir()
         if not results_dir:
             logger.error("No results directory specified and no results found.")
-            logger.info("Usage: python analyze-results.py [results_directory] [metrics_directory]")
+            logger.info("Usage: python analyze-results.py [results_directory] [metrics_directory] [--workers N]")
             sys.exit(1)
     else:
-        results_dir = sys.argv[1]
-        metrics_dir = sys.argv[2]
+        results_dir = args.results_dir
+        metrics_dir = args.metrics_dir or os.path.join(results_dir, 'metrics')
+    
+    if args.follow:
+        follow_results(results_dir, metrics_dir, args.interval, args.window, args.idle_timeout)
     
     logger.info(f"Analyzing results in: {results_dir}")
     
     try:
-        logger.info("Loading k6 results...")
-        k6_results = load_k6_results(results_dir)
-        k6_data = analyze_k6_results(k6_results)
+        profiler = StageProfiler(args.profile, os.path.join(results_dir, PROFILE_DUMP_DIR) if args.profile_dump else None)
+        analysis = load_analysis(results_dir, metrics_dir, args.workers, use_cache=not args.no_cache,
+                                 profiler=profiler)
+        k6_data = analysis['k6_data']
+        k6_histograms = analysis['k6_histograms']
+        k6_percentiles = analysis['k6_percentiles']
+        pod_data = analysis['pod_data']
+        hpa_data = analysis['hpa_data']
         
-        logger.info("Loading metrics...")
-        csv_metrics = load_csv_metrics(results_dir, metrics_dir)
+        k6_breakdown = profiler.run('analyze_k6_breakdown', analyze_k6_breakdown, k6_data,
+                                    rows_in=row_count((k6_data or {}).get('http_req_duration')))
         
-        pod_data = analyze_pod_metrics(csv_metrics.get('pod'))
-        
-        hpa_data = analyze_hpa_metrics(csv_metrics.get('hpa'))
+        autoscaling = profiler.run('analyze_autoscaling', analyze_autoscaling, k6_percentiles, pod_data, hpa_data,
+                                   args.slo_ms, rows_in=row_count((k6_percentiles, pod_data, hpa_data)))
         
         logger.info("Generating plots...")
         plots_dir = os.path.join(results_dir, 'plots')
         os.makedirs(plots_dir, exist_ok=True)
-        generate_plots(results_dir, k6_data, pod_data, hpa_data)
+        profiler.run('generate_plots', generate_plots, results_dir, k6_data, pod_data, hpa_data, k6_percentiles,
+                     args.workers, args.plot_points, autoscaling, rows_in=row_count((k6_data, pod_data, hpa_data)))
         
         hpa_plot_files = glob.glob(os.path.join(plots_dir, 'hpa_*.png'))
         if not hpa_plot_files:
@@ -573,8 +2504,20 @@ def main():
             if hpa_plots_count > 0:
                 logger.info(f"Created {hpa_plots_count} HPA plots directly from CSV")
         
+        durations = (k6_data or {}).get('http_req_duration')
+        k6_window = None
+        if durations is not None and not durations.empty:
+            k6_window = [durations['timestamp'].min(), durations['timestamp'].max()]
+        server_time = profiler.run('analyze_server_time', analyze_server_time,
+                                   load_server_metrics(results_dir, k6_window), analysis['endpoint_histograms'])
+        
         logger.info("Generating report...")
-        report_file = generate_report(results_dir, k6_data, pod_data, hpa_data)
+        report_file = profiler.run('generate_report', generate_report, results_dir, k6_data, pod_data, hpa_data,
+                                   k6_histograms, k6_breakdown, autoscaling,
+                                   profiler.stages if args.profile else None, load_workload(results_dir),
+                                   server_time)
+        if args.profile:
+            profiler.save(os.path.join(results_dir, PROFILE_TIMINGS_FILE))
         
         logger.info(f"\nAnalysis complete! Report generated at: {report_file}")
         print(f"\nAnalysis complete! Report generated at: {report_file}")
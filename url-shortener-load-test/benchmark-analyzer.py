@@ -0,0 +1,124 @@
+import os
+import sys
+import gc
+import json
+import argparse
+import platform
+import subprocess
+import importlib.util
+from datetime import datetime
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_SIZES = [10000, 100000, 1000000]
+
+def load_script(name, filename):
+    """Import one of the hyphen-named scripts next to this file as a module"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SCRIPT_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def benchmark_run(analyzer, results_dir, workers=1):
+    """Run the analyzer stages of main() on one results directory without the analysis cache"""
+    profiler = analyzer.StageProfiler()
+    analysis = analyzer.load_analysis(results_dir, os.path.join(results_dir, 'metrics'), workers, use_cache=False,
+                                      profiler=profiler)
+    k6_data, pod_data, hpa_data = analysis['k6_data'], analysis['pod_data'], analysis['hpa_data']
+    k6_percentiles = analysis['k6_percentiles']
+
+    k6_breakdown = profiler.run('analyze_k6_breakdown', analyzer.analyze_k6_breakdown, k6_data)
+    autoscaling = profiler.run('analyze_autoscaling', analyzer.analyze_autoscaling, k6_percentiles, pod_data,
+                               hpa_data)
+    os.makedirs(os.path.join(results_dir, 'plots'), exist_ok=True)
+    profiler.run('generate_plots', analyzer.generate_plots, results_dir, k6_data, pod_data, hpa_data,
+                 k6_percentiles, workers, analyzer.PLOT_MAX_POINTS, autoscaling)
+    profiler.run('generate_report', analyzer.generate_report, results_dir, k6_data, pod_data, hpa_data,
+                 analysis['k6_histograms'], k6_breakdown, autoscaling)
+    return profiler.stages
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=SCRIPT_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def compare_benchmarks(baseline, current):
+    """Log per-stage wall time and peak RSS ratios of the current benchmark against a saved one"""
+    previous = {(run['points'], run['pods']): run['stages'] for run in baseline.get('runs', [])}
+    for run in current['runs']:
+        stages = previous.get((run['points'], run['pods']))
+        if stages is None:
+            continue
+        logger.info(f"{run['points']} points vs {baseline.get('commit') or 'baseline'}:")
+        for name, stage in run['stages'].items():
+            if name not in stages or not stages[name]['wall_s']:
+                continue
+            ratio = stage['wall_s'] / stages[name]['wall_s']
+            logger.info(f"  {name}: {stages[name]['wall_s']:.3f}s -> {stage['wall_s']:.3f}s ({ratio:.2f}x), "
+                        f"peak RSS {stages[name]['peak_rss_mb']} -> {stage['peak_rss_mb']} MB")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark analyze-results.py stages on synthetic results')
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help='comma-separated k6 point counts to benchmark')
+    parser.add_argument('--max-replicas', type=int, default=5, help='HPA maximum replicas of the synthetic runs')
+    parser.add_argument('--peak-vus', type=int, default=100, help='peak VUs of the synthetic runs')
+    parser.add_argument('--workers', type=int, default=1, help='--workers passed to the analyzer stages')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the synthetic results')
+    parser.add_argument('--data-dir', default=os.path.join('results', 'benchmark-data'),
+                        help='where synthetic results are generated (reused when already present)')
+    parser.add_argument('--output', default=os.path.join('results', 'benchmark-results.json'),
+                        help='JSON file the stage timings are written to')
+    parser.add_argument('--baseline', help='earlier benchmark JSON to compare the stage timings with')
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_args()
+    generator = load_script('generate_synthetic_results', 'generate-synthetic-results.py')
+    analyzer = load_script('analyze_results', 'analyze-results.py')
+
+    runs = []
+    for points in [int(size) for size in args.sizes.split(',')]:
+        results_dir = os.path.join(args.data_dir, f'points-{points}-pods-{args.max_replicas}-seed-{args.seed}')
+        if not os.path.exists(os.path.join(results_dir, 'k6-results.json')):
+            logger.info(f"Generating {points} points in {results_dir}")
+            generator.generate_results(results_dir, points, args.peak_vus, max_replicas=args.max_replicas,
+                                       seed=args.seed)
+
+        logger.info(f"Benchmarking {results_dir}")
+        runs.append({
+            'points': points,
+            'pods': args.max_replicas,
+            'k6_bytes': os.path.getsize(os.path.join(results_dir, 'k6-results.json')),
+            'stages': benchmark_run(analyzer, results_dir, args.workers)
+        })
+        gc.collect()
+
+    benchmark = {
+        'commit': git_commit(),
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'workers': args.workers,
+        'runs': runs
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    with open(args.output, 'w') as f:
+        json.dump(benchmark, f, indent=2)
+    logger.info(f"Benchmark results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            compare_benchmarks(json.load(f), benchmark)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import importlib.util
+from datetime import datetime
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def load_script(name, filename):
+    """Import one of the hyphen-named scripts next to this file as a module"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SCRIPT_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+async def run_concurrently(items, connections, send):
+    """Call send(item) for every item with at most `connections` calls in flight"""
+    remaining = iter(items)
+    results = []
+
+    async def worker():
+        for item in remaining:
+            results.append(await send(item))
+
+    await asyncio.gather(*(worker() for _ in range(connections)))
+    return results
+
+def ndjson(content):
+    return [json.loads(line) for line in content.decode().splitlines() if line]
+
+async def shorten_single(pool, urls, connections):
+    async def send(url):
+        status, _, content, _, _ = await pool.request('POST', '/shorten', {'url': url})
+        return status, json.loads(content).get('shortened_url')
+    return await run_concurrently(urls, connections, send)
+
+async def shorten_batches(pool, urls, batch_size, connections):
+    async def send(batch):
+        status, _, content, _, _ = await pool.request('POST', '/shorten/batch', {'urls': batch})
+        if status != 200:
+            raise RuntimeError(f"/shorten/batch answered {status}: {content[:200]!r}")
+        return [(line['status'], line.get('shortened_url')) for line in ndjson(content)]
+    batches = [urls[i:i + batch_size] for i in range(0, len(urls), batch_size)]
+    return [result for batch in await run_concurrently(batches, connections, send) for result in batch]
+
+async def resolve_single(pool, ids, connections):
+    async def send(short_id):
+        status, _, _, _, _ = await pool.request('GET', f'/{short_id}')
+        return status
+    return await run_concurrently(ids, connections, send)
+
+async def resolve_batches(pool, ids, batch_size, connections):
+    async def send(batch):
+        status, _, content, _, _ = await pool.request('POST', '/resolve/batch', {'ids': batch})
+        if status != 200:
+            raise RuntimeError(f"/resolve/batch answered {status}: {content[:200]!r}")
+        return [line['status'] for line in ndjson(content)]
+    batches = [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)]
+    return [status for batch in await run_concurrently(batches, connections, send) for status in batch]
+
+def short_ids(results):
+    return [url.rsplit('/', 1)[-1] for status, url in results if status in (200, 201) and url]
+
+def phase_summary(name, count, elapsed, statuses):
+    counts = {}
+    for status in statuses:
+        counts[str(status)] = counts.get(str(status), 0) + 1
+    summary = {'phase': name, 'items': count, 'elapsed_s': round(elapsed, 3),
+               'items_per_sec': round(count / elapsed, 1), 'statuses': counts}
+    logger.info(f"{name}: {count} items in {elapsed:.2f}s = {summary['items_per_sec']:.1f}/s, statuses {counts}")
+    return summary
+
+async def run_benchmark(args):
+    load_generator = load_script('load_generator', 'load-generator.py')
+    pool = load_generator.HttpConnectionPool(args.base_url, args.connections)
+    token = f'{random.Random(args.seed).getrandbits(32):08x}'
+    single_urls = [f'{args.url_prefix}{token}/single/{i}' for i in range(args.urls)]
+    batch_urls = [f'{args.url_prefix}{token}/batch/{i}' for i in range(args.urls)]
+    phases = []
+    try:
+        start = time.perf_counter()
+        single = await shorten_single(pool, single_urls, args.connections)
+        phases.append(phase_summary('shorten single', len(single_urls), time.perf_counter() - start,
+                                    [status for status, _ in single]))
+
+        start = time.perf_counter()
+        batched = await shorten_batches(pool, batch_urls, args.batch_size, args.connections)
+        phases.append(phase_summary(f'shorten batch of {args.batch_size}', len(batch_urls),
+                                    time.perf_counter() - start, [status for status, _ in batched]))
+
+        ids = short_ids(single) + short_ids(batched)
+        random.Random(args.seed).shuffle(ids)
+        ids = ids[:args.urls]
+        start = time.perf_counter()
+        statuses = await resolve_single(pool, ids, args.connections)
+        phases.append(phase_summary('resolve single', len(ids), time.perf_counter() - start, statuses))
+
+        start = time.perf_counter()
+        statuses = await resolve_batches(pool, ids, args.batch_size, args.connections)
+        phases.append(phase_summary(f'resolve batch of {args.batch_size}', len(ids), time.perf_counter() - start,
+                                    statuses))
+    finally:
+        await pool.close()
+
+    for single_phase, batch_phase in ((phases[0], phases[1]), (phases[2], phases[3])):
+        logger.info(f"{batch_phase['phase']}: {batch_phase['items_per_sec'] / single_phase['items_per_sec']:.1f}x "
+                    f"the items/sec of {single_phase['phase']}")
+    return phases
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Compare URLs/sec of the batch endpoints with one request per URL')
+    parser.add_argument('--base-url', default='http://127.0.0.1', help='shortener base URL')
+    parser.add_argument('--urls', type=int, default=10000, help='URLs shortened (and ids resolved) per phase')
+    parser.add_argument('--batch-size', type=int, default=1000, help='URLs or ids per batch request')
+    parser.add_argument('--connections', type=int, default=16, help='keep-alive connections used in every phase')
+    parser.add_argument('--url-prefix', default='https://example.com/catalogue/',
+                        help='prefix of the generated URLs; each run adds a random token so URLs are new')
+    parser.add_argument('--seed', type=int, help='seed for the run token and the resolve order')
+    parser.add_argument('--output', help='JSON file the phase results are written to')
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_args()
+    logger.info(f"Benchmarking {args.base_url} with {args.urls} URLs per phase over {args.connections} connections")
+    phases = asyncio.run(run_benchmark(args))
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'base_url': args.base_url,
+                'batch_size': args.batch_size,
+                'connections': args.connections,
+                'phases': phases
+            }, f, indent=2)
+        logger.info(f"Benchmark written to {args.output}")
+
+if __name__ == "__main__":
+    main()
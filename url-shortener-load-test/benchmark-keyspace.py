@@ -0,0 +1,254 @@
+import os
+import sys
+import json
+import time
+import base64
+import random
+import asyncio
+import hashlib
+import argparse
+import platform
+import importlib.util
+from datetime import datetime
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+BASE62 = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+NANOID_ALPHABET = 'useandom-26T198340PX75pxJACKVERYMINDBUSHWOLF_GQZbfghjklqvwyzrict'
+RESERVED_IDS = {'health', 'metrics'}
+WRITE_CHUNK = 10000
+ENCODING_SAMPLE = 200
+
+def load_script(name, filename):
+    """Import one of the hyphen-named scripts next to this file as a module"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SCRIPT_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def encode_base62(n):
+    digits = ''
+    while True:
+        digits = BASE62[n % 62] + digits
+        n //= 62
+        if n == 0:
+            return digits
+
+def generate_urls(count, url_length, seed):
+    """Distinct URLs padded with a deterministic slug to roughly url_length characters"""
+    rng = random.Random(seed)
+    slug = ''.join(rng.choice('abcdefghijklmnopqrstuvwxyz-') for _ in range(max(url_length, 64)))
+    for i in range(count):
+        prefix = f'https://www.example.com/catalogue/{i % 97}/{i:010d}/'
+        yield prefix + slug[:max(url_length - len(prefix), 0)]
+
+class RespPipeline:
+    """One Redis connection that sends commands in large pipelined writes"""
+    def __init__(self, host, port, password, read_reply):
+        self.host = host
+        self.port = port
+        self.password = password
+        self.read_reply = read_reply
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            await self.execute([('AUTH', self.password)])
+
+    async def execute(self, commands):
+        """Send every command at once and return their replies in order"""
+        payload = []
+        for command in commands:
+            payload.append(b'*%d\r\n' % len(command))
+            for part in command:
+                part = part if isinstance(part, bytes) else str(part).encode()
+                payload.append(b'$%d\r\n%s\r\n' % (len(part), part))
+        self.writer.write(b''.join(payload))
+        await self.writer.drain()
+        return [await self.read_reply(self.reader) for _ in commands]
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+            await self.writer.wait_closed()
+
+def legacy_commands(urls, rng):
+    """`short:<id>` -> URL and `long:<url>` -> id for random 12-character ids, as LegacyKeyspace writes them"""
+    command = ['MSET']
+    for url in urls:
+        short_id = ''.join(rng.choice(NANOID_ALPHABET) for _ in range(12))
+        command += [f'short:{short_id}', url, f'long:{url}', short_id]
+    return [command]
+
+def compact_commands(urls, numbers, bucket_size, digest_bits):
+    """Bucketed hashes keyed as CompactKeyspace writes them, one HSET per bucket"""
+    buckets = {}
+    for url, n in zip(urls, numbers):
+        short_id = encode_base62(n)
+        buckets.setdefault(f'shorts:{encode_base62(n // bucket_size)}', []).extend([str(n % bucket_size), url])
+        digest = hashlib.sha256(url.encode()).digest()
+        bucket = int.from_bytes(digest[:4], 'big') >> (32 - digest_bits)
+        field = base64.urlsafe_b64encode(digest[4:16]).rstrip(b'=').decode()
+        buckets.setdefault(f'longs:{encode_base62(bucket)}', []).extend([field, short_id])
+    return [['HSET', key, *fields] for key, fields in buckets.items()]
+
+def compact_numbers(count):
+    """Counter values in allocation order, skipping ids that collide with other routes"""
+    n = 0
+    while count:
+        n += 1
+        if encode_base62(n) not in RESERVED_IDS:
+            count -= 1
+            yield n
+
+async def used_memory(redis):
+    info = (await redis.execute([('INFO', 'memory')]))[0]
+    for line in info.splitlines():
+        if line.startswith('used_memory:'):
+            return int(line.split(':', 1)[1])
+    raise RuntimeError('INFO memory did not report used_memory')
+
+async def sample_encodings(redis, prefix, scanned=ENCODING_SAMPLE):
+    """Count OBJECT ENCODING results over a sample of the layout's keys"""
+    keys = []
+    cursor = '0'
+    while len(keys) < scanned:
+        cursor, batch = (await redis.execute([('SCAN', cursor, 'MATCH', f'{prefix}*', 'COUNT', 1000)]))[0]
+        keys += batch
+        if cursor == '0':
+            break
+    encodings = {}
+    for encoding in await redis.execute([('OBJECT', 'ENCODING', key) for key in keys[:scanned]]):
+        encodings[encoding] = encodings.get(encoding, 0) + 1
+    return encodings
+
+async def measure_layout(redis, layout, links, args):
+    """Write `links` mappings into an empty database and report the memory they take"""
+    await redis.execute([('FLUSHDB',)])
+    baseline = await used_memory(redis)
+    rng = random.Random(args.seed)
+    urls = generate_urls(links, args.url_length, args.seed)
+    numbers = compact_numbers(links)
+    if layout == 'compact':
+        layout_json = json.dumps({'bucketSize': args.bucket_size, 'digestBucketBits': args.digest_bucket_bits},
+                                 separators=(',', ':'))
+        await redis.execute([('SET', 'keyspace:layout', layout_json), ('SET', 'ids:next', links)])
+
+    start = time.perf_counter()
+    written = 0
+    while written < links:
+        chunk = [next(urls) for _ in range(min(WRITE_CHUNK, links - written))]
+        if layout == 'legacy':
+            commands = legacy_commands(chunk, rng)
+        else:
+            commands = compact_commands(chunk, [next(numbers) for _ in chunk], args.bucket_size,
+                                        args.digest_bucket_bits)
+        await redis.execute(commands)
+        written += len(chunk)
+        if written % (WRITE_CHUNK * 100) == 0:
+            logger.info(f"{layout}: {written}/{links} mappings written")
+    elapsed = time.perf_counter() - start
+
+    used = await used_memory(redis) - baseline
+    keys = (await redis.execute([('DBSIZE',)]))[0]
+    result = {
+        'layout': layout,
+        'links': links,
+        'keys': keys,
+        'used_memory_bytes': used,
+        'bytes_per_mapping': round(used / links, 1),
+        'write_seconds': round(elapsed, 1)
+    }
+    if layout == 'compact':
+        result['encodings'] = {
+            'shorts': await sample_encodings(redis, 'shorts:'),
+            'longs': await sample_encodings(redis, 'longs:')
+        }
+    logger.info(f"{layout} with {links} links: {used / 2**20:.1f} MiB, {result['bytes_per_mapping']} bytes per mapping")
+    return result
+
+async def check_listpack_limits(redis, url_length):
+    """Warn when URLs are too long for the server's listpack value limit"""
+    try:
+        reply = (await redis.execute([('CONFIG', 'GET', 'hash-max-*-value')]))[0]
+    except RuntimeError as e:
+        logger.warning(f"Could not read the hash encoding limits: {str(e)}")
+        return {}
+    limits = dict(zip(reply[::2], reply[1::2]))
+    value_limit = int(limits.get('hash-max-listpack-value', limits.get('hash-max-ziplist-value', 0)))
+    if value_limit and url_length > value_limit:
+        logger.warning(f"URLs of {url_length} bytes exceed hash-max-listpack-value {value_limit}; "
+                       f"compact buckets will use the hashtable encoding")
+    return limits
+
+async def run_benchmark(args):
+    benchmark_server = load_script('benchmark_server', 'benchmark-server.py')
+    redis = RespPipeline(args.redis_host, args.redis_port, args.redis_password, benchmark_server.read_reply)
+    await redis.connect()
+    try:
+        keys = (await redis.execute([('DBSIZE',)]))[0]
+        if keys and not args.flush_redis:
+            raise SystemExit(f"Database holds {keys} keys; pass --flush-redis to let the benchmark empty it")
+        limits = await check_listpack_limits(redis, args.url_length)
+        results = []
+        for links in args.links:
+            for layout in args.layouts:
+                results.append(await measure_layout(redis, layout, links, args))
+        await redis.execute([('FLUSHDB',)])
+        return limits, results
+    finally:
+        await redis.close()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Measure Redis memory per short link for each keyspace layout')
+    parser.add_argument('--links', type=int, nargs='+', default=[1000000, 10000000],
+                        help='numbers of mappings to measure')
+    parser.add_argument('--layouts', nargs='+', choices=['legacy', 'compact'], default=['legacy', 'compact'],
+                        help='layouts to measure')
+    parser.add_argument('--url-length', type=int, default=80, help='length of the generated URLs')
+    parser.add_argument('--bucket-size', type=int, default=100, help='ids per shorts:<bucket> hash')
+    parser.add_argument('--digest-bucket-bits', type=int, default=20,
+                        help='the reverse index has 2^bits longs:<bucket> hashes')
+    parser.add_argument('--seed', type=int, default=1, help='seed for the URLs and legacy ids')
+    parser.add_argument('--redis-host', default='127.0.0.1', help='Redis host')
+    parser.add_argument('--redis-port', type=int, default=6379, help='Redis port')
+    parser.add_argument('--redis-password', default=os.environ.get('REDIS_PASSWORD', ''),
+                        help='Redis password')
+    parser.add_argument('--flush-redis', action='store_true',
+                        help='allow FLUSHDB on a database that already holds keys')
+    parser.add_argument('--output', help='JSON file the results are written to')
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_args()
+    limits, results = asyncio.run(run_benchmark(args))
+    for links in args.links:
+        row = {r['layout']: r['bytes_per_mapping'] for r in results if r['links'] == links}
+        if 'legacy' in row and 'compact' in row:
+            logger.info(f"{links} links: legacy {row['legacy']} B, compact {row['compact']} B per mapping "
+                        f"({row['compact'] / row['legacy']:.0%} of legacy)")
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump({
+                'created': datetime.now().isoformat(timespec='seconds'),
+                'platform': platform.platform(),
+                'url_length': args.url_length,
+                'bucket_size': args.bucket_size,
+                'digest_bucket_bits': args.digest_bucket_bits,
+                'hash_limits': limits,
+                'results': results
+            }, f, indent=2)
+        logger.info(f"Benchmark written to {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,234 @@
+import os
+import sys
+import json
+import time
+import shlex
+import asyncio
+import argparse
+import platform
+import subprocess
+import importlib.util
+from datetime import datetime
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(SCRIPT_DIR)
+DEFAULT_LOAD_ARGS = '--profile read-heavy --rate 200 --duration 30 --schedule constant --seed 1'
+SERVER_READY_TIMEOUT = 30.0
+SERVER_STOP_TIMEOUT = 15.0
+
+def load_script(name, filename):
+    """Import one of the hyphen-named scripts next to this file as a module"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SCRIPT_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+def parse_variant(value):
+    """Parse 'label:NAME=VALUE,NAME=VALUE' into (label, environment overrides)"""
+    label, _, assignments = value.partition(':')
+    env = {}
+    for assignment in filter(None, assignments.split(',')):
+        name, sep, setting = assignment.partition('=')
+        if not sep:
+            raise argparse.ArgumentTypeError(f"expected NAME=VALUE, got '{assignment}'")
+        env[name.strip()] = setting.strip()
+    if not label:
+        raise argparse.ArgumentTypeError('a variant needs a label')
+    return label, env
+
+async def redis_command(host, port, password, *args):
+    """Send one command over RESP and return its decoded reply"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        commands = ([('AUTH', password)] if password else []) + [args]
+        for command in commands:
+            writer.write(f'*{len(command)}\r\n'.encode() + b''.join(
+                f'${len(str(part).encode())}\r\n{part}\r\n'.encode() for part in command))
+        await writer.drain()
+        reply = None
+        for _ in commands:
+            reply = await read_reply(reader)
+        return reply
+    finally:
+        writer.close()
+
+async def read_reply(reader):
+    line = (await reader.readline()).decode().rstrip('\r\n')
+    kind, rest = line[:1], line[1:]
+    if kind == '+':
+        return rest
+    if kind == '-':
+        raise RuntimeError(f"Redis error: {rest}")
+    if kind == ':':
+        return int(rest)
+    if kind == '$':
+        return None if rest == '-1' else (await reader.readexactly(int(rest) + 2))[:-2].decode()
+    if kind == '*':
+        return None if rest == '-1' else [await read_reply(reader) for _ in range(int(rest))]
+    raise RuntimeError(f"Unexpected Redis reply: {line!r}")
+
+async def redis_info(host, port, password):
+    """INFO fields as a flat dict with numbers converted"""
+    info = {}
+    for line in (await redis_command(host, port, password, 'INFO')).splitlines():
+        name, sep, value = line.partition(':')
+        if sep and not line.startswith('#'):
+            try:
+                info[name] = float(value) if '.' in value else int(value)
+            except ValueError:
+                info[name] = value
+    return info
+
+async def fetch_health(pool):
+    try:
+        status, _, content, _, _ = await pool.request('GET', '/health')
+    except ConnectionError:
+        # The server closes keep-alive connections left idle during a long run
+        status, _, content, _, _ = await pool.request('GET', '/health')
+    return json.loads(content) if status == 200 else None
+
+async def wait_until_ready(pool, process, timeout=SERVER_READY_TIMEOUT):
+    """Poll /health until the server reports a connected Redis"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode} before it was ready")
+        try:
+            health = await fetch_health(pool)
+            if health and health.get('redis') == 'connected':
+                return health
+        except (OSError, ValueError, asyncio.IncompleteReadError):
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server was not ready after {timeout:.0f}s")
+
+def start_server(args, port, env_overrides, log_path):
+    env = dict(os.environ, PORT=str(port), BASE_URL=f'http://127.0.0.1:{port}', REDIS_HOST=args.redis_host,
+               REDIS_PORT=str(args.redis_port), REDIS_PASSWORD=args.redis_password, **env_overrides)
+    log = open(log_path, 'w')
+    process = subprocess.Popen(args.server_command, cwd=REPO_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+    process.log = log
+    return process
+
+def stop_server(process):
+    """SIGTERM the server so it shuts down the way Kubernetes stops a pod"""
+    process.terminate()
+    try:
+        process.wait(SERVER_STOP_TIMEOUT)
+    except subprocess.TimeoutExpired:
+        logger.warning("Server did not exit after SIGTERM, killing it")
+        process.kill()
+        process.wait()
+    process.log.close()
+
+async def run_variant(label, env_overrides, args, load_generator, port):
+    """Benchmark one server configuration: returns per-route latency, Redis ops/sec and the final /health"""
+    results_dir = os.path.join(args.output_dir, label)
+    os.makedirs(results_dir, exist_ok=True)
+    if args.flush_redis:
+        await redis_command(args.redis_host, args.redis_port, args.redis_password, 'FLUSHDB')
+
+    process = start_server(args, port, env_overrides, os.path.join(results_dir, 'server.log'))
+    pool = load_generator.HttpConnectionPool(f'http://127.0.0.1:{port}', 1)
+    try:
+        await wait_until_ready(pool, process)
+        load_args = load_generator.parse_args(shlex.split(args.load_args) + ['--base-url', f'http://127.0.0.1:{port}'])
+        snapshot = {}
+
+        async def before_run():
+            snapshot['info'] = await redis_info(args.redis_host, args.redis_port, args.redis_password)
+            snapshot['started'] = time.perf_counter()
+
+        test = await load_generator.run_load_test(load_args, results_dir, before_run)
+        elapsed = time.perf_counter() - snapshot['started']
+        info = await redis_info(args.redis_host, args.redis_port, args.redis_password)
+        health = await fetch_health(pool)
+    finally:
+        await pool.close()
+        stop_server(process)
+
+    commands = info['total_commands_processed'] - snapshot['info']['total_commands_processed']
+    routes = {}
+    for kind, latency in test.latency.items():
+        service = test.service.get(kind)
+        routes[kind] = {
+            'requests': test.counts[kind],
+            'failed': test.failures[kind],
+            'requests_per_sec': round(test.counts[kind] / elapsed, 2),
+            'p50_ms': round(latency.quantile(0.5), 3),
+            'p99_ms': round(latency.quantile(0.99), 3),
+            'service_p99_ms': round(service.quantile(0.99), 3) if service else None
+        }
+    return {
+        'label': label,
+        'env': env_overrides,
+        'elapsed_s': round(elapsed, 3),
+        'redis_commands': commands,
+        'redis_ops_per_sec': round(commands / elapsed, 2),
+        'redis_used_memory': info.get('used_memory'),
+        'routes': routes,
+        'health': health
+    }
+
+def log_variants(variants):
+    for variant in variants:
+        logger.info(f"{variant['label']}: {variant['redis_ops_per_sec']:.1f} Redis ops/s")
+        for kind, route in variant['routes'].items():
+            logger.info(f"  {kind}: {route['requests_per_sec']:.1f} req/s, p50 {route['p50_ms']:.2f} / "
+                        f"p99 {route['p99_ms']:.2f} ms, {route['failed']} failed")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description='Benchmark the shortener service under different environment settings against a real Redis')
+    parser.add_argument('--variant', dest='variants', action='append', type=parse_variant, required=True,
+                        help="server configuration as 'label:NAME=VALUE,...', e.g. "
+                             "'no-cache:REDIRECT_CACHE_SIZE=0' (repeat to compare several)")
+    parser.add_argument('--load-args', default=DEFAULT_LOAD_ARGS,
+                        help='load-generator.py options for every variant (--base-url is set by the benchmark)')
+    parser.add_argument('--server-command', type=shlex.split, default=['node', 'index.js'],
+                        help='command starting the service in the repository root')
+    parser.add_argument('--port', type=int, default=5100, help='port the service is started on')
+    parser.add_argument('--redis-host', default='127.0.0.1', help='Redis host used by the service')
+    parser.add_argument('--redis-port', type=int, default=6379, help='Redis port used by the service')
+    parser.add_argument('--redis-password', default=os.environ.get('REDIS_PASSWORD', 'password'),
+                        help='Redis password used by the service')
+    parser.add_argument('--flush-redis', action='store_true',
+                        help='FLUSHDB before each variant so every variant starts from an empty keyspace')
+    parser.add_argument('--output-dir', default=os.path.join('results', 'benchmark-server'),
+                        help='directory for per-variant k6 results, server logs and benchmark.json')
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_args()
+    load_generator = load_script('load_generator', 'load-generator.py')
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    variants = []
+    for label, env_overrides in args.variants:
+        logger.info(f"Benchmarking {label} ({', '.join(f'{k}={v}' for k, v in env_overrides.items()) or 'defaults'})")
+        variants.append(asyncio.run(run_variant(label, env_overrides, args, load_generator, args.port)))
+
+    benchmark = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'platform': platform.platform(),
+        'load_args': args.load_args,
+        'variants': variants
+    }
+    output = os.path.join(args.output_dir, 'benchmark.json')
+    with open(output, 'w') as f:
+        json.dump(benchmark, f, indent=2)
+    log_variants(variants)
+    logger.info(f"Benchmark written to {output}")
+    logger.info(f"Compare the runs with: python analyze-results.py --compare "
+                f"{' '.join(os.path.join(args.output_dir, label) for label, _ in args.variants)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+import os
+import json
+import argparse
+import numpy as np
+from datetime import datetime, timedelta, timezone
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+# Stage profile of load-test-script.js as (seconds, target VUs as a fraction of the peak)
+LOAD_STAGES = [(30, 0.1), (60, 0.5), (120, 0.5), (60, 1.0), (120, 1.0), (60, 0.5), (30, 0.0)]
+BASE_URL = 'http://127.0.0.1'
+ENDPOINTS = ['/shorten', '/:shortenedId', '/health']
+ENDPOINT_METHODS = ['POST', 'GET', 'GET']
+ENDPOINT_STATUS = [('201', '500'), ('302', '404'), ('200', '503')]
+ENDPOINT_MEDIAN_MS = [12.0, 6.0, 4.0]
+ENDPOINT_BYTES = [(180, 120), (120, 260), (110, 150)]
+LATENCY_SIGMA = 0.6
+THINK_SECONDS = (1.0, 0.5, 2.0)
+REQUEST_METRICS = ['http_reqs', 'http_req_duration', 'http_req_blocked', 'http_req_connecting',
+                   'http_req_tls_handshaking', 'http_req_sending', 'http_req_waiting', 'http_req_receiving',
+                   'http_req_failed', 'data_sent', 'data_received']
+CHECKS = [
+    ('Create status is 201 or 200', 0), ('Create response has shortened_url', 0),
+    ('Access status is 302 or 404', 1), ('Access status is 200 or 201', 1),
+    ('Health status is 200', 2), ('Health reports as healthy', 2)
+]
+POINTS_PER_ITERATION = len(ENDPOINTS) * len(REQUEST_METRICS) + len(CHECKS) + 2
+METRIC_TYPES = {
+    'http_reqs': 'counter', 'http_req_failed': 'rate', 'data_sent': 'counter', 'data_received': 'counter',
+    'checks': 'rate', 'iterations': 'counter', 'iteration_duration': 'trend', 'vus': 'gauge', 'vus_max': 'gauge'
+}
+
+REPLICA_CAPACITY_RPS = 60.0
+TARGET_CPU_UTILIZATION = 70
+POD_CPU_LIMIT_MILLICORES = 200
+POD_READY_SECONDS = 30
+HPA_SYNC_SECONDS = 15
+HPA_SCALE_DOWN_WINDOW = 300
+SHORT_ID_POOL = 4096
+SLICE_SECONDS = 30
+
+def vu_profile(duration, peak_vus):
+    """VUs for every second of a run following the load test stages stretched to duration"""
+    scale = duration / sum(seconds for seconds, _ in LOAD_STAGES)
+    edges = np.cumsum([0] + [seconds * scale for seconds, _ in LOAD_STAGES])
+    targets = [0.0] + [target * peak_vus for _, target in LOAD_STAGES]
+    return np.interp(np.arange(int(np.ceil(duration))), edges, targets)
+
+def iteration_seconds():
+    """Mean wall time of one iteration of the load test script"""
+    return sum(ENDPOINT_MEDIAN_MS) / 1000 + THINK_SECONDS[0] + sum(THINK_SECONDS[1:]) / 2
+
+def run_duration(points, peak_vus):
+    """Seconds needed for the stage profile to emit about the requested number of points"""
+    mean_vus = vu_profile(sum(seconds for seconds, _ in LOAD_STAGES), peak_vus).mean()
+    points_per_second = mean_vus / iteration_seconds() * POINTS_PER_ITERATION + 2
+    return max(len(LOAD_STAGES), points / points_per_second)
+
+def simulate_cluster(vus, min_replicas, max_replicas):
+    """Per-second request rate, replica count, CPU utilization and desired replicas of the HPA-managed deployment"""
+    rps = vus / iteration_seconds() * len(ENDPOINTS)
+    replicas = np.empty(len(vus), dtype=np.int64)
+    desired = np.empty(len(vus), dtype=np.int64)
+    utilization = np.empty(len(vus))
+    current = target = min_replicas
+    pending = []
+    recommendations = []
+
+    for second, load in enumerate(rps):
+        while pending and pending[0][0] <= second:
+            current = max(current, pending.pop(0)[1])
+        utilization[second] = load / (current * REPLICA_CAPACITY_RPS) * 100
+        if second % HPA_SYNC_SECONDS == 0:
+            recommendation = int(np.ceil(current * utilization[second] / TARGET_CPU_UTILIZATION))
+            recommendations.append((second, min(max(recommendation, min_replicas), max_replicas)))
+            recommendations = [(at, value) for at, value in recommendations if second - at < HPA_SCALE_DOWN_WINDOW]
+            target = max(value for _, value in recommendations)
+            if target > current and not any(value >= target for _, value in pending):
+                pending.append((second + POD_READY_SECONDS, target))
+            elif target < current:
+                current = target
+                pending = [(at, value) for at, value in pending if value <= target]
+        replicas[second] = current
+        desired[second] = target
+    return rps, replicas, utilization, desired
+
+class PointWriter:
+    """Formats k6 JSON output lines from column arrays, one time slice at a time"""
+
+    def __init__(self, f, start, utc_offset):
+        self.f = f
+        self.start_ns = int(start.timestamp() * 10**9)
+        self.offset_ns = int(utc_offset.total_seconds() * 10**9)
+        sign = '-' if utc_offset < timedelta(0) else '+'
+        minutes = int(abs(utc_offset.total_seconds()) // 60)
+        self.offset_suffix = f'{sign}{minutes // 60:02d}:{minutes % 60:02d}'
+
+    def write_metrics(self, names):
+        for name in names:
+            metric_type = METRIC_TYPES.get(name, 'trend')
+            contains = 'data' if name.startswith('data_') else 'time' if metric_type == 'trend' else 'default'
+            self.f.write(json.dumps({
+                'type': 'Metric',
+                'data': {'name': name, 'type': metric_type, 'contains': contains, 'thresholds': [], 'submetrics': None},
+                'metric': name
+            }, separators=(',', ':')) + '\n')
+
+    def time_strings(self, seconds):
+        """RFC 3339 local times with microseconds, as k6 writes them"""
+        ns = self.start_ns + self.offset_ns + np.round(seconds * 10**9).astype(np.int64)
+        return np.char.add(np.datetime_as_string(ns.astype('datetime64[ns]'), unit='us'), self.offset_suffix)
+
+    def write_points(self, seconds, metrics, values, tags):
+        """Write points sorted by time; metrics and tags are indexes into lists of names and tag JSON strings"""
+        order = np.argsort(seconds, kind='stable')
+        times = self.time_strings(seconds[order])
+        values = np.round(values[order], 6).astype(str)
+        names = metrics[1]
+        tag_strings = tags[1]
+        lines = [
+            f'{{"type":"Point","data":{{"time":"{time}","value":{value},"tags":{tag_strings[tag]}}},"metric":"{names[metric]}"}}\n'
+            for time, metric, value, tag in zip(times.tolist(), metrics[0][order].tolist(), values.tolist(),
+                                                tags[0][order].tolist())
+        ]
+        self.f.write(''.join(lines))
+        return len(lines)
+
+def tag_json(tags):
+    return json.dumps(tags, separators=(',', ':'), sort_keys=True)
+
+def request_tags(short_ids):
+    """Tag JSON for every (endpoint, outcome) pair and every short id a redirect can hit"""
+    tags = []
+    for endpoint, method, statuses in zip(ENDPOINTS, ENDPOINT_METHODS, ENDPOINT_STATUS):
+        for failed, status in enumerate(statuses):
+            ids = short_ids if endpoint == '/:shortenedId' else [endpoint.lstrip('/')]
+            for short_id in ids:
+                tags.append(tag_json({
+                    'expected_response': 'false' if failed else 'true', 'group': '', 'method': method,
+                    'name': endpoint, 'proto': 'HTTP/1.1', 'scenario': 'default', 'status': status,
+                    'url': f'{BASE_URL}/{short_id}'
+                }))
+    return tags
+
+def generate_k6_results(path, start, utc_offset, vus, rps, replicas, rng):
+    """Write k6-results.json for a run whose latency and errors follow per-second cluster utilization"""
+    short_ids = [''.join(rng.choice(list('ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789'), 12))
+                 for _ in range(SHORT_ID_POOL)]
+    tags = request_tags(short_ids)
+    # Index of the first tag of each (endpoint, failed) block in request_tags order
+    blocks = np.cumsum([0] + [SHORT_ID_POOL if endpoint == '/:shortenedId' else 1
+                              for endpoint in ENDPOINTS for _ in range(2)])
+    check_tags = [tag_json({'check': name, 'group': '', 'scenario': 'default'}) for name, _ in CHECKS]
+    iteration_tag = tag_json({'group': '', 'scenario': 'default'})
+    tags = tags + check_tags + [iteration_tag]
+    check_tag_base = len(tags) - len(check_tags) - 1
+    iteration_tag_index = len(tags) - 1
+
+    metric_names = REQUEST_METRICS + ['checks', 'iterations', 'iteration_duration', 'vus', 'vus_max']
+    metric_index = {name: i for i, name in enumerate(metric_names)}
+    load = rps / (np.maximum(replicas, 1) * REPLICA_CAPACITY_RPS)
+    queueing = 1 / (1 - np.minimum(load, 0.95))
+    error_rate = np.minimum(0.001 + np.maximum(load - 1, 0) * 0.5, 0.5)
+    peak_vus = max(int(np.ceil(vus.max())), 1)
+
+    total = 0
+    with open(path, 'w') as f:
+        writer = PointWriter(f, start, utc_offset)
+        writer.write_metrics(metric_names)
+        for slice_start in range(0, len(vus), SLICE_SECONDS):
+            seconds = np.arange(slice_start, min(slice_start + SLICE_SECONDS, len(vus)))
+            counts = rng.poisson(vus[seconds] / iteration_seconds())
+            n = int(counts.sum())
+            begin = np.repeat(seconds, counts) + rng.random(n)
+            second = np.repeat(seconds, counts)
+
+            failed = rng.random((n, len(ENDPOINTS))) < error_rate[second][:, None]
+            failed[:, 1] |= failed[:, 0]
+            duration = (np.array(ENDPOINT_MEDIAN_MS) * rng.lognormal(0, LATENCY_SIGMA, (n, len(ENDPOINTS)))
+                        * queueing[second][:, None])
+            think = rng.uniform(*THINK_SECONDS[1:], n)
+            ends = np.empty((n, len(ENDPOINTS)))
+            ends[:, 0] = begin + duration[:, 0] / 1000
+            ends[:, 1] = ends[:, 0] + THINK_SECONDS[0] + duration[:, 1] / 1000
+            ends[:, 2] = ends[:, 1] + duration[:, 2] / 1000
+            iteration_end = ends[:, 2] + think
+
+            blocked = np.where(rng.random((n, len(ENDPOINTS))) < 0.02, rng.uniform(0.5, 3, (n, len(ENDPOINTS))), 0)
+            sending = rng.uniform(0.005, 0.05, (n, len(ENDPOINTS)))
+            receiving = rng.uniform(0.02, 0.2, (n, len(ENDPOINTS)))
+            sent = np.broadcast_to([sent for sent, _ in ENDPOINT_BYTES], (n, len(ENDPOINTS)))
+            received = np.broadcast_to([received for _, received in ENDPOINT_BYTES], (n, len(ENDPOINTS)))
+            request_values = np.stack([
+                np.ones((n, len(ENDPOINTS))), duration, blocked, blocked * 0.5, np.zeros((n, len(ENDPOINTS))),
+                sending, np.maximum(duration - sending - receiving, 0), receiving, failed.astype(float), sent, received
+            ], axis=-1)
+
+            request_tag = np.empty((n, len(ENDPOINTS)), dtype=np.int64)
+            for j in range(len(ENDPOINTS)):
+                block = blocks[2 * j] + failed[:, j] * (blocks[2 * j + 1] - blocks[2 * j])
+                request_tag[:, j] = block + (rng.integers(0, SHORT_ID_POOL, n) if ENDPOINTS[j] == '/:shortenedId' else 0)
+
+            check_values = np.stack([~failed[:, endpoint] for _, endpoint in CHECKS], axis=-1).astype(float)
+
+            point_seconds = np.concatenate([
+                np.repeat(ends.ravel(), len(REQUEST_METRICS)),
+                ends[:, [endpoint for _, endpoint in CHECKS]].ravel(),
+                iteration_end, iteration_end,
+                np.repeat(seconds + 0.999, 2)
+            ])
+            point_metrics = np.concatenate([
+                np.tile(np.arange(len(REQUEST_METRICS)), n * len(ENDPOINTS)),
+                np.full(n * len(CHECKS), metric_index['checks']),
+                np.full(n, metric_index['iterations']), np.full(n, metric_index['iteration_duration']),
+                np.tile([metric_index['vus'], metric_index['vus_max']], len(seconds))
+            ])
+            point_values = np.concatenate([
+                request_values.ravel(), check_values.ravel(), np.ones(n), (iteration_end - begin) * 1000,
+                np.column_stack([np.round(vus[seconds]), np.full(len(seconds), peak_vus)]).ravel()
+            ])
+            point_tags = np.concatenate([
+                np.repeat(request_tag.ravel(), len(REQUEST_METRICS)),
+                np.tile(check_tag_base + np.arange(len(CHECKS)), n),
+                np.full(2 * n, iteration_tag_index), np.full(2 * len(seconds), iteration_tag_index)
+            ])
+            total += writer.write_points(point_seconds, (point_metrics, metric_names), point_values, (point_tags, tags))
+
+    logger.info(f"Wrote {total} k6 points to {path}")
+    return total
+
+def generate_metrics_csvs(metrics_dir, start, utilization, replicas, desired, min_replicas, max_replicas,
+                          extra_pods, interval, rng):
+    """Write podmetrics.csv, hpametrics.csv and healthmetrics.csv sampled every interval seconds"""
+    os.makedirs(metrics_dir, exist_ok=True)
+    samples = np.arange(0, len(replicas), interval)
+    stamps = [(start + timedelta(seconds=int(second))).strftime('%Y-%m-%d %H:%M:%S') for second in samples]
+
+    with open(os.path.join(metrics_dir, 'podmetrics.csv'), 'w') as f:
+        f.write('Timestamp,Namespace,Name,CPU,Memory\n')
+        for stamp, second in zip(stamps, samples):
+            pods = int(replicas[second])
+            cpu = utilization[second] / 100 * POD_CPU_LIMIT_MILLICORES * rng.uniform(0.85, 1.15, pods)
+            cpu = np.clip(cpu, 1, POD_CPU_LIMIT_MILLICORES).astype(np.int64)
+            memory = (90 + cpu * 0.5 + rng.normal(0, 5, pods)).astype(np.int64)
+            rows = [f'{stamp},default,url-shortener-{i + 1},{cpu[i]}m,{memory[i]}Mi\n' for i in range(pods)]
+            rows += [f'{stamp},default,redis-{i + 1},{rng.integers(5, 20)}m,{rng.integers(50, 150)}Mi\n'
+                     for i in range(extra_pods)]
+            f.write(''.join(rows))
+
+    with open(os.path.join(metrics_dir, 'hpametrics.csv'), 'w') as f:
+        f.write('Timestamp,MinReplicas,MaxReplicas,CurrentReplicas,DesiredReplicas,CurrentCPUUtilization,TargetCPUUtilization\n')
+        for stamp, second in zip(stamps, samples):
+            f.write(f'{stamp},{min_replicas},{max_replicas},{replicas[second]},{desired[second]},'
+                    f'{int(utilization[second])},{TARGET_CPU_UTILIZATION}\n')
+
+    with open(os.path.join(metrics_dir, 'healthmetrics.csv'), 'w') as f:
+        f.write('Timestamp,Status,Redis,Version,Latency\n')
+        for stamp, second in zip(stamps, samples):
+            degraded = utilization[second] > 100
+            latency = rng.uniform(150, 300) if degraded else rng.uniform(40, 100)
+            f.write(f"{stamp},{'Degraded' if degraded else 'Healthy'},Connected,v1.2.3,{latency:.2f}\n")
+
+    logger.info(f"Wrote {len(samples)} metrics samples to {metrics_dir}")
+
+def generate_results(output_dir, points, peak_vus=100, min_replicas=2, max_replicas=5, extra_pods=2,
+                     interval=5, seed=0, start=datetime(2025, 4, 7, 21, 0, 0), utc_offset=timedelta(0)):
+    """Write a deterministic synthetic results directory shaped like one run of run-load-test.bat"""
+    rng = np.random.default_rng(seed)
+    duration = run_duration(points, peak_vus)
+    vus = vu_profile(duration, peak_vus)
+    rps, replicas, utilization, desired = simulate_cluster(vus, min_replicas, max_replicas)
+
+    os.makedirs(output_dir, exist_ok=True)
+    local_start = start.replace(tzinfo=timezone(utc_offset))
+    generate_k6_results(os.path.join(output_dir, 'k6-results.json'), local_start, utc_offset, vus, rps, replicas, rng)
+    generate_metrics_csvs(os.path.join(output_dir, 'metrics'), start, utilization, replicas, desired,
+                          min_replicas, max_replicas, extra_pods, interval, rng)
+    return output_dir
+
+def parse_utc_offset(value):
+    sign = -1 if value.startswith('-') else 1
+    hours, minutes = value.lstrip('+-').split(':')
+    return sign * timedelta(hours=int(hours), minutes=int(minutes))
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Generate synthetic URL shortener load test results')
+    parser.add_argument('output_dir', help='results directory to create')
+    parser.add_argument('--points', type=int, default=100000, help='approximate number of k6 points to write')
+    parser.add_argument('--peak-vus', type=int, default=100, help='VUs at the peak of the stage profile')
+    parser.add_argument('--min-replicas', type=int, default=2, help='HPA minimum replicas')
+    parser.add_argument('--max-replicas', type=int, default=5, help='HPA maximum replicas (pods per sample at peak)')
+    parser.add_argument('--extra-pods', type=int, default=2, help='non-autoscaled pods listed in every pod sample')
+    parser.add_argument('--interval', type=int, default=5, help='seconds between metrics samples')
+    parser.add_argument('--seed', type=int, default=0, help='random seed; equal arguments give identical files')
+    parser.add_argument('--start', default='2025-04-07T21:00:00', help='local start time of the run')
+    parser.add_argument('--utc-offset', default='+00:00', help='UTC offset written in k6 timestamps')
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_args()
+    generate_results(args.output_dir, args.points, args.peak_vus, args.min_replicas, args.max_replicas,
+                     args.extra_pods, args.interval, args.seed, datetime.fromisoformat(args.start),
+                     parse_utc_offset(args.utc_offset))
+    print(f"Synthetic results written to: {args.output_dir}")
+
+if __name__ == "__main__":
+    main()
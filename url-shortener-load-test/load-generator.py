@@ -0,0 +1,451 @@
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import ssl
+import itertools
+import argparse
+import importlib.util
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+TEST_URLS = [
+    'https://github.com',
+    'https://kubernetes.io',
+    'https://nodejs.org',
+    'https://redis.io',
+    'https://expressjs.com',
+]
+ROUTES = {'shorten': ('POST', '/shorten'), 'redirect': ('GET', '/:shortenedId'), 'health': ('GET', '/health')}
+EXPECTED_STATUS = {'shorten': (200, 201), 'redirect': (302,), 'health': (200,)}
+DEFAULT_MIX = 'shorten=1,redirect=4'
+WORKLOAD_FILE = 'workload.json'
+RECENT_URLS = 1000
+# Workload profiles; command line options override individual parameters
+WORKLOAD_PROFILES = {
+    'mixed': {'mix': DEFAULT_MIX, 'preseed': 100, 'zipf_s': 0.0, 'dedupe_rate': 0.0, 'new_url_rate': 0.0},
+    'read-heavy': {'mix': 'shorten=5,redirect=95', 'preseed': 10000, 'zipf_s': 1.1, 'dedupe_rate': 0.2,
+                   'new_url_rate': 0.05},
+    'write-heavy': {'mix': 'shorten=1,redirect=1', 'preseed': 1000, 'zipf_s': 0.8, 'dedupe_rate': 0.05,
+                    'new_url_rate': 0.2},
+}
+FLUSH_SECONDS = 1.0
+DISPATCH_TOLERANCE = 0.005
+SCENARIO = 'open_model'
+
+def load_analyzer():
+    """Import analyze-results.py for its LatencyHistogram"""
+    spec = importlib.util.spec_from_file_location('analyze_results', os.path.join(SCRIPT_DIR, 'analyze-results.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['analyze_results'] = module
+    spec.loader.exec_module(module)
+    return module
+
+def parse_mix(value):
+    """Parse 'shorten=1,redirect=4' into normalized request type weights"""
+    weights = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name.strip() not in ROUTES:
+            raise argparse.ArgumentTypeError(f"unknown request type '{name}' (expected one of {', '.join(ROUTES)})")
+        weights[name.strip()] = float(weight or 1)
+    total = sum(weights.values())
+    if total <= 0:
+        raise argparse.ArgumentTypeError('the mix needs at least one positive weight')
+    return {name: weight / total for name, weight in weights.items() if weight > 0}
+
+def arrival_offsets(rate, duration, schedule, rng):
+    """Intended start offsets in seconds of an open-model run: evenly spaced or a Poisson process"""
+    if schedule == 'constant':
+        count = int(rate * duration)
+        return (i / rate for i in range(count))
+
+    def poisson():
+        t = rng.expovariate(rate)
+        while t < duration:
+            yield t
+            t += rng.expovariate(rate)
+    return poisson()
+
+class HttpConnectionPool:
+    """Fixed-size pool of keep-alive HTTP/1.1 connections to one host, over TLS for https URLs"""
+
+    def __init__(self, base_url, size, ssl_context=None):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"Unsupported URL scheme in {base_url!r}; use http or https")
+        self.host = parts.hostname
+        self.ssl = (ssl_context or ssl.create_default_context()) if parts.scheme == 'https' else None
+        self.port = parts.port or (443 if self.ssl else 80)
+        self.host_header = parts.netloc
+        self.idle = asyncio.LifoQueue()
+        for _ in range(size):
+            self.idle.put_nowait(None)
+
+    async def request(self, method, path, body=None):
+        """Send one request on a pooled connection; returns (status, headers, body, send_started, first_byte)"""
+        connection = await self.idle.get()
+        try:
+            if connection is None:
+                connection = await asyncio.open_connection(self.host, self.port, ssl=self.ssl)
+            reader, writer = connection
+            payload = json.dumps(body).encode() if body is not None else b''
+            head = [f'{method} {path} HTTP/1.1', f'Host: {self.host_header}', 'Connection: keep-alive',
+                    'User-Agent: url-shortener-load-generator']
+            if body is not None:
+                head += ['Content-Type: application/json', f'Content-Length: {len(payload)}']
+
+            sent = time.perf_counter()
+            writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + payload)
+            await writer.drain()
+            status_line = await reader.readline()
+            first_byte = time.perf_counter()
+            if not status_line:
+                raise ConnectionError('connection closed by server')
+            status = int(status_line.split(b' ', 2)[1])
+
+            headers = {}
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b'\n', b''):
+                    break
+                name, _, value = line.decode('latin-1').partition(':')
+                headers[name.strip().lower()] = value.strip()
+            if headers.get('transfer-encoding', '').lower() == 'chunked':
+                chunks = []
+                while True:
+                    size = int((await reader.readline()).split(b';')[0], 16)
+                    chunks.append(await reader.readexactly(size))
+                    await reader.readline()
+                    if size == 0:
+                        break
+                content = b''.join(chunks)
+            else:
+                content = await reader.readexactly(int(headers.get('content-length', 0)))
+            if headers.get('connection', '').lower() == 'close':
+                writer.close()
+                connection = None
+            return status, headers, content, sent, first_byte
+        except BaseException:
+            if connection is not None:
+                connection[1].close()
+            connection = None
+            raise
+        finally:
+            self.idle.put_nowait(connection)
+
+    async def close(self):
+        while not self.idle.empty():
+            connection = self.idle.get_nowait()
+            if connection is not None:
+                connection[1].close()
+
+class K6PointWriter:
+    """Buffers k6-compatible Point lines and appends them to k6-results.json in batches"""
+
+    def __init__(self, path, metrics):
+        self.f = open(path, 'w')
+        self.lines = []
+        self.wall_start = datetime.now().astimezone()
+        self.clock_start = time.perf_counter()
+        for name, metric_type in metrics.items():
+            self.f.write(json.dumps({
+                'type': 'Metric',
+                'data': {'name': name, 'type': metric_type, 'contains': 'time' if metric_type == 'trend' else 'default',
+                         'thresholds': [], 'submetrics': None},
+                'metric': name
+            }, separators=(',', ':')) + '\n')
+
+    def timestamp(self, clock):
+        return (self.wall_start + timedelta(seconds=clock - self.clock_start)).isoformat(timespec='microseconds')
+
+    def add(self, metric, clock, value, tags):
+        self.lines.append(f'{{"type":"Point","data":{{"time":"{self.timestamp(clock)}","value":{value},'
+                          f'"tags":{tags}}},"metric":"{metric}"}}\n')
+
+    def flush(self):
+        if self.lines:
+            self.f.write(''.join(self.lines))
+            self.f.flush()
+            self.lines = []
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+class Workload:
+    """Picks shorten URLs (dedupe_rate re-submits) and redirect ids (Zipf over pre-seeded ranks, new_url_rate fresh)"""
+
+    def __init__(self, rng, zipf_s=0.0, dedupe_rate=0.0, new_url_rate=0.0):
+        self.rng = rng
+        self.zipf_s = zipf_s
+        self.dedupe_rate = dedupe_rate
+        self.new_url_rate = new_url_rate
+        self.seeded_ids = []
+        self.recent_ids = []
+        self.long_urls = []
+        self.cum_weights = None
+
+    def new_url(self):
+        return f'{self.rng.choice(TEST_URLS)}/?r={self.rng.getrandbits(48):x}'
+
+    def shorten_url(self):
+        if self.long_urls and self.rng.random() < self.dedupe_rate:
+            return self.rng.choice(self.long_urls)
+        return self.new_url()
+
+    def redirect_id(self):
+        if self.recent_ids and (not self.seeded_ids or self.rng.random() < self.new_url_rate):
+            return self.rng.choice(self.recent_ids)
+        if not self.seeded_ids:
+            return 'missing-id00'
+        if self.cum_weights is None:
+            return self.rng.choice(self.seeded_ids)
+        return self.rng.choices(self.seeded_ids, cum_weights=self.cum_weights)[0]
+
+    def remember(self, long_url, content, seeded=False):
+        """Record the short id of a successful shorten so later redirects can hit it"""
+        try:
+            short_id = json.loads(content)['shortened_url'].rsplit('/', 1)[-1]
+        except (ValueError, KeyError, TypeError):
+            return
+        self.long_urls.append(long_url)
+        if seeded:
+            self.seeded_ids.append(short_id)
+        else:
+            self.recent_ids.append(short_id)
+            del self.recent_ids[:-RECENT_URLS]
+
+    def finish_seeding(self):
+        """Fix the popularity ranks of the pre-seeded ids"""
+        if self.zipf_s > 0 and self.seeded_ids:
+            self.cum_weights = list(itertools.accumulate(rank ** -self.zipf_s
+                                                         for rank in range(1, len(self.seeded_ids) + 1)))
+
+class OpenModelLoadTest:
+    """Fires requests at their intended start times, whether or not earlier requests have completed"""
+
+    def __init__(self, base_url, mix, connections, timeout, writer, histogram_factory, rng, workload):
+        self.base_url = base_url.rstrip('/')
+        self.mix = mix
+        self.pool = HttpConnectionPool(base_url, connections)
+        self.connections = connections
+        self.timeout = timeout
+        self.writer = writer
+        self.rng = rng
+        self.workload = workload
+        self.histogram_factory = histogram_factory
+        self.latency = {}
+        self.service = {}
+        self.counts = {}
+        self.failures = {}
+        self.tag_cache = {}
+
+    def tags(self, kind, status):
+        key = (kind, status)
+        tags = self.tag_cache.get(key)
+        if tags is None:
+            method, name = ROUTES[kind]
+            tags = self.tag_cache[key] = json.dumps({
+                'expected_response': 'true' if status in EXPECTED_STATUS[kind] else 'false', 'group': '',
+                'method': method, 'name': name, 'proto': 'HTTP/1.1', 'scenario': SCENARIO, 'status': str(status)
+            }, separators=(',', ':'), sort_keys=True)
+        return tags
+
+    def next_request(self, kind):
+        """Method, path and JSON body of the next request of a type"""
+        if kind == 'shorten':
+            return 'POST', '/shorten', {'url': self.workload.shorten_url()}
+        if kind == 'redirect':
+            return 'GET', f'/{self.workload.redirect_id()}', None
+        return 'GET', '/health', None
+
+    async def fire(self, kind, intended):
+        """Send one request and record its latency from the intended start (the corrected latency)"""
+        method, path, body = self.next_request(kind)
+        status, service_ms = 0, None
+        try:
+            status, _, content, sent, first_byte = await asyncio.wait_for(self.pool.request(method, path, body),
+                                                                          self.timeout)
+            service_ms = (first_byte - sent) * 1000
+            if kind == 'shorten' and status in EXPECTED_STATUS[kind]:
+                self.workload.remember(body['url'], content)
+        except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+            logger.debug(f"{method} {path} failed: {e}")
+        done = time.perf_counter()
+
+        latency_ms = (done - intended) * 1000
+        failed = status not in EXPECTED_STATUS[kind]
+        tags = self.tags(kind, status)
+        self.writer.add('http_reqs', done, 1, tags)
+        self.writer.add('http_req_duration', done, round(latency_ms, 6), tags)
+        self.writer.add('http_req_failed', done, int(failed), tags)
+        self.writer.add('http_req_schedule_lag', done, round(max(latency_ms - (service_ms or 0), 0), 6), tags)
+        if service_ms is not None:
+            self.writer.add('http_req_waiting', done, round(service_ms, 6), tags)
+            self.service.setdefault(kind, self.histogram_factory()).record([service_ms])
+        self.latency.setdefault(kind, self.histogram_factory()).record([latency_ms])
+        self.counts[kind] = self.counts.get(kind, 0) + 1
+        self.failures[kind] = self.failures.get(kind, 0) + failed
+
+    async def preseed(self, count):
+        """Create the short URLs redirects hit before the measured run starts, using every pooled connection"""
+        remaining = iter(range(count))
+        
+        async def seed():
+            for _ in remaining:
+                url = self.workload.new_url()
+                try:
+                    status, _, content, _, _ = await asyncio.wait_for(
+                        self.pool.request('POST', '/shorten', {'url': url}), self.timeout)
+                except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                    logger.warning(f"Pre-seeding request failed: {e}")
+                    continue
+                if status in EXPECTED_STATUS['shorten']:
+                    self.workload.remember(url, content, seeded=True)
+        
+        await asyncio.gather(*(seed() for _ in range(min(self.connections, count))))
+        self.workload.finish_seeding()
+        logger.info(f"Pre-seeded {len(self.workload.seeded_ids)} short URLs")
+
+    async def flush_periodically(self):
+        while True:
+            await asyncio.sleep(FLUSH_SECONDS)
+            self.writer.flush()
+
+    async def run(self, offsets):
+        """Dispatch every intended start; requests queue for a pooled connection instead of delaying the schedule"""
+        kinds = list(self.mix)
+        weights = [self.mix[kind] for kind in kinds]
+        flusher = asyncio.create_task(self.flush_periodically())
+        in_flight = set()
+        start = time.perf_counter()
+        behind = 0
+        try:
+            for offset in offsets:
+                intended = start + offset
+                delay = intended - time.perf_counter()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                elif delay < -DISPATCH_TOLERANCE:
+                    behind += 1
+                task = asyncio.create_task(self.fire(self.rng.choices(kinds, weights)[0], intended))
+                in_flight.add(task)
+                task.add_done_callback(in_flight.discard)
+            if in_flight:
+                await asyncio.gather(*in_flight)
+        finally:
+            flusher.cancel()
+            self.writer.flush()
+            await self.pool.close()
+        if behind:
+            logger.warning(f"The dispatcher fell behind schedule for {behind} requests; their latency still counts "
+                           f"from the intended start")
+        return time.perf_counter() - start
+
+def log_summary(test, elapsed):
+    logger.info(f"Sent {sum(test.counts.values())} requests in {elapsed:.1f}s")
+    for kind in test.counts:
+        latency = test.latency[kind]
+        service = test.service.get(kind)
+        logger.info(
+            f"  {kind}: {test.counts[kind] / elapsed:.1f} req/s, {test.failures[kind]} failed, latency p50 "
+            f"{latency.quantile(0.5):.2f} / p99 {latency.quantile(0.99):.2f} / max {latency.max:.2f} ms"
+            + (f", service p50 {service.quantile(0.5):.2f} / p99 {service.quantile(0.99):.2f} ms" if service else '')
+        )
+
+def resolve_workload(args):
+    """Profile parameters with any command line overrides applied"""
+    workload = dict(WORKLOAD_PROFILES[args.profile])
+    workload['mix'] = parse_mix(workload['mix'])
+    for name in ('mix', 'preseed', 'zipf_s', 'dedupe_rate', 'new_url_rate'):
+        if getattr(args, name) is not None:
+            workload[name] = getattr(args, name)
+    return workload
+
+def record_workload(results_dir, args, workload):
+    """Save the workload of a run next to its k6 output so the analyzer can label and group runs"""
+    with open(os.path.join(results_dir, WORKLOAD_FILE), 'w') as f:
+        json.dump({
+            'generator': 'load-generator.py',
+            'profile': args.profile,
+            'started': datetime.now().astimezone().isoformat(timespec='seconds'),
+            'base_url': args.base_url,
+            'rate': args.rate,
+            'duration': args.duration,
+            'schedule': args.schedule,
+            'connections': args.connections,
+            'seed': args.seed,
+            **workload
+        }, f, indent=2)
+
+async def run_load_test(args, results_dir, after_preseed=None):
+    """Pre-seed, then offer the load; after_preseed is awaited in between (e.g. to snapshot server counters)"""
+    analyzer = load_analyzer()
+    rng = random.Random(args.seed)
+    workload = resolve_workload(args)
+    record_workload(results_dir, args, workload)
+    writer = K6PointWriter(os.path.join(results_dir, 'k6-results.json'), {
+        'http_reqs': 'counter', 'http_req_duration': 'trend', 'http_req_waiting': 'trend',
+        'http_req_schedule_lag': 'trend', 'http_req_failed': 'rate'
+    })
+    test = OpenModelLoadTest(args.base_url, workload['mix'], args.connections, args.timeout, writer,
+                             analyzer.LatencyHistogram, rng,
+                             Workload(rng, workload['zipf_s'], workload['dedupe_rate'], workload['new_url_rate']))
+    try:
+        if 'redirect' in workload['mix'] and workload['preseed']:
+            await test.preseed(workload['preseed'])
+        if after_preseed is not None:
+            await after_preseed()
+        logger.info(f"Offering {args.rate} req/s ({args.schedule}, {args.profile} profile) for {args.duration}s "
+                    f"to {args.base_url}")
+        elapsed = await test.run(arrival_offsets(args.rate, args.duration, args.schedule, rng))
+    finally:
+        writer.close()
+    log_summary(test, elapsed)
+    return test
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Open-model load generator for the URL shortener')
+    parser.add_argument('--base-url', default='http://127.0.0.1', help='shortener base URL')
+    parser.add_argument('--rate', type=float, default=50.0, help='offered requests per second')
+    parser.add_argument('--duration', type=float, default=60.0, help='seconds of offered load')
+    parser.add_argument('--schedule', choices=['constant', 'poisson'], default='poisson',
+                        help='evenly spaced arrivals or a Poisson process with the same mean rate')
+    parser.add_argument('--profile', choices=list(WORKLOAD_PROFILES), default='mixed',
+                        help='workload profile; the options below override its parameters')
+    parser.add_argument('--mix', type=parse_mix, help=f'request type weights, e.g. {DEFAULT_MIX} (types: {", ".join(ROUTES)})')
+    parser.add_argument('--connections', type=int, default=64, help='keep-alive connections in the pool')
+    parser.add_argument('--timeout', type=float, default=10.0,
+                        help='seconds a request may wait for a connection and a response before it counts as failed')
+    parser.add_argument('--preseed', type=int, help='short URLs created before the run for redirects to hit')
+    parser.add_argument('--zipf-s', type=float, help='Zipf exponent of redirect popularity over pre-seeded URLs (0 = uniform)')
+    parser.add_argument('--dedupe-rate', type=float, help='fraction of shortens re-submitting an already shortened URL')
+    parser.add_argument('--new-url-rate', type=float, help='fraction of redirects to URLs shortened during the run')
+    parser.add_argument('--seed', type=int, help='seed for arrivals, request types and URLs')
+    parser.add_argument('--output-dir', help='results directory (default: results/load-test-results-<timestamp>)')
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_args()
+    results_dir = args.output_dir or os.path.join('results', f"load-test-results-{datetime.now():%Y%m%d-%H%M%S}")
+    os.makedirs(results_dir, exist_ok=True)
+    try:
+        asyncio.run(run_load_test(args, results_dir))
+    except KeyboardInterrupt:
+        logger.info("Load test interrupted; points recorded so far were kept")
+    print(f"\nResults written to: {results_dir}")
+    print(f"Analyze them with: python analyze-results.py {results_dir}")
+
+if __name__ == "__main__":
+    main()
@@ -88,7 +88,9 @@ export default function () {
 
   sleep(1);
 
-  let accessResponse = http.get(`${BASE_URL}/${shortId}`);
+  let accessResponse = http.get(`${BASE_URL}/${shortId}`, {
+    tags: { name: "/:shortenedId" }, // Group all redirects under one endpoint name
+  });
 
   let accessSuccess1 = check(accessResponse, {
     "Access status is 302 or 404": (r) =>
@@ -0,0 +1,387 @@
+import os
+import sys
+import re
+import json
+import time
+import random
+import asyncio
+import argparse
+import importlib.util
+from datetime import datetime
+from urllib.parse import urlsplit, urlunsplit
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SIGNAL_FILE = 'monitoring-active.signal'
+POD_METRICS_FILE = 'podmetrics.csv'
+HEALTH_METRICS_FILE = 'healthmetrics.csv'
+HPA_METRICS_FILE = 'hpametrics.csv'
+SERVER_METRICS_FILE = 'server-metrics.json'
+POD_COLUMNS = ['Timestamp', 'Namespace', 'Name', 'CPU', 'Memory']
+HEALTH_COLUMNS = ['Timestamp', 'Status', 'Redis', 'Version', 'Latency']
+HPA_COLUMNS = ['Timestamp', 'MinReplicas', 'MaxReplicas', 'CurrentReplicas', 'DesiredReplicas',
+               'CurrentCPUUtilization', 'TargetCPUUtilization']
+FLUSH_SECONDS = 10.0
+FLUSH_ROWS = 1000
+SIGNAL_POLL_SECONDS = 0.25
+KUBECTL_TIMEOUT = 30.0
+PROMETHEUS_SAMPLE = re.compile(r'^([a-zA-Z_:][a-zA-Z0-9_:]*)(?:\{(.*)\})?\s+(\S+)')
+PROMETHEUS_LABEL = re.compile(r'([a-zA-Z_][a-zA-Z0-9_]*)="((?:[^"\\]|\\.)*)"')
+
+def load_load_generator():
+    """Import load-generator.py for its keep-alive HttpConnectionPool"""
+    spec = importlib.util.spec_from_file_location('load_generator', os.path.join(SCRIPT_DIR, 'load-generator.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['load_generator'] = module
+    spec.loader.exec_module(module)
+    return module
+
+class CsvBatchWriter:
+    """Buffers rows in memory and appends them to one metrics CSV in batches"""
+
+    def __init__(self, path, columns, max_rows=FLUSH_ROWS):
+        self.path = path
+        self.columns = columns
+        self.max_rows = max_rows
+        self.rows = []
+        self.written = 0
+        if not os.path.exists(path) or os.path.getsize(path) == 0:
+            with open(path, 'w', newline='') as f:
+                f.write(','.join(columns) + '\n')
+
+    def add(self, rows):
+        self.rows.extend(rows)
+        if len(self.rows) >= self.max_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        with open(self.path, 'a', newline='') as f:
+            f.write(''.join(','.join('' if value is None else str(value) for value in row) + '\n' for row in self.rows))
+        self.written += len(self.rows)
+        self.rows = []
+
+class JsonLinesWriter:
+    """Buffers JSON lines and appends them to one file in batches, with the same interface as CsvBatchWriter"""
+
+    def __init__(self, path, max_rows=FLUSH_ROWS):
+        self.path = path
+        self.max_rows = max_rows
+        self.rows = []
+        self.written = 0
+
+    def add(self, rows):
+        self.rows.extend(rows)
+        if len(self.rows) >= self.max_rows:
+            self.flush()
+
+    def flush(self):
+        if not self.rows:
+            return
+        with open(self.path, 'a') as f:
+            f.write(''.join(json.dumps(row, separators=(',', ':')) + '\n' for row in self.rows))
+        self.written += len(self.rows)
+        self.rows = []
+
+def parse_prometheus_text(text):
+    """[name, labels, value] for every sample of a Prometheus text exposition"""
+    samples = []
+    for line in text.splitlines():
+        if not line or line.startswith('#'):
+            continue
+        match = PROMETHEUS_SAMPLE.match(line)
+        if match is None:
+            continue
+        name, labels, value = match.groups()
+        labels = {key: re.sub(r'\\(.)', lambda m: '\n' if m.group(1) == 'n' else m.group(1), raw)
+                  for key, raw in PROMETHEUS_LABEL.findall(labels or '')}
+        try:
+            samples.append([name, labels, float(value)])
+        except ValueError:
+            continue
+    return samples
+
+class HealthSource:
+    """Times GET /health on a kept-alive connection, as a client of the service would see it"""
+
+    def __init__(self, health_url, timeout):
+        parts = urlsplit(health_url)
+        self.path = parts.path or '/health'
+        self.pool = load_load_generator().HttpConnectionPool(f'{parts.scheme}://{parts.netloc}', 1)
+        self.timeout = timeout
+
+    async def sample(self):
+        """One healthmetrics row without its timestamp"""
+        start = time.perf_counter()
+        try:
+            status, _, content, _, _ = await asyncio.wait_for(self.pool.request('GET', self.path), self.timeout)
+        except (OSError, ValueError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+            logger.debug(f"Health check failed: {e}")
+            return ['Unreachable', 'Unknown', '', round((time.perf_counter() - start) * 1000, 2)]
+        latency = round((time.perf_counter() - start) * 1000, 2)
+        try:
+            body = json.loads(content)
+        except ValueError:
+            body = {}
+        healthy = status == 200 and body.get('status') == 'healthy'
+        redis = 'Connected' if body.get('redis') == 'connected' else 'Disconnected'
+        return ['Healthy' if healthy else 'Degraded', redis, body.get('appVersion', ''), latency]
+
+    async def close(self):
+        await self.pool.close()
+
+class ServerMetricsSource:
+    """Scrapes the service's Prometheus /metrics endpoint"""
+
+    def __init__(self, metrics_url, timeout):
+        parts = urlsplit(metrics_url)
+        self.path = parts.path or '/metrics'
+        self.pool = load_load_generator().HttpConnectionPool(f'{parts.scheme}://{parts.netloc}', 1)
+        self.timeout = timeout
+
+    async def sample(self):
+        status, _, content, _, _ = await asyncio.wait_for(self.pool.request('GET', self.path), self.timeout)
+        if status != 200:
+            raise RuntimeError(f"{self.path} answered {status}")
+        return parse_prometheus_text(content.decode())
+
+    async def close(self):
+        await self.pool.close()
+
+class KubectlSource:
+    """Pod usage from `kubectl top pods` and HPA status from `kubectl get hpa -o json`"""
+
+    def __init__(self, namespace='default', hpa_name='urlshortener', kubectl='kubectl'):
+        self.namespace = namespace
+        self.hpa_name = hpa_name
+        self.kubectl = kubectl
+
+    async def run(self, *args):
+        process = await asyncio.create_subprocess_exec(self.kubectl, *args, stdout=asyncio.subprocess.PIPE,
+                                                       stderr=asyncio.subprocess.PIPE)
+        try:
+            stdout, stderr = await asyncio.wait_for(process.communicate(), KUBECTL_TIMEOUT)
+        except asyncio.TimeoutError:
+            process.kill()
+            raise RuntimeError(f"kubectl {' '.join(args)} timed out")
+        if process.returncode != 0:
+            raise RuntimeError(stderr.decode(errors='replace').strip() or f"kubectl exited with {process.returncode}")
+        return stdout.decode()
+
+    async def pod_metrics(self):
+        """(namespace, name, cpu, memory) per pod, with Kubernetes quantities as reported"""
+        output = await self.run('top', 'pods', '-n', self.namespace, '--no-headers')
+        rows = []
+        for line in output.splitlines():
+            parts = line.split()
+            if len(parts) >= 3:
+                rows.append((self.namespace, parts[0], parts[1], parts[2]))
+        return rows
+
+    async def hpa_status(self):
+        """HPA replica counts and CPU utilization for the hpametrics columns"""
+        hpa = json.loads(await self.run('get', 'hpa', self.hpa_name, '-n', self.namespace, '-o', 'json'))
+        spec, status = hpa.get('spec', {}), hpa.get('status', {})
+        current_cpu = status.get('currentCPUUtilizationPercentage')
+        target_cpu = spec.get('targetCPUUtilizationPercentage')
+        for metric in status.get('currentMetrics') or []:
+            if metric.get('type') == 'Resource' and metric['resource'].get('name') == 'cpu':
+                current_cpu = metric['resource'].get('current', {}).get('averageUtilization', current_cpu)
+        for metric in spec.get('metrics') or []:
+            if metric.get('type') == 'Resource' and metric['resource'].get('name') == 'cpu':
+                target_cpu = metric['resource'].get('target', {}).get('averageUtilization', target_cpu)
+        return {
+            'MinReplicas': spec.get('minReplicas', 1), 'MaxReplicas': spec.get('maxReplicas'),
+            'CurrentReplicas': status.get('currentReplicas'), 'DesiredReplicas': status.get('desiredReplicas'),
+            'CurrentCPUUtilization': current_cpu, 'TargetCPUUtilization': target_cpu
+        }
+
+class FakeKubernetesSource:
+    """Deterministic stand-in for KubectlSource: an HPA-managed deployment under a slowly varying load"""
+
+    def __init__(self, namespace='default', min_replicas=2, max_replicas=5, target_cpu=70, seed=None):
+        self.namespace = namespace
+        self.min_replicas = min_replicas
+        self.max_replicas = max_replicas
+        self.target_cpu = target_cpu
+        self.random = random.Random(seed)
+        self.replicas = self.desired = min_replicas
+        self.load = 0.5
+        self.cpu = 0
+
+    def step(self):
+        self.load = min(max(self.load + self.random.uniform(-0.15, 0.2), 0.1), self.max_replicas * 1.2)
+        self.cpu = int(self.load / self.replicas * 100)
+        self.desired = min(max(-(-self.replicas * self.cpu // self.target_cpu), self.min_replicas), self.max_replicas)
+        self.replicas += (self.desired > self.replicas) - (self.desired < self.replicas)
+
+    async def pod_metrics(self):
+        self.step()
+        rows = [(self.namespace, f'urlshortener-{i + 1}', f'{max(int(self.cpu * 2 * self.random.uniform(0.9, 1.1)), 1)}m',
+                 f'{self.random.randint(90, 130)}Mi') for i in range(self.replicas)]
+        rows.append((self.namespace, 'redis-1', f'{self.random.randint(5, 20)}m', f'{self.random.randint(50, 150)}Mi'))
+        return rows
+
+    async def hpa_status(self):
+        return {
+            'MinReplicas': self.min_replicas, 'MaxReplicas': self.max_replicas, 'CurrentReplicas': self.replicas,
+            'DesiredReplicas': self.desired, 'CurrentCPUUtilization': self.cpu, 'TargetCPUUtilization': self.target_cpu
+        }
+
+class MetricsCollector:
+    """Polls each source on its own schedule until the signal file is removed, flushing CSVs in batches"""
+
+    def __init__(self, output_dir, signal_path, health, kubernetes, interval, kube_interval,
+                 flush_interval=FLUSH_SECONDS, server_metrics=None, server_metrics_file=None):
+        os.makedirs(output_dir, exist_ok=True)
+        self.signal_path = signal_path
+        self.health = health
+        self.kubernetes = kubernetes
+        self.server_metrics = server_metrics
+        self.interval = interval
+        self.kube_interval = kube_interval
+        self.flush_interval = flush_interval
+        self.timestamp_format = '%Y-%m-%d %H:%M:%S' if min(interval, kube_interval) >= 1 else '%Y-%m-%d %H:%M:%S.%f'
+        self.writers = {
+            'pod': CsvBatchWriter(os.path.join(output_dir, POD_METRICS_FILE), POD_COLUMNS),
+            'health': CsvBatchWriter(os.path.join(output_dir, HEALTH_METRICS_FILE), HEALTH_COLUMNS),
+            'hpa': CsvBatchWriter(os.path.join(output_dir, HPA_METRICS_FILE), HPA_COLUMNS)
+        }
+        if server_metrics is not None:
+            self.writers['server'] = JsonLinesWriter(server_metrics_file)
+        self.failures = {}
+
+    def timestamp(self):
+        stamp = datetime.now().strftime(self.timestamp_format)
+        return stamp[:-3] if self.timestamp_format.endswith('%f') else stamp
+
+    async def sample_health(self):
+        stamp = self.timestamp()
+        return [[stamp] + await self.health.sample()]
+
+    async def sample_pods(self):
+        stamp = self.timestamp()
+        return [[stamp, *row] for row in await self.kubernetes.pod_metrics()]
+
+    async def sample_hpa(self):
+        stamp = self.timestamp()
+        status = await self.kubernetes.hpa_status()
+        return [[stamp] + [status.get(column) for column in HPA_COLUMNS[1:]]] if status else []
+
+    async def sample_server_metrics(self):
+        stamp = datetime.now().astimezone().isoformat(timespec='milliseconds')
+        return [{'time': stamp, 'samples': await self.server_metrics.sample()}]
+
+    async def poll(self, name, sample, interval, stopped):
+        """Take a sample every interval seconds; a slow sample delays the next one instead of overlapping it"""
+        loop = asyncio.get_running_loop()
+        next_sample = loop.time()
+        while not stopped.is_set():
+            try:
+                self.writers[name].add(await sample())
+                if self.failures.get(name):
+                    logger.info(f"{name} metrics recovered after {self.failures[name]} failed samples")
+                self.failures[name] = 0
+            except Exception as e:
+                self.failures[name] = self.failures.get(name, 0) + 1
+                if self.failures[name] == 1:
+                    logger.warning(f"Could not sample {name} metrics: {str(e)}")
+            next_sample = max(next_sample + interval, loop.time())
+            try:
+                await asyncio.wait_for(stopped.wait(), next_sample - loop.time())
+            except asyncio.TimeoutError:
+                pass
+
+    async def flush_periodically(self, stopped):
+        while not stopped.is_set():
+            try:
+                await asyncio.wait_for(stopped.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            for writer in self.writers.values():
+                writer.flush()
+
+    async def watch_signal(self, stopped):
+        while os.path.exists(self.signal_path):
+            await asyncio.sleep(SIGNAL_POLL_SECONDS)
+        logger.info("Signal file removed, stopping metrics collection")
+        stopped.set()
+
+    async def run(self):
+        with open(self.signal_path, 'w') as f:
+            f.write('active\n')
+        stopped = asyncio.Event()
+        tasks = [self.watch_signal(stopped), self.flush_periodically(stopped)]
+        if self.health is not None:
+            tasks.append(self.poll('health', self.sample_health, self.interval, stopped))
+        if self.kubernetes is not None:
+            tasks.append(self.poll('pod', self.sample_pods, self.kube_interval, stopped))
+            tasks.append(self.poll('hpa', self.sample_hpa, self.kube_interval, stopped))
+        if self.server_metrics is not None:
+            tasks.append(self.poll('server', self.sample_server_metrics, self.kube_interval, stopped))
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for writer in self.writers.values():
+                writer.flush()
+            for source in (self.health, self.server_metrics):
+                if source is not None:
+                    await source.close()
+            if os.path.exists(self.signal_path):
+                os.remove(self.signal_path)
+        for name, writer in self.writers.items():
+            logger.info(f"Wrote {writer.written} {name} rows to {writer.path}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Collect health, pod and HPA metrics during a load test')
+    parser.add_argument('output_dir', help='metrics directory the CSV files are written to')
+    parser.add_argument('--signal-file', default=SIGNAL_FILE,
+                        help='signal file name, created in the parent of output_dir; collection stops when it is removed')
+    parser.add_argument('--interval', type=float, default=1.0, help='seconds between /health samples (0.5 to 5)')
+    parser.add_argument('--kube-interval', type=float,
+                        help='seconds between pod and HPA samples (default: --interval, at least 1)')
+    parser.add_argument('--flush-interval', type=float, default=FLUSH_SECONDS, help='seconds between CSV flushes')
+    parser.add_argument('--health-url', default='http://127.0.0.1/health', help='health endpoint to time')
+    parser.add_argument('--metrics-url',
+                        help='Prometheus endpoint scraped at the pod/HPA interval (default: /metrics next to --health-url)')
+    parser.add_argument('--no-server-metrics', action='store_true', help='do not scrape the /metrics endpoint')
+    parser.add_argument('--timeout', type=float, default=5.0, help='seconds before a health check counts as unreachable')
+    parser.add_argument('--kube', choices=['kubectl', 'fake', 'none'], default='kubectl',
+                        help='pod and HPA source: kubectl, a local fake for tests, or none')
+    parser.add_argument('--namespace', default='default', help='namespace of the pods and the HPA')
+    parser.add_argument('--hpa', default='urlshortener', help='name of the HorizontalPodAutoscaler')
+    parser.add_argument('--seed', type=int, help='seed of the fake Kubernetes source')
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_args()
+    kubernetes = {
+        'kubectl': lambda: KubectlSource(args.namespace, args.hpa),
+        'fake': lambda: FakeKubernetesSource(args.namespace, seed=args.seed),
+        'none': lambda: None
+    }[args.kube]()
+    results_dir = os.path.dirname(os.path.abspath(args.output_dir))
+    signal_path = os.path.join(results_dir, args.signal_file)
+    server_metrics = None
+    if not args.no_server_metrics:
+        metrics_url = args.metrics_url or urlunsplit(urlsplit(args.health_url)._replace(path='/metrics'))
+        server_metrics = ServerMetricsSource(metrics_url, args.timeout)
+    collector = MetricsCollector(args.output_dir, signal_path, HealthSource(args.health_url, args.timeout), kubernetes,
+                                 args.interval, args.kube_interval or max(args.interval, 1.0), args.flush_interval,
+                                 server_metrics, os.path.join(results_dir, SERVER_METRICS_FILE))
+
+    logger.info(f"Collecting metrics into {args.output_dir} until {signal_path} is removed")
+    try:
+        asyncio.run(collector.run())
+    except KeyboardInterrupt:
+        logger.info("Metrics collection interrupted")
+
+if __name__ == "__main__":
+    main()
@@ -36,7 +36,7 @@ echo ==============================================
 
 echo.
 echo [1/7] Starting monitoring...
-start /B powershell -ExecutionPolicy Bypass -File monitoring-script.ps1 -OutputDir %METRICS_DIR% -SignalFile %SIGNAL_FILE% -Interval 5
+start /B python metrics-collector.py %METRICS_DIR% --signal-file %SIGNAL_FILE% --interval 1 --kube-interval 5
 echo Monitoring started. It will continue until the test is completed.
 
 echo.
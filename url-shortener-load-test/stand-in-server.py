@@ -0,0 +1,164 @@
+import json
+import random
+import string
+import asyncio
+import argparse
+from datetime import datetime, timezone
+import logging
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+SHORT_ID_ALPHABET = string.ascii_letters + string.digits + '_-'
+REASONS = {200: 'OK', 201: 'Created', 302: 'Found', 400: 'Bad Request', 404: 'Not Found', 500: 'Internal Server Error'}
+
+class StandInShortener:
+    """In-memory stand-in for index.js with the same routes, status codes and JSON bodies"""
+
+    def __init__(self, base_url, latency_ms=0.0, jitter_ms=0.0, concurrency=0, error_rate=0.0, seed=None):
+        self.base_url = base_url
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.slots = asyncio.Semaphore(concurrency) if concurrency else None
+        self.random = random.Random(seed)
+        self.short_to_long = {}
+        self.long_to_short = {}
+
+    async def handle(self, method, path, body):
+        """Return (status, headers, body) for one request"""
+        if self.slots is not None:
+            async with self.slots:
+                return await self.respond(method, path, body)
+        return await self.respond(method, path, body)
+
+    async def respond(self, method, path, body):
+        delay = self.latency_ms + self.random.uniform(0, self.jitter_ms)
+        if delay > 0:
+            await asyncio.sleep(delay / 1000)
+        if method == 'GET' and path == '/health':
+            return 200, {}, {
+                'status': 'healthy', 'redis': 'connected', 'appVersion': '1.0.0',
+                'timestamp': datetime.now(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+            }
+        if self.error_rate and self.random.random() < self.error_rate:
+            return 500, {}, {'error': 'Internal server error'}
+
+        if method == 'POST' and path == '/shorten':
+            try:
+                url = json.loads(body or b'{}').get('url')
+            except ValueError:
+                url = None
+            if not url:
+                return 400, {}, {'error': 'URL is required'}
+            status, short_id = self.shorten(url)
+            return status, {}, {'shortened_url': f'{self.base_url}/{short_id}'}
+
+        if method == 'POST' and path in ('/shorten/batch', '/resolve/batch'):
+            field = 'urls' if path == '/shorten/batch' else 'ids'
+            try:
+                items = json.loads(body or b'{}').get(field)
+            except ValueError:
+                items = None
+            if not isinstance(items, list) or not items:
+                return 400, {}, {'error': f'{field} must be a non-empty array'}
+            lines = []
+            for index, item in enumerate(items):
+                if field == 'ids':
+                    long_url = self.short_to_long.get(item) if isinstance(item, str) else None
+                    lines.append({'index': index, 'id': item, 'status': 200 if long_url else 404, 'url': long_url})
+                elif isinstance(item, str) and item:
+                    status, short_id = self.shorten(item)
+                    lines.append({'index': index, 'url': item, 'status': status,
+                                  'shortened_url': f'{self.base_url}/{short_id}'})
+                else:
+                    lines.append({'index': index, 'url': item, 'status': 400, 'error': 'URL is required'})
+            return 200, {'Content-Type': 'application/x-ndjson'}, ''.join(json.dumps(line) + '\n' for line in lines)
+
+        if method == 'GET' and path.count('/') == 1 and len(path) > 1:
+            long_url = self.short_to_long.get(path[1:])
+            if long_url is None:
+                return 404, {}, {'error': 'URL not found'}
+            return 302, {'Location': long_url}, f'Found. Redirecting to {long_url}'
+
+        return 404, {}, {'error': 'Not found', 'path': path, 'method': method}
+
+    def shorten(self, url):
+        """(status, short id) of a URL, reusing the id of an already shortened URL"""
+        short_id = self.long_to_short.get(url)
+        if short_id is not None:
+            return 200, short_id
+        short_id = ''.join(self.random.choice(SHORT_ID_ALPHABET) for _ in range(12))
+        self.short_to_long[short_id] = url
+        self.long_to_short[url] = short_id
+        return 201, short_id
+
+    async def serve_connection(self, reader, writer):
+        """Serve keep-alive HTTP/1.1 requests on one connection until the client closes it"""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, target, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length', 0))
+                body = await reader.readexactly(length) if length else b''
+
+                status, extra_headers, payload = await self.handle(method, target.split('?', 1)[0], body)
+                if isinstance(payload, str):
+                    content = payload.encode()
+                    content_type = extra_headers.pop('Content-Type', 'text/plain; charset=utf-8')
+                else:
+                    content, content_type = json.dumps(payload).encode(), 'application/json; charset=utf-8'
+                head = [f'HTTP/1.1 {status} {REASONS.get(status, "")}', f'Content-Type: {content_type}',
+                        f'Content-Length: {len(content)}', 'Connection: keep-alive']
+                head += [f'{name}: {value}' for name, value in extra_headers.items()]
+                writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + content)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+async def run_server(host, port, shortener):
+    server = await asyncio.start_server(shortener.serve_connection, host, port)
+    logger.info(f"Stand-in shortener listening on http://{host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Serve an in-memory stand-in for the URL shortener API')
+    parser.add_argument('--host', default='127.0.0.1', help='address to listen on')
+    parser.add_argument('--port', type=int, default=5000, help='port to listen on')
+    parser.add_argument('--base-url', help='prefix of returned shortened URLs (default: http://host:port)')
+    parser.add_argument('--latency-ms', type=float, default=0.0, help='fixed service time added to every request')
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help='uniform random service time on top of --latency-ms')
+    parser.add_argument('--concurrency', type=int, default=0,
+                        help='requests served at once (0 = unlimited); lower values make the server queue')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of non-health requests answered with 500')
+    parser.add_argument('--seed', type=int, help='seed for ids, jitter and injected errors')
+    return parser.parse_args(argv)
+
+def main():
+    args = parse_args()
+    shortener = StandInShortener(args.base_url or f'http://{args.host}:{args.port}', args.latency_ms, args.jitter_ms,
+                                 args.concurrency, args.error_rate, args.seed)
+    try:
+        asyncio.run(run_server(args.host, args.port, shortener))
+    except KeyboardInterrupt:
+        logger.info("Stand-in shortener stopped")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+import os
+import sys
+import importlib.util
+
+import pytest
+
+SCRIPT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def load_script(name, filename):
+    """Import one of the hyphen-named scripts as a module"""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SCRIPT_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture(scope='session')
+def analyze_results():
+    return load_script('analyze_results', 'analyze-results.py')
+
+@pytest.fixture(scope='session')
+def load_generator():
+    return load_script('load_generator', 'load-generator.py')
+
+@pytest.fixture(scope='session')
+def stand_in_server():
+    return load_script('stand_in_server', 'stand-in-server.py')
@@ -0,0 +1,210 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+
+def test_parse_k8s_quantity_units(analyze_results):
+    parsed = analyze_results.parse_k8s_quantity(['250m', '2', '1.5', '128Ki', '64Mi', '2Gi', '1e3', '3k'])
+    expected = [0.25, 2.0, 1.5, 128 * 2**10, 64 * 2**20, 2 * 2**30, 1000.0, 3000.0]
+    np.testing.assert_allclose(parsed.to_numpy(), expected)
+
+def test_parse_k8s_quantity_scale(analyze_results):
+    parsed = analyze_results.parse_k8s_quantity(['64Mi', '1Gi', '512Ki', '1048576'], scale=2**20)
+    np.testing.assert_allclose(parsed.to_numpy(), [64.0, 1024.0, 0.5, 1.0])
+
+def test_parse_k8s_quantity_garbage_is_nan(analyze_results):
+    values = pd.Series(['100m', 'abc', '', None, '12Xi', '5 Mi', 'Mi'], index=list('abcdefg'))
+    parsed = analyze_results.parse_k8s_quantity(values)
+    assert parsed.index.tolist() == list('abcdefg')
+    assert parsed['a'] == pytest.approx(0.1)
+    assert parsed.iloc[1:].isna().all()
+
+@pytest.mark.parametrize('name, endpoint', [
+    ('http://localhost:5000/metrics', '/metrics'),
+    ('http://localhost:5000/health', '/health'),
+    ('http://localhost:5000/shorten', '/shorten'),
+    ('http://localhost:5000/abC123', '/:shortenedId'),
+    ('/:shortenedId', '/:shortenedId'),
+])
+def test_k6_endpoint(analyze_results, name, endpoint):
+    assert analyze_results.k6_endpoint(name) == endpoint
+
+def test_static_routes_come_from_server_js(analyze_results, tmp_path):
+    assert set(analyze_results.SERVER_STATIC_ROUTES) <= set(analyze_results.K6_STATIC_ROUTES)
+    server = tmp_path / 'server.js'
+    server.write_text('app.get("/health", h);\napp.post(\n  "/shorten", h);\napp.get("/:shortenedId", h);\n')
+    assert analyze_results.server_static_routes(str(server)) == ('/health', '/shorten')
+    assert analyze_results.server_static_routes(str(tmp_path / 'missing.js')) == analyze_results.SERVER_STATIC_ROUTES
+
+QUANTILES = [0.5, 0.75, 0.9, 0.95, 0.99, 0.999]
+
+def latency_samples(seed, size=200_000):
+    """Lognormal latencies in ms with a median of about 20 ms and a long tail"""
+    return np.random.default_rng(seed).lognormal(mean=3.0, sigma=1.0, size=size)
+
+def test_histogram_percentiles_within_relative_error(analyze_results):
+    samples = latency_samples(1)
+    histogram = analyze_results.LatencyHistogram()
+    histogram.record(samples)
+    for q in QUANTILES:
+        expected = np.percentile(samples, q * 100)
+        assert histogram.quantile(q) == pytest.approx(expected, rel=analyze_results.HISTOGRAM_RELATIVE_ERROR)
+    assert histogram.mean() == pytest.approx(samples.mean())
+
+def test_histogram_merge_matches_combined_samples(analyze_results):
+    first, second = latency_samples(1), latency_samples(2, size=50_000) * 3
+    merged = analyze_results.LatencyHistogram()
+    merged.record(first)
+    other = analyze_results.LatencyHistogram()
+    other.record(second)
+    merged.merge(other)
+
+    combined = analyze_results.LatencyHistogram()
+    combined.record(np.concatenate([first, second]))
+    np.testing.assert_array_equal(merged.counts, combined.counts)
+    assert (merged.count, merged.min, merged.max) == (combined.count, combined.min, combined.max)
+    assert merged.total == pytest.approx(combined.total)
+    for q in QUANTILES:
+        assert merged.quantile(q) == combined.quantile(q)
+
+def test_histogram_merge_rejects_other_layouts(analyze_results):
+    with pytest.raises(ValueError):
+        analyze_results.LatencyHistogram().merge(analyze_results.LatencyHistogram(relative_error=0.05))
+
+def scaling_frames(p95, max_replicas=5):
+    """An HPA scaling 1 -> 3 at t=20s, with one k6 p95 per 10s window"""
+    start = pd.Timestamp('2025-01-01 12:00:00')
+    hpa = pd.DataFrame({
+        'Timestamp': [start + pd.Timedelta(seconds=10 * i) for i in range(6)],
+        'MinReplicas': 1,
+        'MaxReplicas': max_replicas,
+        'CurrentReplicas': [1, 1, 1, 3, 3, 3],
+        'DesiredReplicas': [1, 1, 3, 3, 3, 3],
+        'CurrentCPUUtilization': [20, 90, 90, 60, 40, 40],
+        'TargetCPUUtilization': 50
+    })
+    latency = pd.DataFrame({
+        'timestamp': [start + pd.Timedelta(seconds=10 * i) for i in range(len(p95))],
+        'count': 100,
+        'p95': p95
+    })
+    return {'http_req_duration': latency}, hpa
+
+def test_autoscaling_recovery_lag_needs_a_violation(analyze_results):
+    percentiles, hpa = scaling_frames([100, 120, 110, 100, 90, 90])
+    result = analyze_results.analyze_autoscaling(percentiles, None, hpa, slo_ms=500)
+    event = result['events'].iloc[0]
+    assert event['SLOViolation'] == 0
+    assert np.isnan(event['RecoveryLag']) and np.isnan(event['TotalLag'])
+    assert pd.isna(event['Recovery'])
+
+def test_autoscaling_recovery_lag_after_a_violation(analyze_results):
+    percentiles, hpa = scaling_frames([100, 900, 900, 800, 200, 100])
+    result = analyze_results.analyze_autoscaling(percentiles, None, hpa, slo_ms=500)
+    event = result['events'].iloc[0]
+    assert event['SLOViolation'] == 30
+    assert event['RecoveryLag'] == 10
+    assert event['TotalLag'] == 30
+
+@pytest.mark.parametrize('max_replicas', [0, '', None])
+def test_autoscaling_without_max_replicas(analyze_results, max_replicas):
+    percentiles, hpa = scaling_frames([100, 900, 900, 800, 200, 100], max_replicas=max_replicas)
+    result = analyze_results.analyze_autoscaling(percentiles, None, hpa, slo_ms=500)
+    assert result is not None
+    assert np.isnan(result['summary']['saturated_seconds'])
+    assert len(result['events']) == 1
+
+def test_autoscaling_without_max_replicas_column(analyze_results):
+    percentiles, hpa = scaling_frames([100, 900, 900, 800, 200, 100])
+    result = analyze_results.analyze_autoscaling(percentiles, None, hpa.drop(columns=['MaxReplicas']), slo_ms=500)
+    assert result is not None
+    assert np.isnan(result['summary']['saturated_seconds'])
+
+def test_autoscaling_saturation(analyze_results):
+    percentiles, hpa = scaling_frames([100, 900, 900, 800, 200, 100], max_replicas=3)
+    result = analyze_results.analyze_autoscaling(percentiles, None, hpa, slo_ms=500)
+    assert result['summary']['saturated_seconds'] == 30
+
+def ramp_rates(scale, seed, start_window=1_000_000):
+    """Per-window request counts of a run ramping 10 -> 200 req/s in stages, with Poisson noise"""
+    rng = np.random.default_rng(seed)
+    stages = np.repeat([10, 50, 100, 200, 100], 12) * 10 * scale
+    rows = []
+    for endpoint, share in (('redirect', 0.8), ('shorten', 0.2)):
+        counts = rng.poisson(stages * share)
+        rows += [{'endpoint': endpoint, 'window': start_window + i, 'requests': c} for i, c in enumerate(counts)]
+    return pd.DataFrame(rows)
+
+def throughput_rows(analyze_results, base_rates, cand_rates):
+    run = lambda rates: {'endpoint_histograms': {}, 'k6_histograms': {}, 'endpoint_rates': rates}
+    comparison = analyze_results.compare_runs(run(base_rates), run(cand_rates))
+    return comparison[comparison['statistic'] == 'req/s'].set_index('endpoint')
+
+def test_throughput_ci_of_identical_ramped_runs_is_narrow(analyze_results):
+    # Same schedule, different noise and a different wall-clock start
+    rows = throughput_rows(analyze_results, ramp_rates(1.0, 1), ramp_rates(1.0, 2, start_window=2_000_000))
+    assert not rows['regression'].any()
+    assert (rows['ci_low_pct'] > -5).all() and (rows['ci_high_pct'] < 5).all()
+
+def test_throughput_regression_is_flagged(analyze_results):
+    rows = throughput_rows(analyze_results, ramp_rates(1.0, 1), ramp_rates(0.8, 2))
+    assert rows.loc['all', 'regression']
+    assert rows.loc['redirect', 'regression']
+    assert rows.loc['all', 'delta_pct'] == pytest.approx(-20, abs=2)
+
+def k6_points(first_second, seconds, rng):
+    """k6 NDJSON for 10 requests a second: duration, request count and failure points per request"""
+    lines = []
+    for i in range(seconds * 10):
+        time = pd.Timestamp('2025-04-07T12:00:00Z') + pd.Timedelta(seconds=first_second + i / 10)
+        stamp = time.isoformat().replace('+00:00', 'Z')
+        tags = {'name': '/shorten', 'method': 'POST', 'status': '201'}
+        for metric, value in (('http_req_duration', rng.lognormal(3.0, 0.5)), ('http_reqs', 1),
+                              ('http_req_failed', float(rng.random() < 0.1))):
+            lines.append(json.dumps({'type': 'Point', 'metric': metric,
+                                     'data': {'time': stamp, 'value': value, 'tags': tags}}))
+    return ''.join(line + '\n' for line in lines)
+
+def follow_state(analyze_results, results_dir):
+    (results_dir / 'metrics').mkdir(exist_ok=True)
+    return analyze_results.FollowState(str(results_dir), str(results_dir / 'metrics'), window_seconds=3600)
+
+def assert_matches_one_shot(analyze_results, state, results_dir):
+    columns = analyze_results.load_k6_results(str(results_dir))
+    assert state.point_count == columns.point_count
+    followed, loaded = state.histograms['http_req_duration'], columns.histograms['http_req_duration']
+    np.testing.assert_array_equal(followed.counts, loaded.counts)
+    for q in QUANTILES:
+        assert followed.quantile(q) == loaded.quantile(q)
+    assert sum(window['requests'] for window in state.windows.values()) == columns.histograms['http_reqs'].count
+    assert sum(window['latency'].count for window in state.windows.values()) == loaded.count
+    failed = np.concatenate(columns.values['http_req_failed']).sum()
+    assert sum(window['failed'] for window in state.windows.values()) == failed
+
+def test_follow_matches_one_shot_load(analyze_results, tmp_path):
+    rng = np.random.default_rng(1)
+    k6_file = tmp_path / 'k6-results.json'
+    state = follow_state(analyze_results, tmp_path)
+    assert not state.poll()
+    for first_second in (0, 25, 40):
+        with open(k6_file, 'a') as f:
+            f.write(k6_points(first_second, 15, rng))
+        assert state.poll()
+    # A partly written last line waits for the next poll
+    with open(k6_file, 'a') as f:
+        f.write('{"type":"Point","metric":"http_reqs"')
+    assert not state.poll()
+    assert_matches_one_shot(analyze_results, state, tmp_path)
+
+def test_follow_restarts_when_results_are_truncated(analyze_results, tmp_path):
+    rng = np.random.default_rng(2)
+    k6_file = tmp_path / 'k6-results.json'
+    state = follow_state(analyze_results, tmp_path)
+    k6_file.write_text(k6_points(0, 30, rng))
+    state.poll()
+    # A new run starts in the same results directory
+    k6_file.write_text(k6_points(600, 10, rng))
+    assert state.poll()
+    assert_matches_one_shot(analyze_results, state, tmp_path)
+    assert min(state.windows) * analyze_results.PERCENTILE_WINDOW_NS >= pd.Timestamp('2025-04-07T12:10:00Z').value
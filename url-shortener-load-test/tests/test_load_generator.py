@@ -0,0 +1,94 @@
+import ssl
+import asyncio
+import subprocess
+
+import numpy as np
+import pytest
+
+@pytest.fixture(scope='module')
+def certificate(tmp_path_factory):
+    """Self-signed certificate and key for localhost"""
+    directory = tmp_path_factory.mktemp('tls')
+    cert, key = directory / 'cert.pem', directory / 'key.pem'
+    try:
+        subprocess.run(['openssl', 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-days', '1',
+                        '-subj', '/CN=localhost', '-addext', 'subjectAltName=DNS:localhost',
+                        '-keyout', str(key), '-out', str(cert)], check=True, capture_output=True)
+    except (OSError, subprocess.CalledProcessError):
+        pytest.skip('openssl is needed to create a test certificate')
+    return cert, key
+
+async def scheme_server(ssl_context):
+    """HTTP server answering each connection's first request with whether it arrived over TLS"""
+    async def handle(reader, writer):
+        while (await reader.readline()) not in (b'\r\n', b''):
+            pass
+        body = b'tls' if writer.get_extra_info('ssl_object') else b'plain'
+        writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: %d\r\n\r\n%s' % (len(body), body))
+        await writer.drain()
+        writer.close()
+    return await asyncio.start_server(handle, '127.0.0.1', 0, ssl=ssl_context)
+
+def test_https_requests_use_tls(load_generator, certificate):
+    cert, key = certificate
+    server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server_context.load_cert_chain(cert, key)
+    client_context = ssl.create_default_context(cafile=str(cert))
+
+    async def run():
+        server = await scheme_server(server_context)
+        port = server.sockets[0].getsockname()[1]
+        pool = load_generator.HttpConnectionPool(f'https://localhost:{port}', 1, ssl_context=client_context)
+        try:
+            status, _, content, _, _ = await pool.request('GET', '/health')
+        finally:
+            await pool.close()
+            server.close()
+        return status, content
+
+    assert asyncio.run(run()) == (200, b'tls')
+
+def test_default_ports(load_generator):
+    assert load_generator.HttpConnectionPool('https://example.com', 1).port == 443
+    assert load_generator.HttpConnectionPool('http://example.com', 1).port == 80
+    assert load_generator.HttpConnectionPool('https://example.com:8443', 1).port == 8443
+
+def test_unsupported_scheme_is_rejected(load_generator):
+    with pytest.raises(ValueError, match='use http or https'):
+        load_generator.HttpConnectionPool('ftp://example.com', 1)
+
+def test_constant_rate_run_against_stand_in(load_generator, stand_in_server, analyze_results, tmp_path):
+    rate, duration, latency_ms = 50, 1.0, 30.0
+
+    async def run():
+        # One connection and a 30 ms service time cannot keep up with 50 req/s, so requests queue
+        shortener = stand_in_server.StandInShortener('', latency_ms=latency_ms, seed=1)
+        server = await asyncio.start_server(shortener.serve_connection, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        shortener.base_url = f'http://127.0.0.1:{port}'
+        args = load_generator.parse_args([
+            '--base-url', shortener.base_url, '--rate', str(rate), '--duration', str(duration),
+            '--schedule', 'constant', '--mix', 'shorten=1,redirect=1', '--preseed', '5',
+            '--connections', '1', '--seed', '1', '--output-dir', str(tmp_path)
+        ])
+        try:
+            return await load_generator.run_load_test(args, str(tmp_path))
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    test = asyncio.run(run())
+    assert sum(test.counts.values()) == rate * duration
+    assert sum(test.failures.values()) == 0
+
+    columns = analyze_results.load_k6_results(str(tmp_path))
+    assert columns.histograms['http_reqs'].count == rate * duration
+    durations = np.concatenate(columns.values['http_req_duration'])
+    waiting = np.concatenate(columns.values['http_req_waiting'])
+    assert len(durations) == rate * duration
+    assert durations.min() >= latency_ms
+    # Server time stays near the injected latency while time from the intended start
+    # also counts the wait for the connection, growing by about 10 ms per request
+    assert np.median(waiting) < 3 * latency_ms
+    assert durations.max() > 10 * latency_ms
+    assert durations.max() >= waiting.max() + 200
@@ -0,0 +1,279 @@
+import nodeFetch from "node-fetch";
+
+// Statuses that prove the URL does not exist; anything else the origin
+// answers with means it is there, possibly behind auth or a redirect
+const MISSING_STATUSES = new Set([404, 410]);
+// Origins that reject HEAD are asked again with GET
+const HEAD_REJECTED_STATUSES = new Set([405, 501]);
+
+// Checks that submitted URLs answer a HEAD request. validate() resolves to
+// true or false when the origin gave a definitive answer, and to null when
+// it could not be checked (network error, timeout, 429 or 5xx). Definitive
+// results are cached per URL, hosts that cannot be reached at all are
+// remembered for a while so every URL on them does not wait for the timeout
+// again, and concurrent HEAD requests to one host are capped and shared
+// between identical URLs.
+export class UrlValidator {
+  constructor({
+    fetch = nodeFetch,
+    timeoutMs = 5000,
+    maxEntries = 10000,
+    validTtlMs = 600000,
+    invalidTtlMs = 60000,
+    hostFailureTtlMs = 30000,
+    maxPerHost = 4,
+  } = {}) {
+    this.fetch = fetch;
+    this.timeoutMs = timeoutMs;
+    this.maxEntries = maxEntries;
+    this.validTtlMs = validTtlMs;
+    this.invalidTtlMs = invalidTtlMs;
+    this.hostFailureTtlMs = hostFailureTtlMs;
+    this.maxPerHost = maxPerHost;
+    this.results = new Map();
+    this.hostFailures = new Map();
+    this.pending = new Map();
+    this.hosts = new Map();
+    this.hits = 0;
+    this.misses = 0;
+    this.hostFailureHits = 0;
+    this.requests = 0;
+    this.unknown = 0;
+  }
+
+  // Returns the cached definitive result for a URL, or undefined
+  peek(url) {
+    const entry = this.results.get(url);
+    if (entry === undefined) return undefined;
+    if (entry.expiresAt <= Date.now()) {
+      this.results.delete(url);
+      return undefined;
+    }
+    return entry.valid;
+  }
+
+  async validate(url) {
+    const cached = this.peek(url);
+    if (cached !== undefined) {
+      this.hits++;
+      return cached;
+    }
+    this.misses++;
+
+    let host;
+    try {
+      const parsed = new URL(url);
+      if (parsed.protocol !== "http:" && parsed.protocol !== "https:") {
+        return this.remember(url, false);
+      }
+      host = parsed.host;
+    } catch {
+      return this.remember(url, false);
+    }
+
+    const hostDownUntil = this.hostFailures.get(host);
+    if (hostDownUntil !== undefined) {
+      if (hostDownUntil > Date.now()) {
+        this.hostFailureHits++;
+        this.unknown++;
+        return null;
+      }
+      this.hostFailures.delete(host);
+    }
+
+    let pending = this.pending.get(url);
+    if (!pending) {
+      pending = this.check(url, host).finally(() => this.pending.delete(url));
+      this.pending.set(url, pending);
+    }
+    return pending;
+  }
+
+  async check(url, host) {
+    await this.acquire(host);
+    try {
+      let status = await this.request(url, "HEAD");
+      if (HEAD_REJECTED_STATUSES.has(status)) {
+        status = await this.request(url, "GET");
+      }
+      if (MISSING_STATUSES.has(status)) return this.remember(url, false);
+      if (status === 429 || status >= 500) {
+        this.unknown++;
+        return null;
+      }
+      return this.remember(url, true);
+    } catch (error) {
+      console.error("URL validation failed:", error.message);
+      this.hostFailures.set(host, Date.now() + this.hostFailureTtlMs);
+      if (this.hostFailures.size > this.maxEntries) {
+        this.hostFailures.delete(this.hostFailures.keys().next().value);
+      }
+      this.unknown++;
+      return null;
+    } finally {
+      this.release(host);
+    }
+  }
+
+  // Returns the response status; the body of a GET is never read
+  async request(url, method) {
+    this.requests++;
+    const controller = new AbortController();
+    const timer = setTimeout(() => controller.abort(), this.timeoutMs);
+    try {
+      const response = await this.fetch(url, {
+        method,
+        redirect: "manual",
+        signal: controller.signal,
+      });
+      return response.status;
+    } finally {
+      clearTimeout(timer);
+      controller.abort();
+    }
+  }
+
+  remember(url, valid) {
+    this.results.delete(url);
+    this.results.set(url, {
+      valid,
+      expiresAt: Date.now() + (valid ? this.validTtlMs : this.invalidTtlMs),
+    });
+    if (this.results.size > this.maxEntries) {
+      this.results.delete(this.results.keys().next().value);
+    }
+    return valid;
+  }
+
+  acquire(host) {
+    let slot = this.hosts.get(host);
+    if (!slot) {
+      slot = { active: 0, waiting: [] };
+      this.hosts.set(host, slot);
+    }
+    if (slot.active < this.maxPerHost) {
+      slot.active++;
+      return Promise.resolve();
+    }
+    return new Promise((resolve) => slot.waiting.push(resolve));
+  }
+
+  release(host) {
+    const slot = this.hosts.get(host);
+    const next = slot.waiting.shift();
+    if (next) return next();
+    slot.active--;
+    if (slot.active === 0) this.hosts.delete(host);
+  }
+
+  stats() {
+    let active = 0;
+    let waiting = 0;
+    for (const slot of this.hosts.values()) {
+      active += slot.active;
+      waiting += slot.waiting.length;
+    }
+    return {
+      cacheSize: this.results.size,
+      hits: this.hits,
+      misses: this.misses,
+      unreachableHosts: this.hostFailures.size,
+      hostFailureHits: this.hostFailureHits,
+      requests: this.requests,
+      unknown: this.unknown,
+      inFlight: active,
+      waitingForHost: waiting,
+    };
+  }
+}
+
+// Validates mappings that were created without waiting for their HEAD
+// request, and hands the ones that are definitively missing to onInvalid.
+// URLs that could not be checked are retried with a growing delay; after
+// `maxAttempts` the mapping is kept unverified.
+export class ValidationQueue {
+  constructor({
+    validator,
+    onInvalid,
+    concurrency = 8,
+    maxQueued = 10000,
+    maxAttempts = 3,
+    retryDelayMs = 30000,
+  }) {
+    this.validator = validator;
+    this.onInvalid = onInvalid;
+    this.concurrency = concurrency;
+    this.maxQueued = maxQueued;
+    this.maxAttempts = maxAttempts;
+    this.retryDelayMs = retryDelayMs;
+    this.jobs = [];
+    this.running = 0;
+    this.retrying = 0;
+    this.validated = 0;
+    this.invalid = 0;
+    this.retried = 0;
+    this.unverified = 0;
+    this.dropped = 0;
+  }
+
+  // Returns false when the queue is full and the mapping stays unvalidated
+  enqueue(shortId, url, attempt = 1) {
+    if (this.jobs.length >= this.maxQueued) {
+      this.dropped++;
+      return false;
+    }
+    this.jobs.push({ shortId, url, attempt });
+    if (this.running < this.concurrency) this.work();
+    return true;
+  }
+
+  retry(job) {
+    if (job.attempt >= this.maxAttempts) {
+      this.unverified++;
+      return;
+    }
+    this.retried++;
+    this.retrying++;
+    setTimeout(() => {
+      this.retrying--;
+      this.enqueue(job.shortId, job.url, job.attempt + 1);
+    }, this.retryDelayMs * job.attempt).unref();
+  }
+
+  async work() {
+    this.running++;
+    try {
+      let job;
+      while ((job = this.jobs.shift())) {
+        const valid = await this.validator.validate(job.url);
+        if (valid === null) {
+          this.retry(job);
+          continue;
+        }
+        this.validated++;
+        if (valid) continue;
+        this.invalid++;
+        try {
+          await this.onInvalid(job.shortId, job.url);
+        } catch (err) {
+          console.error("Failed to handle invalid URL:", err);
+        }
+      }
+    } finally {
+      this.running--;
+    }
+  }
+
+  stats() {
+    return {
+      queued: this.jobs.length,
+      running: this.running,
+      retrying: this.retrying,
+      validated: this.validated,
+      invalid: this.invalid,
+      retried: this.retried,
+      unverified: this.unverified,
+      dropped: this.dropped,
+    };
+  }
+}